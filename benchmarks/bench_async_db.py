@@ -0,0 +1,158 @@
+"""Compare /analyses/ throughput with the synchronous and the async database session.
+
+Serves the list endpoint as it was before the async database layer (an async
+endpoint querying through the blocking Session, with the blocking user
+lookup) next to the current one, and sends the same concurrent load to both
+in process. --latency-ms adds a round trip to every query, as a database
+server over the network would: the blocking driver holds the event loop for
+it, the async one waits without holding it.
+
+With more concurrent requests than the blocking engine's pool holds
+connections, the old endpoint waits for a connection on the event loop
+while the requests holding one need the loop to finish, and everything
+stalls until the pool times out; those runs are reported, not made.
+
+Needs the app's dependencies (the analysis model is imported with src.main).
+
+Usage: python benchmarks/bench_async_db.py [--concurrency 1 10 50] [--requests 500] [--latency-ms 0 2]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import List
+
+import corpus  # noqa: F401 (puts the repository on sys.path)
+
+# src.main serves static/ and templates/ from the working directory
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "bench_async_db.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from sqlalchemy.util import await_only
+
+from src import models, schemas
+from src.database import SessionLocal, async_engine, engine, get_db
+from src.main import app
+from src.security import create_access_token, oauth2_scheme, token_subject
+
+CONCURRENCY = [1, 10, 50]
+LATENCIES_MS = [0, 2]
+
+# Seconds added to every query, changed between runs
+round_trip = 0.0
+
+SYNC_POOL_CAPACITY = engine.pool.size() + engine.pool._max_overflow
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def blocking_round_trip(*args):
+    if round_trip:
+        time.sleep(round_trip)
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def async_round_trip(*args):
+    if round_trip:
+        await_only(asyncio.sleep(round_trip))
+
+
+async def sync_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+    """security.get_current_user before the async database layer."""
+    username = token_subject(token)
+    return db.query(models.User).filter(models.User.username == username).first()
+
+
+@app.get("/bench/sync-analyses/", response_model=List[schemas.TextAnalysis])
+async def sync_get_analyses(skip: int = 0, limit: int = 10, db: Session = Depends(get_db),
+                            current_user: models.User = Depends(sync_current_user)):
+    """The /analyses/ endpoint before the async database layer."""
+    query = db.query(models.TextAnalysis).filter(models.TextAnalysis.user_id == current_user.id)
+    analyses = query.order_by(models.TextAnalysis.created_at.desc()).offset(skip).limit(limit).all()
+    return analyses
+
+
+def seed(analyses=200):
+    db = SessionLocal()
+    try:
+        user = models.User(email="bench@example.com", username="bench", hashed_password="-")
+        db.add(user)
+        db.commit()
+        db.add_all(
+            models.TextAnalysis(title=f"Analysis {i}", text=corpus.PARAGRAPHS[i % len(corpus.PARAGRAPHS)],
+                                user_id=user.id, sentiment="neutral", word_count=50)
+            for i in range(analyses)
+        )
+        db.commit()
+    finally:
+        db.close()
+    return create_access_token({"sub": "bench"})
+
+
+async def load(client, path, token, concurrency, requests):
+    """Send requests GETs, concurrency at a time. Returns (requests per second, p50, p99 in ms)."""
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            assert response.status_code == 200, response.text
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return requests / elapsed, p50 * 1000, p99 * 1000
+
+
+async def run(args):
+    global round_trip
+    token = seed()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Warm up both paths (connection pools, route compilation)
+        await load(client, "/bench/sync-analyses/", token, 1, 20)
+        await load(client, "/analyses/", token, 1, 20)
+
+        print(f"Blocking engine pool: {SYNC_POOL_CAPACITY} connections\n")
+        print(f"{'latency':>8} {'clients':>8} {'sync req/s':>11} {'async req/s':>12} "
+              f"{'sync p50/p99':>15} {'async p50/p99':>15}")
+        for latency_ms in args.latency_ms:
+            round_trip = latency_ms / 1000
+            for concurrency in args.concurrency:
+                async_ = await load(client, "/analyses/", token, concurrency, args.requests)
+                if concurrency > SYNC_POOL_CAPACITY:
+                    print(f"{latency_ms:>6}ms {concurrency:>8} {'stalls':>11} {async_[0]:>12.0f} "
+                          f"{'-':>15} {async_[1]:>6.1f}/{async_[2]:>6.1f}ms")
+                    continue
+                sync = await load(client, "/bench/sync-analyses/", token, concurrency, args.requests)
+                print(f"{latency_ms:>6}ms {concurrency:>8} {sync[0]:>11.0f} {async_[0]:>12.0f} "
+                      f"{sync[1]:>6.1f}/{sync[2]:>6.1f}ms {async_[1]:>6.1f}/{async_[2]:>6.1f}ms")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /analyses/ with the sync and async database sessions')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=CONCURRENCY, help='Concurrent clients')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per run')
+    parser.add_argument('--latency-ms', type=float, nargs='+', default=LATENCIES_MS,
+                        help='Round trip added to every query')
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
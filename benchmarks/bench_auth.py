@@ -0,0 +1,142 @@
+"""Measure how a burst of logins affects /analyze/ traffic, and the cost of the token user lookup.
+
+One client sends /analyze/ requests back to back while a burst of
+concurrent logins arrives, first at a login endpoint that runs bcrypt on the
+event loop (as /token did before), then at /token, which runs it in the
+password hashing threads. Reports /analyze/ latency during each burst and
+the time per token user lookup with and without the user cache.
+
+Needs the app's dependencies (the analysis model is imported with src.main).
+
+Usage: python benchmarks/bench_auth.py [--logins 20] [--lookups 2000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import corpus
+
+# src.main serves static/ and templates/ from the working directory
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "bench_auth.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+
+import httpx
+from fastapi import Depends, HTTPException
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import models, security
+from src.database import AsyncSessionLocal, SessionLocal, async_engine, engine, get_async_db
+from src.main import analysis_executor, app
+
+PASSWORD = "correct horse battery staple"
+
+
+@app.post("/bench/blocking-token")
+async def blocking_login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    """/token with bcrypt on the event loop, as before the password hashing threads."""
+    result = await db.execute(select(models.User).where(models.User.username == form_data.username))
+    user = result.scalars().first()
+    if not user or not security.verify_password(form_data.password, user.hashed_password):
+        raise HTTPException(status_code=401, detail="Incorrect username or password")
+    return {"access_token": security.create_access_token({"sub": user.username}), "token_type": "bearer"}
+
+
+def seed():
+    db = SessionLocal()
+    try:
+        db.add(models.User(email="bench@example.com", username="bench",
+                           hashed_password=security.get_password_hash(PASSWORD)))
+        db.commit()
+    finally:
+        db.close()
+    return security.create_access_token({"sub": "bench"})
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return p50 * 1000, p99 * 1000, latencies[-1] * 1000
+
+
+async def analyze_during(client, token, burst=None):
+    """/analyze/ latencies while burst (a coroutine) runs, or for a fixed number of requests without one."""
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    task = asyncio.ensure_future(burst) if burst is not None else None
+    i = 0
+    while (task is not None and not task.done()) or (task is None and i < 50):
+        i += 1
+        text = f"{corpus.PARAGRAPHS[i % len(corpus.PARAGRAPHS)]} Request {i}."
+        start = time.perf_counter()
+        response = await client.post("/analyze/", headers=headers, json={"title": f"Request {i}", "text": text})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    burst_time = await task if task is not None else None
+    return percentiles(latencies), burst_time
+
+
+async def login_burst(client, path, logins):
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(
+        client.post(path, data={"username": "bench", "password": PASSWORD}) for _ in range(logins)
+    ))
+    assert all(response.status_code == 200 for response in responses)
+    return time.perf_counter() - start
+
+
+async def lookup_time(token, lookups, cached):
+    async with AsyncSessionLocal() as db:
+        await security.user_from_token(token, db)
+        start = time.perf_counter()
+        for _ in range(lookups):
+            if not cached:
+                security.user_cache.clear()
+            await security.user_from_token(token, db)
+        return (time.perf_counter() - start) / lookups
+
+
+async def run(args):
+    token = seed()
+    analysis_executor.start()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        await analyze_during(client, token)
+
+        print(f"/analyze/ latency, {args.logins} concurrent logins, "
+              f"{security.PASSWORD_HASH_WORKERS} password hashing threads:")
+        print(f"{'':>24} {'p50':>8} {'p99':>8} {'max':>8} {'burst':>8}")
+        for name, burst in [
+            ("no logins", None),
+            ("bcrypt on the loop", login_burst(client, "/bench/blocking-token", args.logins)),
+            ("bcrypt in threads", login_burst(client, "/token", args.logins)),
+        ]:
+            (p50, p99, worst), burst_time = await analyze_during(client, token, burst)
+            burst_column = f"{burst_time:7.2f}s" if burst_time is not None else f"{'-':>8}"
+            print(f"{name:>24} {p50:6.1f}ms {p99:6.1f}ms {worst:6.1f}ms {burst_column}")
+
+    uncached = await lookup_time(token, args.lookups, cached=False)
+    cached = await lookup_time(token, args.lookups, cached=True)
+    print(f"\nToken user lookup: {uncached * 1e6:.0f}us uncached, {cached * 1e6:.0f}us cached")
+    analysis_executor.shutdown()
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark login bursts against /analyze/ and the user cache')
+    parser.add_argument('--logins', type=int, default=20, help='Concurrent logins in a burst')
+    parser.add_argument('--lookups', type=int, default=2000, help='Token user lookups timed')
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Compare the whole-file and memory-mapped counting paths of book_analyzer.
+
+Writes a synthetic ASCII file and one with non-ASCII text in every block,
+checks that both paths produce the same report and prints their throughput.
+
+Usage: python benchmarks/bench_book_analyzer.py [--size-mb 200] [--workers 1 4]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from corpus import PARAGRAPHS
+
+from src import book_analyzer
+
+# Non-ASCII text so the decoding path is exercised as well as the ASCII one
+EXTRA = "Naïve café owners in Zürich said ΟΔΟΣ and İstanbul are ☕ ünusual　words."
+
+
+def write_corpus(path, size, ascii_only=False):
+    block = ("\n\n".join(PARAGRAPHS + ([] if ascii_only else [EXTRA])) + "\n").encode('utf-8')
+    with open(path, 'wb') as f:
+        written = 0
+        while written < size:
+            f.write(block)
+            written += len(block)
+    return written
+
+
+def report(word_count, char_counts):
+    return word_count, sorted(char_counts.items(), key=lambda x: x[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark book_analyzer counting')
+    parser.add_argument('--size-mb', type=int, default=200, help='Size of the generated file')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count() or 1],
+                        help='Worker counts to time the memory-mapped path with')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for ascii_only in (True, False):
+            path = os.path.join(directory, 'book.txt')
+            size = write_corpus(path, args.size_mb * 2 ** 20, ascii_only)
+            print(f"{'ASCII' if ascii_only else 'Mixed UTF-8'} file: {size / 2 ** 20:.0f} MB")
+
+            start = time.perf_counter()
+            text = book_analyzer.get_book_text(path)
+            expected = report(book_analyzer.count_words(text), book_analyzer.count_characters(text))
+            del text
+            baseline = time.perf_counter() - start
+            print(f"  {'whole file':<20} {baseline:8.2f} s {size / 2 ** 20 / baseline:8.1f} MB/s")
+
+            for workers in args.workers:
+                start = time.perf_counter()
+                result = report(*book_analyzer.analyze_file(path, workers))
+                elapsed = time.perf_counter() - start
+                status = "same report" if result == expected else "REPORT DIFFERS"
+                print(f"  {f'mmap, {workers} workers':<20} {elapsed:8.2f} s {size / 2 ** 20 / elapsed:8.1f} MB/s"
+                      f"  {baseline / elapsed:5.1f}x  {status}")
+
+
+if __name__ == "__main__":
+    main()
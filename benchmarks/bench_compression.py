@@ -0,0 +1,282 @@
+"""Compare storage and query times of analyses stored uncompressed, zstd-compressed and with a trained dictionary.
+
+Stores analyses as they were stored before compression (plain text and
+JSON), with texts drawn from the word frequencies of textblob's English
+corpus and results shaped like the analyzer's, then rewrites them as
+`python -m src.compression migrate` does, without a dictionary and then
+with one trained on them. For each storage it reports the database size
+(after VACUUM), the bytes of the compressed columns, and the p50 latency
+of loading an analysis by id with every column (as every query loaded
+them before they were deferred) and without the deferred ones (as the
+ownership check of DELETE /analyses/{id} does), of loading a user's 100
+newest analyses both ways, and of GET /analyses/{id}, a page of GET
+/analyses/ and a search.
+
+Needs the app's dependencies (the analysis model is imported with src.main).
+
+Usage: python benchmarks/bench_compression.py [--analyses 20000] [--users 10] [--queries 300]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import itertools
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import corpus  # noqa: F401 (puts the repository on sys.path)
+
+# src.main serves static/ and templates/ from the working directory
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "bench_compression.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+
+import httpx
+import textblob
+from sqlalchemy import insert, select, text
+from sqlalchemy.orm import undefer_group
+from sqlalchemy.sql import column, table
+
+from src import compression, models, security, terms
+from src.database import AsyncSessionLocal, SessionLocal, async_engine, engine
+from src.main import app
+
+LABELS = ["PERSON", "ORGANIZATION", "LOCATION", "DATE", "MONEY", "PERCENT"]
+CATEGORIES = ["technical", "business", "academic", "news", "casual", "creative"]
+IMPROVEMENTS = [
+    "Break down long sentences to improve clarity and readability",
+    "Consider using more active voice to make writing more engaging",
+    "Simplify complex vocabulary where possible for better accessibility",
+    "Vary word choice to avoid repetition and maintain reader engagement",
+]
+
+
+def vocabulary():
+    """Words of textblob's English spelling corpus and their counts."""
+    path = os.path.join(os.path.dirname(textblob.__file__), "en", "en-spelling.txt")
+    words, counts = [], []
+    with open(path) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 2 and not line.startswith(";"):
+                words.append(parts[0])
+                counts.append(int(parts[1]))
+    return words, counts
+
+
+def make_row(rng, words, cum_weights, user_id, created_at):
+    """An analysis as the columns stored it before compression: text, and JSON dumped as the JSON type did."""
+    sentences = [" ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(8, 28))).capitalize() + "."
+                 for _ in range(rng.randint(10, 80))]
+    text_words = " ".join(sentences).split()
+    phrases = [" ".join(rng.sample(text_words, 2)) for _ in range(15)]
+    key_phrases = [{
+        "phrase": phrase, "relevance_score": round(rng.random(), 4), "frequency": rng.randint(1, 6),
+        "importance": round(rng.uniform(10, 90), 2), "tfidf_score": round(rng.random() / 20, 4),
+        "phrase_type": rng.choice(["noun_phrase", "proper_noun", "verb_phrase"]),
+        "category": rng.choice(["concept", "location", "organization"]), "length_score": 1.0,
+        "pos_diversity": round(rng.random(), 3), "semantic_coherence": round(rng.random(), 3),
+        "position_score": round(rng.random(), 3), "capitalization_score": rng.choice([0.0, 1.0]),
+        "word_count": 2, "char_count": len(phrase), "rank": rank + 1, "percentile": round(100 - rank * 6.67, 2),
+    } for rank, phrase in enumerate(phrases)]
+    return {
+        "title": " ".join(rng.sample(text_words, 4)).title(),
+        "text": " ".join(sentences),
+        "created_at": created_at,
+        "user_id": user_id,
+        "sentiment": rng.choice(["positive", "negative", "neutral"]),
+        "polarity": rng.uniform(-1, 1),
+        "word_count": len(text_words),
+        "flesch_score": rng.uniform(0, 100),
+        "difficulty_level": rng.choice(["Easy", "Standard", "Difficult"]),
+        "content_category": rng.choice(CATEGORIES),
+        "professional_metrics": json.dumps({
+            "passive_voice_count": rng.randint(0, 5), "long_sentences": rng.randint(0, 10),
+            "complex_words": rng.randint(0, 80), "repetitive_words": rng.randint(0, 50),
+            "clarity_score": round(rng.uniform(40, 100), 2),
+        }),
+        "professional_scores": json.dumps({name: rng.uniform(0, 100)
+                                           for name in ["clarity", "conciseness", "objectivity", "vocabulary_diversity"]}),
+        "writing_improvements": json.dumps(rng.sample(IMPROVEMENTS, rng.randint(0, 3))),
+        "key_phrases": json.dumps(key_phrases),
+        "named_entities": json.dumps({label: sorted(set(rng.sample(text_words, rng.randint(1, 4))))
+                                      for label in rng.sample(LABELS, 3)}),
+        "category_distribution": json.dumps({category: round(rng.random(), 1) for category in CATEGORIES}),
+        "summary": " ".join(sentences[:2]),
+    }, key_phrases
+
+
+def seed(count, users, batch=1000):
+    """Store analyses uncompressed, through a table without the compressed types."""
+    rng = random.Random(0)
+    words, counts = vocabulary()
+    cum_weights = list(itertools.accumulate(counts))
+    db = SessionLocal()
+    try:
+        user_ids = []
+        for u in range(users):
+            user = models.User(email=f"bench{u}@example.com", username=f"bench{u}", hashed_password="-")
+            db.add(user)
+            db.commit()
+            user_ids.append(user.id)
+        start = datetime(2024, 1, 1)
+        first_row, _ = make_row(rng, words, cum_weights, user_ids[0], start)
+        analyses = table("text_analyses", *(column(name) for name in ["id", *first_row]))
+        for first in range(0, count, batch):
+            rows, phrases = [], []
+            for i in range(first, min(count, first + batch)):
+                row, key_phrases = make_row(rng, words, cum_weights, user_ids[i % users], start + timedelta(seconds=i))
+                rows.append({"id": i + 1, **row})
+                phrases.extend({"analysis_id": i + 1, **term} for term in terms.key_phrase_rows(key_phrases))
+            db.execute(insert(analyses), rows)
+            db.execute(insert(models.AnalysisKeyPhrase), phrases)
+            db.commit()
+        # Searched for: words of middling frequency
+        return user_ids, [word for word, n in zip(words, counts) if 50 <= n <= 500 and len(word) > 3]
+    finally:
+        db.close()
+
+
+def vacuum():
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("VACUUM"))
+
+
+def rewrite(codec):
+    """Rewrite every analysis with a codec, as the migrate command does."""
+    compression.codec = codec
+    db = SessionLocal()
+    try:
+        with contextlib.redirect_stderr(io.StringIO()):
+            compression.migrate(db)
+    finally:
+        db.close()
+    vacuum()
+
+
+def storage():
+    db = SessionLocal()
+    try:
+        report = compression.storage_report(db)
+    finally:
+        db.close()
+    return os.path.getsize(DATABASE_PATH), sum(row["stored"] for row in report), sum(row["plain"] for row in report)
+
+
+def p50(latencies):
+    return sorted(latencies)[len(latencies) // 2] * 1000
+
+
+async def load_by_id(analysis_ids, user_ids, undeferred):
+    latencies = []
+    for analysis_id in analysis_ids:
+        query = select(models.TextAnalysis).where(models.TextAnalysis.id == analysis_id,
+                                                  models.TextAnalysis.user_id == user_ids[(analysis_id - 1) % len(user_ids)])
+        if undeferred:
+            query = query.options(undefer_group(models.CONTENT))
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            assert (await db.execute(query)).scalars().first() is not None
+        latencies.append(time.perf_counter() - start)
+    return p50(latencies)
+
+
+async def load_newest(user_ids, repeat, undeferred):
+    latencies = []
+    for i in range(repeat):
+        query = select(models.TextAnalysis).where(models.TextAnalysis.user_id == user_ids[i % len(user_ids)])
+        query = query.order_by(models.TextAnalysis.created_at.desc(), models.TextAnalysis.id.desc()).limit(100)
+        if undeferred:
+            query = query.options(undefer_group(models.CONTENT))
+        start = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            assert len((await db.execute(query)).scalars().all()) == 100
+        latencies.append(time.perf_counter() - start)
+    return p50(latencies)
+
+
+async def requests(client, paths, tokens):
+    latencies = []
+    for (path, params), token in zip(paths, tokens):
+        start = time.perf_counter()
+        response = await client.get(path, params=params, headers={"Authorization": f"Bearer {token}"})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return p50(latencies)
+
+
+async def measure(client, args, user_ids, search_words, rng):
+    """p50 latencies (ms) of the queries measured, on the analyses as currently stored."""
+    analysis_ids = [rng.randint(1, args.analyses) for _ in range(args.queries)]
+    owners = [(analysis_id - 1) % len(user_ids) for analysis_id in analysis_ids]
+    tokens = [security.create_access_token({"sub": f"bench{owner}"}) for owner in owners]
+    return [
+        await load_by_id(analysis_ids, user_ids, True),
+        await load_by_id(analysis_ids, user_ids, False),
+        await load_newest(user_ids, max(10, args.queries // 10), True),
+        await load_newest(user_ids, max(10, args.queries // 10), False),
+        await requests(client, [(f"/analyses/{analysis_id}", {}) for analysis_id in analysis_ids], tokens),
+        await requests(client, [("/analyses/", {"limit": 20})] * args.queries, tokens),
+        await requests(client, [("/analyses/search", {"q": rng.choice(search_words)}) for _ in analysis_ids], tokens),
+    ]
+
+
+async def run(args, user_ids, search_words):
+    rng = random.Random(1)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        print(f"{'storage':>15} {'db MB':>7} {'columns MB':>11} {'by id all':>10} {'deferred':>9} "
+              f"{'100 all':>9} {'deferred':>9} {'GET one':>8} {'list':>7} {'search':>7}")
+        plain = None
+        for name, make_codec in [
+            ("uncompressed", None),
+            ("zstd", lambda: compression.Codec(args.level)),
+            ("zstd + dict", lambda: compression.Codec(args.level, train_dictionary(args))),
+        ]:
+            if make_codec is not None:
+                start = time.perf_counter()
+                await async_engine.dispose()
+                rewrite(make_codec())
+                rewrite_time = time.perf_counter() - start
+            else:
+                vacuum()
+            size, stored, uncompressed = storage()
+            plain = plain or uncompressed
+            latencies = await measure(client, args, user_ids, search_words, rng)
+            print(f"{name:>15} {size / 2 ** 20:>7.1f} {stored / 2 ** 20:>11.1f} "
+                  + " ".join(f"{latency:>7.2f}ms" for latency in latencies[:4])
+                  + " " + " ".join(f"{latency:>5.1f}ms" for latency in latencies[4:]))
+            if make_codec is not None:
+                print(f"{'':>15} rewritten in {rewrite_time:.0f}s, columns {plain / stored:.1f}x smaller than uncompressed")
+    await async_engine.dispose()
+
+
+def train_dictionary(args):
+    db = SessionLocal()
+    try:
+        return compression.train(db, args.samples)
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark compressed storage of analyses')
+    parser.add_argument('--analyses', type=int, default=20000, help='Analyses stored')
+    parser.add_argument('--users', type=int, default=10, help='Users the analyses are spread over')
+    parser.add_argument('--queries', type=int, default=300, help='Queries timed per measurement')
+    parser.add_argument('--level', type=int, default=compression.COMPRESSION_LEVEL, help='zstd compression level')
+    parser.add_argument('--samples', type=int, default=2000, help='Analyses the dictionary is trained on')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    user_ids, search_words = seed(args.analyses, args.users)
+    print(f"Stored {args.analyses} analyses in {time.perf_counter() - start:.1f}s\n")
+    asyncio.run(run(args, user_ids, search_words))
+
+
+if __name__ == "__main__":
+    main()
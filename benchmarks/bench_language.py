@@ -0,0 +1,59 @@
+"""Compare langdetect.detect on the whole text with the sampled, seeded language identification.
+
+Checks whether repeated runs agree on short, ambiguous texts, then times
+both as the text grows.
+
+Usage: python benchmarks/bench_language.py [--sizes 1000 10000 100000 1000000] [--runs 20]
+"""
+import argparse
+import time
+
+from corpus import make_text
+
+from langdetect import detect
+
+from src.language import _identify_sample, identify_language
+
+SIZES = [1000, 10000, 100000, 1000000]
+
+# Too short for a clear answer, so unseeded runs disagree
+AMBIGUOUS = ["Hello", "Ok ok", "Data analysis report"]
+
+
+def best_time(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def uncached_identify(text):
+    _identify_sample.cache_clear()
+    return identify_language(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark language identification')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Text sizes in characters')
+    parser.add_argument('--runs', type=int, default=20, help='Repeated runs for the determinism check')
+    args = parser.parse_args()
+
+    print(f"Distinct answers over {args.runs} runs:")
+    for text in AMBIGUOUS:
+        langdetect_answers = sorted({detect(text) for _ in range(args.runs)})
+        sampled_answers = sorted({uncached_identify(text) for _ in range(args.runs)})
+        print(f"  {text!r:<24} langdetect.detect: {langdetect_answers}  identify_language: {sampled_answers}")
+
+    print(f"\n{'chars':>9} {'langdetect':>11} {'sampled':>9} {'cached':>9}")
+    for size in args.sizes:
+        text = make_text(size)
+        full = best_time(lambda: detect(text))
+        sampled = best_time(lambda: uncached_identify(text))
+        cached = best_time(lambda: identify_language(text))
+        print(f"{len(text):>9} {full * 1000:9.1f}ms {sampled * 1000:7.1f}ms {cached * 1000:7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Compare GET /analyses/ pages: full analyses with offsets, against the compact list with offsets and with cursors.
+
+Fills a database with one user's analyses, each with a text, summary and
+JSON results of realistic size, serves the list endpoint as it was before
+the compact list (full rows, offset pagination) next to the current one,
+and reports the bytes and time per page as pages get deeper.
+
+Needs the app's dependencies (the analysis model is imported with src.main).
+
+Usage: python benchmarks/bench_list_pagination.py [--analyses 50000] [--depths 0 1000 10000 49990] [--repeat 5]
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import corpus
+
+# src.main serves static/ and templates/ from the working directory
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "bench_list_pagination.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer_group
+
+from src import models, schemas, security
+from src.database import SessionLocal, async_engine, engine, get_async_db
+from src.listing import encode_cursor, keyset_order
+from src.main import app
+
+DEPTHS = [0, 1000, 10000, 49990]
+PAGE_SIZE = 10
+
+
+@app.get("/bench/full-analyses/", response_model=List[schemas.TextAnalysis])
+async def full_analyses(skip: int = 0, limit: int = 10, db: AsyncSession = Depends(get_async_db),
+                        current_user: models.User = Depends(security.get_current_active_user)):
+    """The /analyses/ endpoint before the compact list: whole analyses, offset pagination."""
+    query = select(models.TextAnalysis).options(undefer_group(models.CONTENT)).where(
+        models.TextAnalysis.user_id == current_user.id
+    )
+    query = query.order_by(models.TextAnalysis.created_at.desc()).offset(skip).limit(limit)
+    return (await db.execute(query)).scalars().all()
+
+
+def make_row(i, user_id, start):
+    rng = random.Random(i)
+    paragraphs = [corpus.PARAGRAPHS[(i + k) % len(corpus.PARAGRAPHS)] for k in range(6)]
+    return {
+        "title": f"Analysis {i}",
+        "text": "\n\n".join(paragraphs),
+        "created_at": start + timedelta(seconds=i),
+        "user_id": user_id,
+        "sentiment": rng.choice(["positive", "negative", "neutral"]),
+        "polarity": rng.uniform(-1, 1),
+        "subjectivity": rng.random(),
+        "sentiment_confidence": rng.random(),
+        "tone": "formal",
+        "professional_metrics": {f"metric_{k}": rng.random() for k in range(8)},
+        "flesch_score": rng.uniform(20, 80),
+        "avg_sentence_length": rng.uniform(10, 25),
+        "word_count": rng.randint(100, 600),
+        "sentence_count": rng.randint(5, 40),
+        "syllable_count": rng.randint(150, 900),
+        "difficulty_level": "Standard",
+        "professional_scores": {f"score_{k}": rng.random() for k in range(6)},
+        "writing_improvements": [f"Consider shortening sentence {k}." for k in range(4)],
+        "key_phrases": [{"phrase": f"key phrase {k}", "score": rng.random(), "count": k} for k in range(10)],
+        "named_entities": {"ORG": ["Stanford University"], "GPE": ["New York", "London"], "MONEY": ["$2 million"]},
+        "language_code": "en",
+        "language_confidence": 0.99,
+        "content_category": "business",
+        "category_confidence": rng.random(),
+        "category_distribution": {c: rng.random() for c in ["business", "technology", "science", "opinion"]},
+        "summary": " ".join(paragraphs[:2]),
+    }
+
+
+def seed(count, batch=5000):
+    db = SessionLocal()
+    try:
+        user = models.User(email="bench@example.com", username="bench", hashed_password="-")
+        db.add(user)
+        db.commit()
+        start = datetime(2024, 1, 1)
+        for first in range(0, count, batch):
+            db.execute(insert(models.TextAnalysis), [make_row(i, user.id, start) for i in range(first, min(count, first + batch))])
+            db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def cursor_at(user_id, depth):
+    """The cursor a client paging from the start would hold at depth."""
+    if depth == 0:
+        return None
+    db = SessionLocal()
+    try:
+        query = select(models.TextAnalysis.id, models.TextAnalysis.created_at).where(
+            models.TextAnalysis.user_id == user_id
+        ).order_by(*keyset_order("created_at", "desc")).offset(depth - 1).limit(1)
+        row = db.execute(query).one()
+        return encode_cursor("created_at", "desc", row.created_at, row.id)
+    finally:
+        db.close()
+
+
+async def timed_get(client, path, params, headers, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = await client.get(path, params=params, headers=headers)
+        timings.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return sorted(timings)[len(timings) // 2], len(response.content), [item["id"] for item in response.json()]
+
+
+async def run(args, user_id):
+    headers = {"Authorization": f"Bearer {security.create_access_token({'sub': 'bench'})}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await timed_get(client, "/analyses/", {}, headers, 3)
+        print(f"{'depth':>7} {'full+offset':>20} {'compact+offset':>20} {'compact+cursor':>20}")
+        for depth in args.depths:
+            runs = [
+                await timed_get(client, "/bench/full-analyses/", {"skip": depth, "limit": PAGE_SIZE}, headers, args.repeat),
+                await timed_get(client, "/analyses/", {"skip": depth, "limit": PAGE_SIZE}, headers, args.repeat),
+            ]
+            cursor = cursor_at(user_id, depth)
+            params = {"limit": PAGE_SIZE, **({"cursor": cursor} if cursor else {})}
+            runs.append(await timed_get(client, "/analyses/", params, headers, args.repeat))
+            assert runs[0][2] == runs[1][2] == runs[2][2], "pages differ"
+            print(f"{depth:>7} " + " ".join(f"{t * 1000:7.1f}ms {size / 1024:7.1f}KB" for t, size, _ in runs))
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark GET /analyses/ projections and pagination')
+    parser.add_argument('--analyses', type=int, default=50000, help='Analyses stored for the user')
+    parser.add_argument('--depths', type=int, nargs='+', default=DEPTHS, help='Analyses before the page')
+    parser.add_argument('--repeat', type=int, default=5, help='Timed requests per page (median reported)')
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    start = time.perf_counter()
+    user_id = seed(args.analyses)
+    size = os.path.getsize(DATABASE_PATH) / 2 ** 20
+    print(f"Stored {args.analyses} analyses ({size:.0f}MB) in {time.perf_counter() - start:.1f}s\n")
+    asyncio.run(run(args, user_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare live (incremental) analysis of an edited document against re-analyzing it after every edit.
+
+Types a sentence into the middle of documents of growing size, one word per
+update, and reports the time per update of LiveDocument.analyze and of a
+full analyze_text, and whether the final results agree. The live update
+time should stay flat as the document grows.
+
+Usage: python benchmarks/bench_live.py [--sizes 5000 20000 ...] [--fields sentiment,readability]
+"""
+import argparse
+import time
+
+from corpus import PARAGRAPHS
+
+from src.live import LiveDocument
+from src.nlp import analyze_text
+
+SIZES = [5000, 20000, 50000, 100000]
+TYPED = "Meanwhile the editors rewrote this paragraph while the analysis kept up with them."
+
+
+def make_document(size):
+    """Distinct paragraphs (so none is served from another's cache) of roughly size characters."""
+    paragraphs = []
+    length = 0
+    while length < size:
+        paragraph = f"{PARAGRAPHS[len(paragraphs) % len(PARAGRAPHS)]} This is paragraph {len(paragraphs) + 1}."
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(paragraphs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark live analysis')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Document sizes in characters')
+    parser.add_argument('--fields', default='sentiment,readability,professional_metrics,category',
+                        help='Comma-separated live analysis components')
+    args = parser.parse_args()
+    fields = set(args.fields.split(','))
+
+    print(f"{'chars':>8} {'paragraphs':>10} {'first':>9} {'live/edit':>10} {'full/edit':>10} {'speedup':>8}  result")
+    for size in args.sizes:
+        text = make_document(size)
+        document = LiveDocument(fields)
+        start = time.perf_counter()
+        document.set_text(text)
+        first = document.analyze()
+        first_time = time.perf_counter() - start
+
+        # Type one word at a time at the end of the middle paragraph
+        position = text.index("\n\n", len(text) // 2)
+        live_times, full_times = [], []
+        for word in TYPED.split():
+            document.apply_edit(position, position, " " + word)
+            position += len(word) + 1
+            start = time.perf_counter()
+            update = document.analyze()
+            live_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            expected = analyze_text(document.text, fields)
+            full_times.append(time.perf_counter() - start)
+
+        live = sum(live_times) / len(live_times)
+        full = sum(full_times) / len(full_times)
+        status = "same" if update.analysis == expected else "DIFFERS"
+        print(f"{len(text):>8} {first.paragraphs:>10} {first_time * 1000:7.0f}ms {live * 1000:8.1f}ms "
+              f"{full * 1000:8.1f}ms {full / live:7.1f}x  {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Compare analyzing a long text as one Doc against chunked analysis.
+
+Reports time and peak traced memory of both modes and whether their results
+match. Peak memory of the single-Doc analysis grows with the text; the chunked
+analysis stays close to the cost of one chunk.
+
+Usage: python benchmarks/bench_long_document.py [--chunk-size N] [--sizes 20000 100000 ...]
+"""
+import argparse
+import time
+import tracemalloc
+
+from corpus import make_text
+
+from src.long_document import analyze_long_text
+from src.nlp import analyze_text
+
+SIZES = [20000, 50000, 100000, 200000]
+
+
+def measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def differences(single, chunked):
+    """Result keys whose values differ (entity lists are compared as sets)."""
+    keys = []
+    for key, value in single.items():
+        other = chunked[key]
+        if key == "named_entities":
+            value = {label: set(names) for label, names in value.items()}
+            other = {label: set(names) for label, names in other.items()}
+        if value != other:
+            keys.append(key)
+    return keys
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark chunked analysis of long documents')
+    parser.add_argument('--chunk-size', type=int, default=10000, help='Characters per chunk')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Text sizes in characters')
+    args = parser.parse_args()
+
+    analyze_text(make_text(1000))  # warm up
+    print(f"{'chars':>8} {'single ms':>10} {'single MB':>10} {'chunked ms':>11} {'chunked MB':>11}  differences")
+    for size in args.sizes:
+        text = make_text(size)
+        single, single_time, single_peak = measure(lambda: analyze_text(text))
+        chunked, chunked_time, chunked_peak = measure(
+            lambda: analyze_long_text(text, chunk_size=args.chunk_size)
+        )
+        print(f"{len(text):>8} {single_time * 1000:>10.0f} {single_peak / 2 ** 20:>10.1f} "
+              f"{chunked_time * 1000:>11.0f} {chunked_peak / 2 ** 20:>11.1f}  "
+              f"{', '.join(differences(single, chunked)) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Measure stored parses: serialized size, and re-analysis from a stored parse against re-parsing.
+
+For each text size, reports the size of the text, of a DocBin with spaCy's
+default attributes and of the DocBin parse_store keeps, then the time to
+analyze the text again by parsing it and by restoring its stored parse, for
+the statistics-only components and for every component (key phrases rerun
+tok2vec), and whether the results agree.
+
+Usage: python benchmarks/bench_parse_store.py [--sizes 2000 10000 50000] [--repeat N]
+"""
+import argparse
+import time
+import zlib
+
+from corpus import make_text
+
+from spacy.tokens import DocBin
+
+from src.long_document import analyze_long_text, iter_chunks
+from src.nlp import nlp, resolve_fields, _build_analysis
+from src.parse_store import STORED_ATTRS, SerializedParse, rebuild_analyzer, serialize_parse
+
+SIZES = [2000, 10000, 50000]
+CHUNK_SIZE = 10000
+STATISTICS_FIELDS = ["sentiment", "professional_metrics", "readability", "category"]
+
+
+class StoredParse:
+    """Stands in for a models.DocumentParse row."""
+
+    def __init__(self, parse: SerializedParse, chunk_size: int):
+        self.model = parse.model
+        self.data = parse.data
+        self.chunk_size = chunk_size
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def comparable(result):
+    # Entity lists are built from sets, so their order is arbitrary
+    result = dict(result)
+    if "named_entities" in result:
+        result["named_entities"] = {label: sorted(names) for label, names in result["named_entities"].items()}
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark stored parses')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES, help='Text sizes in characters')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs')
+    args = parser.parse_args()
+
+    print(f"{'chars':>7} {'text':>8} {'zlib text':>9} {'DocBin':>8} {'stored':>8} {'serialize':>10}")
+    texts = {}
+    for size in args.sizes:
+        text = make_text(size)
+        chunks = [text] if len(text) <= CHUNK_SIZE else [chunk for _, chunk in iter_chunks(text, CHUNK_SIZE)]
+        docs = list(nlp.pipe(chunks))
+        default = DocBin(docs=docs).to_bytes()
+        serialize_time, parse = best_time(lambda: serialize_parse(text, CHUNK_SIZE), 1)
+        texts[size] = (text, StoredParse(parse, CHUNK_SIZE))
+        print(f"{len(text):>7} {len(text.encode('utf-8')):>8} {len(zlib.compress(text.encode('utf-8'))):>9} "
+              f"{len(default):>8} {len(parse.data):>8} {serialize_time * 1000:8.0f}ms")
+
+    print(f"\n{'chars':>7} {'fields':<12} {'re-parse':>9} {'restore':>9} {'speedup':>8}  result")
+    for size, (text, stored) in texts.items():
+        for label, fields in (("statistics", STATISTICS_FIELDS), ("all", None)):
+            reparse_time, expected = best_time(lambda: analyze_long_text(text, fields, CHUNK_SIZE), args.repeat)
+            restore_time, result = best_time(
+                lambda: _build_analysis(rebuild_analyzer(text, stored.data, stored.chunk_size, fields),
+                                        resolve_fields(fields)),
+                args.repeat,
+            )
+            status = "same" if comparable(result) == comparable(expected) else "DIFFERS"
+            print(f"{len(text):>7} {label:<12} {reparse_time * 1000:7.0f}ms {restore_time * 1000:7.0f}ms "
+                  f"{reparse_time / restore_time:7.1f}x  {status}")
+
+
+if __name__ == "__main__":
+    main()
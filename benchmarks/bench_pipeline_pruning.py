@@ -0,0 +1,55 @@
+"""Compare parsing with the full spaCy pipeline against pipelines pruned per requested fields.
+
+Usage: python benchmarks/bench_pipeline_pruning.py [--repeat N]
+"""
+import argparse
+import time
+
+from corpus import make_text
+
+from src.nlp import nlp, parse, plan_pipeline, resolve_fields
+
+SIZES = [2000, 5000, 10000]
+FIELD_SETS = [
+    ["sentiment"],
+    ["named_entities"],
+    ["category"],
+    ["summary"],
+    ["readability"],
+    ["readability", "named_entities"],
+    None,
+]
+
+
+def best_time(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark spaCy pipeline pruning')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs per case')
+    args = parser.parse_args()
+
+    print(f"Pipeline: {', '.join(nlp.pipe_names)}")
+    for size in SIZES:
+        text = make_text(size)
+        nlp(text)  # warm up
+        full = best_time(lambda: nlp(text), args.repeat)
+        print(f"\n{len(text)} characters - full pipeline: {full * 1000:.1f} ms")
+        print(f"  {'fields':<32} {'pipes skipped / added':<48} {'ms':>8} {'speedup':>8}")
+        for fields in FIELD_SETS:
+            resolved = resolve_fields(fields)
+            plan = plan_pipeline(resolved)
+            elapsed = best_time(lambda: parse(text, resolved), args.repeat)
+            pipes = f"-{','.join(plan.disable) or 'none'} +{','.join(plan.extra) or 'none'}"
+            label = ",".join(fields) if fields else "all"
+            print(f"  {label:<32} {pipes:<48} {elapsed * 1000:>8.1f} {full / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Measure GET /analyses/search latency on a large synthetic corpus.
+
+Stores analyses for several users, with titles, texts and summaries drawn
+from a Zipf-distributed synthetic vocabulary (so some words are in most
+analyses and most words in few), then sends searches for words of each
+frequency band and reports the p50 and p99 latency, next to a LIKE scan
+of the same columns (what searching without the index costs).
+
+Needs the app's dependencies (the analysis model is imported with src.main).
+
+Usage: python benchmarks/bench_search.py [--analyses 100000] [--users 10] [--searches 200]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+import corpus  # noqa: F401 (puts the repository on sys.path)
+
+# src.main serves static/ and templates/ from the working directory
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "bench_search.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+
+import httpx
+from fastapi import Depends
+from sqlalchemy import insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import models, schemas, security
+from src.compression import plain_text
+from src.database import SessionLocal, async_engine, get_async_db
+from src.listing import keyset_order, list_options
+from src.main import app
+
+VOCABULARY = 50000
+SYLLABLES = ["ka", "lo", "mi", "nu", "pe", "ra", "si", "to", "vu", "ze", "bar", "den", "fol", "gim", "hux", "jor"]
+
+# Vocabulary ranks searched for, by band: the most frequent words are in
+# most analyses, the rarest in a handful
+BANDS = {"common word": (1, 10), "mid word": (100, 1000), "rare word": (10000, 20000)}
+
+
+@app.get("/bench/like-search", response_model=List[schemas.TextAnalysisListItem])
+async def like_search(q: str, limit: int = 10, db: AsyncSession = Depends(get_async_db),
+                      current_user: models.User = Depends(security.get_current_active_user)):
+    """
+    A search without the index: a LIKE scan of the user's analyses finding
+    every match (as ranking them needs), then the newest page of them.
+    """
+    pattern = f"%{q}%"
+    matches = select(models.TextAnalysis.id).where(
+        models.TextAnalysis.user_id == current_user.id,
+        or_(models.TextAnalysis.title.like(pattern), plain_text(models.TextAnalysis.text).like(pattern),
+            models.TextAnalysis.summary.like(pattern))
+    )
+    ids = (await db.execute(matches)).scalars().all()
+    query = select(models.TextAnalysis).options(*list_options()).where(models.TextAnalysis.id.in_(ids[-limit:]))
+    return (await db.execute(query.order_by(*keyset_order("created_at", "desc")))).scalars().all()
+
+
+def word(rank):
+    """A made-up word for a vocabulary rank, distinct for every rank and unchanged by the stemmer."""
+    syllables = []
+    while True:
+        rank, digit = divmod(rank, len(SYLLABLES))
+        syllables.append(SYLLABLES[digit])
+        if rank == 0:
+            return "".join(syllables) + "x"
+
+
+def seed(count, users, batch=5000):
+    rng = random.Random(0)
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, VOCABULARY + 1)))
+    words = lambda k: " ".join(word(rank) for rank in rng.choices(range(1, VOCABULARY + 1), cum_weights=cum_weights, k=k))
+    db = SessionLocal()
+    try:
+        user_ids = []
+        for u in range(users):
+            user = models.User(email=f"bench{u}@example.com", username=f"bench{u}", hashed_password="-")
+            db.add(user)
+            db.commit()
+            user_ids.append(user.id)
+        start = datetime(2024, 1, 1)
+        for first in range(0, count, batch):
+            rows = []
+            for i in range(first, min(count, first + batch)):
+                sentences = [words(rng.randint(8, 20)).capitalize() + "." for _ in range(rng.randint(8, 16))]
+                rows.append({
+                    "title": words(4).title(), "text": " ".join(sentences), "summary": " ".join(sentences[:2]),
+                    "user_id": user_ids[i % users], "created_at": start + timedelta(seconds=i),
+                })
+            db.execute(insert(models.TextAnalysis), rows)
+            db.commit()
+        return user_ids
+    finally:
+        db.close()
+
+
+def percentiles(latencies):
+    latencies = sorted(latencies)
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return p50 * 1000, p99 * 1000
+
+
+async def timed_searches(client, path, queries, tokens):
+    latencies, results = [], []
+    for q, token in zip(queries, tokens):
+        start = time.perf_counter()
+        response = await client.get(path, params={"q": q}, headers={"Authorization": f"Bearer {token}"})
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+        results.append(len(response.json()))
+    return percentiles(latencies), sum(results) / len(results)
+
+
+async def run(args, user_ids):
+    rng = random.Random(1)
+    tokens = [security.create_access_token({"sub": f"bench{u}"}) for u in range(len(user_ids))]
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await timed_searches(client, "/analyses/search", [word(1)] * 3, tokens[:3])
+        print(f"{'search':>16} {'results':>8} {'index p50':>10} {'p99':>9} {'LIKE p50':>10} {'p99':>9}")
+        searches = dict((name, lambda low=low, high=high: word(rng.randint(low, high))) for name, (low, high) in BANDS.items())
+        searches["two mid words"] = lambda: f"{searches['mid word']()} {searches['mid word']()}"
+        for name, make_query in searches.items():
+            queries = [make_query() for _ in range(args.searches)]
+            users = [rng.choice(tokens) for _ in range(args.searches)]
+            (p50, p99), results = await timed_searches(client, "/analyses/search", queries, users)
+            like = "-" if " " in queries[0] else None
+            if like is None:
+                count = max(1, args.searches // 10)
+                (like_p50, like_p99), _ = await timed_searches(client, "/bench/like-search", queries[:count], users[:count])
+                like = f"{like_p50:8.1f}ms {like_p99:7.1f}ms"
+            print(f"{name:>16} {results:8.1f} {p50:8.1f}ms {p99:7.1f}ms {like:>20}")
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark GET /analyses/search')
+    parser.add_argument('--analyses', type=int, default=100000, help='Analyses stored')
+    parser.add_argument('--users', type=int, default=10, help='Users the analyses are spread over')
+    parser.add_argument('--searches', type=int, default=200, help='Searches timed per band')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    user_ids = seed(args.analyses, args.users)
+    size = os.path.getsize(DATABASE_PATH) / 2 ** 20
+    print(f"Stored and indexed {args.analyses} analyses ({size:.0f}MB) in {time.perf_counter() - start:.1f}s\n")
+    asyncio.run(run(args, user_ids))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare the spaCy sentiment component with TextBlob on a fixed corpus.
+
+Reports the largest polarity/subjectivity differences, how many texts stay
+within the tolerance, and the latency of both implementations. Differences are expected on contractions:
+TextBlob's tokenizer splits "can't" into "ca n ' t" and misses the negation,
+while spaCy keeps "n't" as one token.
+
+Usage: python benchmarks/bench_sentiment.py [--tolerance 0.05] [--repeat N]
+"""
+import argparse
+import os
+import time
+
+from corpus import make_text
+
+from textblob import TextBlob
+
+from src.nlp import parse
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sentiment_corpus.txt")
+
+
+def load_corpus():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def spacy_sentiment(text):
+    doc = parse(text, {"sentiment"})
+    return doc._.polarity, doc._.subjectivity
+
+
+def textblob_sentiment(text):
+    sentiment = TextBlob(text).sentiment
+    return sentiment.polarity, sentiment.subjectivity
+
+
+def best_time(func, texts, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare spaCy and TextBlob sentiment scores')
+    parser.add_argument('--tolerance', type=float, default=0.05, help='Allowed absolute difference')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs')
+    args = parser.parse_args()
+
+    texts = load_corpus()
+    within = 0
+    max_polarity_diff = max_subjectivity_diff = 0.0
+    for text in texts:
+        ours = spacy_sentiment(text)
+        theirs = textblob_sentiment(text)
+        polarity_diff = abs(ours[0] - theirs[0])
+        subjectivity_diff = abs(ours[1] - theirs[1])
+        max_polarity_diff = max(max_polarity_diff, polarity_diff)
+        max_subjectivity_diff = max(max_subjectivity_diff, subjectivity_diff)
+        if polarity_diff <= args.tolerance and subjectivity_diff <= args.tolerance:
+            within += 1
+        else:
+            print(f"Outside tolerance: spaCy {ours[0]:.3f}/{ours[1]:.3f}, "
+                  f"TextBlob {theirs[0]:.3f}/{theirs[1]:.3f}: {text[:70]}")
+
+    print(f"\n{within}/{len(texts)} texts within {args.tolerance} of TextBlob")
+    print(f"Max polarity difference: {max_polarity_diff:.4f}")
+    print(f"Max subjectivity difference: {max_subjectivity_diff:.4f}")
+
+    print("\nLatency (sentiment only):")
+    for label, inputs in (("corpus", texts), ("5k-character text", [make_text(5000)])):
+        ours = best_time(spacy_sentiment, inputs, args.repeat)
+        theirs = best_time(textblob_sentiment, inputs, args.repeat)
+        print(f"  {label:<20} spaCy {ours * 1000:8.1f} ms   TextBlob {theirs * 1000:8.1f} ms   "
+              f"saved {(theirs - ours) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
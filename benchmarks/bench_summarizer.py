@@ -0,0 +1,104 @@
+"""Compare the original get_summary loop with the vectorized summarizer.
+
+Builds sentence statistics from the synthetic corpus (lowercased words minus
+stop words stand in for content lemmas, so no model is needed), checks that
+the frequency method picks the same sentences as the original on text
+without repeated sentences, shows how each handles a repeated sentence, and
+times both methods as the number of sentences grows.
+
+Usage: python benchmarks/bench_summarizer.py [--sentences 1000 10000 100000] [--repeat N]
+"""
+import argparse
+import re
+import time
+from collections import Counter
+from typing import List, NamedTuple
+
+from corpus import PARAGRAPHS
+
+from spacy.lang.en.stop_words import STOP_WORDS
+
+from src.summarizer import summarize
+
+SIZES = [1000, 10000, 100000]
+
+
+class Sentence(NamedTuple):
+    text: str
+    content_lemmas: List[str]
+
+
+def make_sentences(count):
+    """count distinct sentences: the corpus sentences, numbered so that none repeats."""
+    base = [s for paragraph in PARAGRAPHS for s in re.split(r"(?<=[.!?])\s+", paragraph)]
+    sentences = []
+    for i in range(count):
+        text = f"{base[i % len(base)][:-1]} in part {i // len(base) + 1}."
+        words = [word.lower() for word in re.findall(r"[A-Za-z$0-9']+", text)]
+        sentences.append(Sentence(text, [word for word in words if word not in STOP_WORDS]))
+    return sentences
+
+
+def original_summary(sentences, num_sentences=3):
+    """TextAnalyzer.get_summary before the summarizer, kept as the reference."""
+    word_freq = Counter(lemma for sent in sentences for lemma in sent.content_lemmas)
+    texts = [sent.text for sent in sentences]
+    sentence_scores = {}
+    for i, sent in enumerate(sentences):
+        sentence_words = sent.content_lemmas
+        word_count = len(sentence_words)
+        if word_count > 0:
+            freq_score = sum(word_freq[word] for word in sentence_words) / word_count
+            pos_score = 1.0 / (1 + i)
+            length_score = 1.0 if 5 <= word_count <= 25 else 0.5
+            sentence_scores[sent.text] = (freq_score * 0.6 + pos_score * 0.3 + length_score * 0.1)
+    summary_sentences = sorted(sentence_scores.items(), key=lambda x: x[1], reverse=True)[:num_sentences]
+    summary_sentences.sort(key=lambda x: texts.index(x[0]))
+    return ' '.join(sentence for sentence, score in summary_sentences)
+
+
+def vectorized_summary(sentences, **options):
+    return ' '.join(sentences[i].text for i in summarize(sentences, **options))
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the summarizer')
+    parser.add_argument('--sentences', type=int, nargs='+', default=SIZES, help='Numbers of sentences')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs')
+    args = parser.parse_args()
+
+    agree = sum(original_summary(make_sentences(n), k) == vectorized_summary(make_sentences(n), num_sentences=k)
+                for n in (1, 2, 5, 17, 50, 200) for k in (1, 3, 10))
+    print(f"Frequency method agrees with the original on {agree}/18 documents without repeated sentences")
+
+    # Sentences that differ only in position, the first repeated at the end. The original
+    # keys scores by text, so the first sentence takes its last position's score and drops out
+    repeated = [Sentence(f"Topic sentence {i}.", ["topic", "sentence"]) for i in range(6)]
+    repeated.append(repeated[0])
+    print("\nFirst of six equally frequent sentences repeated at the end:")
+    print(f"  original:  {original_summary(repeated)}")
+    print(f"  frequency: {vectorized_summary(repeated)}")
+
+    print(f"\n{'sentences':>9} {'original':>10} {'frequency':>10} {'textrank':>10} {'textrank 10%':>13}")
+    for n in args.sentences:
+        sentences = make_sentences(n)
+        timings = [
+            best_time(lambda: original_summary(sentences), args.repeat),
+            best_time(lambda: summarize(sentences), args.repeat),
+            best_time(lambda: summarize(sentences, method="textrank"), args.repeat),
+            best_time(lambda: summarize(sentences, ratio=0.1, method="textrank"), args.repeat),
+        ]
+        print(f"{n:>9} " + " ".join(f"{t * 1000:8.1f}ms" for t in timings[:3]) + f" {timings[3] * 1000:11.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
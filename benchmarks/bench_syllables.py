@@ -0,0 +1,73 @@
+"""Compare syllable counting: the original per-word loop and the memoized counter.
+
+Times both over the same corpus tokens; tests/test_syllables.py checks that
+they agree.
+
+Usage: python benchmarks/bench_syllables.py [--tokens 100000] [--repeat N]
+"""
+import argparse
+import re
+import time
+
+from corpus import make_text
+
+from src.syllables import count_syllables, count_syllables_lower
+
+
+def original_count_syllables(word):
+    """TextAnalyzer._count_syllables before the syllable engine, kept as the reference."""
+    word = word.lower()
+    count = 0
+    vowels = 'aeiouy'
+    if word[0] in vowels:
+        count += 1
+    for index in range(1, len(word)):
+        if word[index] in vowels and word[index - 1] not in vowels:
+            count += 1
+    if word.endswith('e'):
+        count -= 1
+    if count == 0:
+        count += 1
+    return count
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark syllable counting')
+    parser.add_argument('--tokens', type=int, default=100000, help='Number of tokens to count')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timed runs')
+    args = parser.parse_args()
+
+    words = []
+    while len(words) < args.tokens:
+        words.extend(re.findall(r"\S+", make_text(50000)))
+    words = words[:args.tokens]
+
+    lowered = [word.lower() for word in words]
+    count_syllables_lower.cache_clear()
+    cold = best_time(lambda: [count_syllables(word) for word in words], 1)
+    cases = [
+        ("original loop", lambda: [original_count_syllables(word) for word in words]),
+        ("memoized", lambda: [count_syllables(word) for word in words]),
+        ("memoized, lowercase input", lambda: [count_syllables_lower(word) for word in lowered]),
+    ]
+    print(f"\n{len(words)} tokens, {len(set(lowered))} distinct")
+    print(f"  {'memoized, cold cache':<28} {cold * 1000:8.1f} ms")
+    baseline = None
+    for label, func in cases:
+        elapsed = best_time(func, args.repeat)
+        baseline = baseline or elapsed
+        print(f"  {label:<28} {elapsed * 1000:8.1f} ms {baseline / elapsed:6.1f}x")
+    print(f"\nCache: {count_syllables_lower.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+"""Compare cross-analysis questions answered from the JSON columns in Python with the term tables in SQL.
+
+Stores one user's analyses with synthetic key phrases and entities (drawn
+from Zipf-distributed vocabularies, as real ones are), times the backfill
+of the term tables, then answers each question both ways, checks that the
+answers agree and reports the time of each.
+
+No model needed.
+
+Usage: python benchmarks/bench_terms.py [--analyses 100000] [--repeat 3]
+"""
+import argparse
+import itertools
+import os
+import random
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import corpus  # noqa: F401 (puts the repository on sys.path)
+
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "bench_terms.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+
+from sqlalchemy import insert, select
+
+from src import models, terms
+from src.database import SessionLocal, engine
+from src.listing import keyset_order
+
+PHRASES = 20000
+ENTITIES = {"ORGANIZATION": 3000, "PERSON": 5000, "LOCATION": 1000}
+
+
+def zipf_sampler(rng, size):
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, size + 1)))
+    return lambda k: rng.choices(range(size), cum_weights=cum_weights, k=k)
+
+
+def seed(count, batch=5000):
+    rng = random.Random(0)
+    phrase_ids = zipf_sampler(rng, PHRASES)
+    entity_ids = {label: zipf_sampler(rng, size) for label, size in ENTITIES.items()}
+    db = SessionLocal()
+    try:
+        user = models.User(email="bench@example.com", username="bench", hashed_password="-")
+        db.add(user)
+        db.commit()
+        start = datetime(2024, 1, 1)
+        for first in range(0, count, batch):
+            rows = []
+            for i in range(first, min(count, first + batch)):
+                phrases = [f"The phrase {n}" if n % 7 == 0 else f"phrase {n}" for n in set(phrase_ids(15))]
+                rows.append({
+                    "title": f"Analysis {i}", "text": "", "user_id": user.id,
+                    "created_at": start + timedelta(seconds=i),
+                    "key_phrases": [{"phrase": phrase, "relevance_score": round(rng.random(), 4)} for phrase in phrases],
+                    "named_entities": {label: sorted({f"{label.title()} {n}" for n in ids(2)})
+                                       for label, ids in entity_ids.items()},
+                })
+            db.execute(insert(models.TextAnalysis), rows)
+            db.commit()
+        return user.id
+    finally:
+        db.close()
+
+
+def json_column(db, column, user_id, last=None):
+    query = select(column).where(models.TextAnalysis.user_id == user_id)
+    if last is not None:
+        query = query.order_by(*keyset_order("created_at", "desc")).limit(last)
+    return db.scalars(query)
+
+
+def python_mentions(db, user_id, label, text):
+    """Ids of the analyses mentioning an entity, read from the named_entities JSON."""
+    query = select(models.TextAnalysis.id, models.TextAnalysis.named_entities).where(
+        models.TextAnalysis.user_id == user_id
+    )
+    wanted = terms.normalize_term(text)
+    return {row.id for row in db.execute(query)
+            if any(terms.normalize_term(t) == wanted for t in (row.named_entities or {}).get(label, []))}
+
+
+def python_top_phrases(db, user_id, last, limit=20):
+    """(normalized phrase, analyses) of the most frequent key phrases, read from the key_phrases JSON."""
+    counts = Counter()
+    for key_phrases in json_column(db, models.TextAnalysis.key_phrases, user_id, last):
+        counts.update({terms.normalize_term(item["phrase"]) for item in key_phrases or []})
+    return counts
+
+
+def sql_mentions(db, user_id, label, text):
+    return set(db.scalars(select(models.TextAnalysis.id).where(
+        models.TextAnalysis.user_id == user_id, models.TextAnalysis.id.in_(terms.mentioning(label, text))
+    )))
+
+
+def sql_top_phrases(db, user_id, last, limit=20):
+    return [(row.normalized, row.analyses) for row in db.execute(terms.top_phrases(user_id, last, limit))]
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the key phrase and entity tables')
+    parser.add_argument('--analyses', type=int, default=100000, help='Analyses stored for the user')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed runs per query (best reported)')
+    args = parser.parse_args()
+
+    models.Base.metadata.create_all(bind=engine)
+    user_id = seed(args.analyses)
+    db = SessionLocal()
+    try:
+        start = time.perf_counter()
+        indexed = terms.backfill(db, batch_size=5000)
+        elapsed = time.perf_counter() - start
+        phrase_rows = db.query(models.AnalysisKeyPhrase).count()
+        entity_rows = db.query(models.AnalysisEntity).count()
+        print(f"\nBackfilled {indexed} analyses ({phrase_rows} phrase rows, {entity_rows} entity rows) "
+              f"in {elapsed:.1f}s, {indexed / elapsed:.0f} analyses/s\n")
+
+        print(f"{'question':<50} {'JSON in Python':>15} {'SQL':>9}")
+        for label, text in [("ORGANIZATION", "Organization 0"), ("PERSON", "person 400")]:
+            python_time, expected = best_time(lambda: python_mentions(db, user_id, label, text), args.repeat)
+            sql_time, found = best_time(lambda: sql_mentions(db, user_id, label, text), args.repeat)
+            assert found == expected, "mentions differ"
+            question = f"analyses mentioning {label} {text} ({len(found)})"
+            print(f"{question:<50} {python_time * 1000:13.1f}ms {sql_time * 1000:7.1f}ms")
+        for last in [1000, None]:
+            python_time, counts = best_time(lambda: python_top_phrases(db, user_id, last), args.repeat)
+            sql_time, top = best_time(lambda: sql_top_phrases(db, user_id, last), args.repeat)
+            assert all(counts[normalized] == analyses for normalized, analyses in top), "counts differ"
+            assert top[0][1] == counts.most_common(1)[0][1], "top phrase differs"
+            question = f"top 20 phrases of the last {last} analyses" if last else "top 20 phrases of all analyses"
+            print(f"{question:<50} {python_time * 1000:13.1f}ms {sql_time * 1000:7.1f}ms")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
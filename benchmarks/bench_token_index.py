@@ -0,0 +1,46 @@
+"""Time the token statistics index and the components reading it on inputs up to 100k tokens.
+
+Usage: python benchmarks/bench_token_index.py [--max-tokens N]
+"""
+import argparse
+import time
+
+from corpus import make_text
+
+from src.nlp import nlp, TextAnalyzer
+
+COMPONENTS = {
+    "token index": lambda analyzer: analyzer.stats,
+    "professional metrics": lambda analyzer: analyzer.professional_metrics,
+    "readability": lambda analyzer: analyzer.get_readability_metrics(),
+    "significant words": lambda analyzer: analyzer._extract_significant_words(),
+    "category": lambda analyzer: analyzer.get_content_category(),
+    "summary": lambda analyzer: analyzer.get_summary(),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the single-pass token statistics index')
+    parser.add_argument('--max-tokens', type=int, default=100000, help='Largest input size in tokens')
+    args = parser.parse_args()
+
+    sizes = [args.max_tokens // 10, args.max_tokens // 2, args.max_tokens]
+    for size in sizes:
+        # The sample paragraphs average a little over five characters per token
+        text = make_text(size * 5)
+        nlp.max_length = max(nlp.max_length, len(text) + 1)
+        analyzer = TextAnalyzer(text)
+        start = time.perf_counter()
+        tokens = len(analyzer.doc)
+        parse_time = time.perf_counter() - start
+
+        print(f"\n{tokens} tokens ({len(text)} characters) - parse: {parse_time:.2f} s")
+        for name, component in COMPONENTS.items():
+            start = time.perf_counter()
+            component(analyzer)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:<22} {elapsed * 1000:>9.1f} ms  {elapsed * 1e6 / tokens:>7.2f} us/token")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""Compare /analyze/ under concurrent load with analyses stored per request and with write-behind.
+
+Sends the same concurrent load of /analyze/ requests with each analysis
+committed before the response (the default) and with the write-behind
+persister batching them in the background. The texts are analyzed once
+beforehand, so requests hit the result cache and the time measured is
+that of storing the analyses. --commit-ms adds a delay to every commit,
+as the fsync of a database server would. Reports requests per second,
+latency, failed requests, the commits made and the time close() takes to
+write what is left at the end.
+
+Needs the app's dependencies (the analysis model is imported with src.main).
+
+Usage: python benchmarks/bench_write_behind.py [--concurrency 1 10 50] [--requests 500] [--commit-ms 0 5]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import corpus
+
+# src.main serves static/ and templates/ from the working directory
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DATABASE_PATH = os.path.join(tempfile.mkdtemp(), "bench_write_behind.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+
+import httpx
+from sqlalchemy import event, func, select
+from sqlalchemy.util import await_only
+
+from src import models
+from src.database import AsyncSessionLocal, SessionLocal, async_engine
+from src.main import analysis_executor, analysis_persister, app
+from src.security import create_access_token
+
+CONCURRENCY = [1, 10, 50]
+COMMIT_MS = [0, 5]
+TEXTS = [f"{paragraph} Variant {i}." for i in range(8) for paragraph in corpus.PARAGRAPHS]
+
+# Seconds added to every commit, changed between runs
+commit_delay = 0.0
+commits = 0
+
+
+@event.listens_for(async_engine.sync_engine, "commit")
+def delayed_commit(*args):
+    global commits
+    commits += 1
+    if commit_delay:
+        await_only(asyncio.sleep(commit_delay))
+
+
+def seed():
+    db = SessionLocal()
+    try:
+        db.add(models.User(email="bench@example.com", username="bench", hashed_password="-"))
+        db.commit()
+    finally:
+        db.close()
+    return create_access_token({"sub": "bench"})
+
+
+async def stored_analyses():
+    async with AsyncSessionLocal() as db:
+        return (await db.execute(select(func.count(models.TextAnalysis.id)))).scalar()
+
+
+async def load(client, token, concurrency, requests):
+    """Send requests analyses, concurrency at a time. Returns (requests per second, p50, p99 in ms, failures)."""
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies, failures = [], []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for i in remaining:
+            start = time.perf_counter()
+            response = await client.post("/analyze/", headers=headers,
+                                         json={"title": f"Analysis {i}", "text": TEXTS[i % len(TEXTS)]})
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failures.append(response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return requests / elapsed, p50 * 1000, p99 * 1000, len(failures)
+
+
+async def run(args):
+    global commit_delay, commits
+    token = seed()
+    analysis_executor.start()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Analyze every text once, so the timed requests hit the result cache
+        assert (await load(client, token, 1, len(TEXTS)))[3] == 0
+
+        print(f"Write-behind: batches of {analysis_persister.batch_size}, "
+              f"at most {analysis_persister.max_delay * 1000:.0f}ms delay\n")
+        print(f"{'commit':>7} {'clients':>8} {'mode':>13} {'req/s':>7} {'p50/p99':>16} {'failed':>7} "
+              f"{'commits':>8} {'close':>8}")
+        for commit_ms in args.commit_ms:
+            commit_delay = commit_ms / 1000
+            for concurrency in args.concurrency:
+                for mode in ["per request", "write-behind"]:
+                    analysis_persister.enabled = mode == "write-behind"
+                    before = await stored_analyses()
+                    commits = 0
+                    rate, p50, p99, failed = await load(client, token, concurrency, args.requests)
+                    start = time.perf_counter()
+                    await analysis_persister.close()
+                    close_time = (time.perf_counter() - start) * 1000
+                    assert await stored_analyses() - before == args.requests - failed, "analyses lost"
+                    print(f"{commit_ms:>5g}ms {concurrency:>8} {mode:>13} {rate:>7.0f} "
+                          f"{p50:>6.1f}/{p99:>6.1f}ms {failed:>7} {commits:>8} {close_time:>6.1f}ms")
+    analysis_executor.shutdown()
+    await async_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /analyze/ with and without write-behind persistence')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=CONCURRENCY, help='Concurrent clients')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per run')
+    parser.add_argument('--commit-ms', type=float, nargs='+', default=COMMIT_MS, help='Delay added to every commit')
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Synthetic inputs shared by the benchmark scripts."""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+PARAGRAPHS = [
+    "The company announced a new software platform for data analysis today. "
+    "According to the research team, the platform uses a novel algorithm to process "
+    "financial data in real time. Business leaders in New York and London reported "
+    "that early results were promising, although some analysts think the market "
+    "may need more time.",
+    "The methodology was reviewed by independent experts at Stanford University, who "
+    "published a detailed study of the approach. The study was funded by a grant of "
+    "$2 million and took eighteen months to complete. Critics argued that the sample "
+    "was too small, but the authors maintained that the findings were robust.",
+    "I think the new design feels much better than the old one. Maybe it is the colors, "
+    "or maybe it is the way the menus are organized. Either way, I probably use it more "
+    "often now, and my colleagues seem to like it as well.",
+    "Revenue grew 12 percent in the third quarter, driven by strong demand in Europe and "
+    "Asia. The board approved a dividend increase and said it would invest further in "
+    "research. Shares rose sharply after the announcement on Tuesday morning.",
+]
+
+
+def make_text(size: int) -> str:
+    """Build a text of roughly size characters from the sample paragraphs."""
+    paragraphs = []
+    length = 0
+    i = 0
+    while length < size:
+        paragraph = PARAGRAPHS[i % len(PARAGRAPHS)]
+        paragraphs.append(paragraph)
+        length += len(paragraph) + 2
+        i += 1
+    return "\n\n".join(paragraphs)
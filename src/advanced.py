@@ -1,7 +1,7 @@
 from nltk.sentiment import SentimentIntensityAnalyzer
-import spacy
+from .model_registry import get_model
 
-nlp = spacy.load("en_core_web_sm")
+nlp = get_model()
 sia = SentimentIntensityAnalyzer()
 
 def analyze_sentiment(text):
@@ -0,0 +1,334 @@
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .cache import normalize_text
+from .executor import AnalysisExecutor
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+DEFAULT_EXTENSIONS = [".txt", ".md"]
+
+# (document id, text, error reading it)
+Document = Tuple[str, Optional[str], Optional[str]]
+
+
+def analyze_documents(texts: List[str], fields: Optional[List[str]] = None,
+                      max_length: int = 10000) -> List[Dict]:
+    """Analyze texts in a worker; texts longer than max_length are analyzed in chunks."""
+    from .long_document import analyze_long_text
+    from .nlp import analyze_texts
+
+    short = [i for i, text in enumerate(texts) if len(text) <= max_length]
+    results = [None] * len(texts)
+    for i, result in zip(short, analyze_texts([texts[i] for i in short], fields=fields)):
+        results[i] = result
+    for i, text in enumerate(texts):
+        if results[i] is None:
+            try:
+                results[i] = analyze_long_text(text, fields, max_length)
+            except Exception as e:
+                results[i] = {"error": str(e)}
+    return results
+
+
+def check_fields(fields: Optional[List[str]]):
+    """Raise ValueError for unknown fields. Runs in a worker so the CLI process never loads the model."""
+    from .nlp import resolve_fields
+    resolve_fields(fields)
+
+
+def read_directory(root: str, extensions: List[str], done: Set[str]) -> Iterator[Document]:
+    """Files under root with one of the extensions, in sorted order; ids are paths relative to root."""
+    for directory, subdirectories, filenames in os.walk(root):
+        subdirectories.sort()
+        for name in sorted(filenames):
+            if not name.endswith(tuple(extensions)):
+                continue
+            path = os.path.join(directory, name)
+            doc_id = os.path.relpath(path, root)
+            if doc_id in done:
+                continue
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    yield doc_id, f.read(), None
+            except (OSError, UnicodeDecodeError) as e:
+                yield doc_id, None, f"Cannot read file: {e}"
+
+
+def read_jsonl(path: str, text_field: str, id_field: str, done: Set[str]) -> Iterator[Document]:
+    """Records of a JSONL file; ids come from id_field, or the line number when it is missing."""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                if str(line_number) not in done:
+                    yield str(line_number), None, f"Invalid JSON: {e}"
+                continue
+            doc_id = str(record[id_field]) if isinstance(record, dict) and id_field in record else str(line_number)
+            if doc_id in done:
+                continue
+            text = record.get(text_field) if isinstance(record, dict) else None
+            if not isinstance(text, str):
+                yield doc_id, None, f"Record has no '{text_field}' string"
+            else:
+                yield doc_id, text, None
+
+
+class JSONLWriter:
+    """Appends one JSON object per document to a file, which doubles as the checkpoint."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+
+    def completed_ids(self) -> Set[str]:
+        """Ids already in the output. A line cut short by a crash is removed."""
+        if not os.path.exists(self.path):
+            return set()
+        done = set()
+        with open(self.path, 'rb+') as f:
+            valid_end = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                done.add(json.loads(line)["id"])
+                valid_end += len(line)
+            f.truncate(valid_end)
+        return done
+
+    def write(self, records: List[Dict]):
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+        for record in records:
+            self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class ParquetWriter:
+    """
+    Writes documents to numbered Parquet files in a directory, rows_per_file at a time.
+
+    Files are written under a temporary name and renamed once complete, so the
+    finished files are the checkpoint; rows not yet in one are redone on resume.
+    Nested results (key phrases, entities, ...) are stored as JSON strings.
+    """
+
+    def __init__(self, directory: str, rows_per_file: int = 10000):
+        if pa is None:
+            raise RuntimeError("Parquet output requires pyarrow. Install it using: pip install pyarrow")
+        self.directory = directory
+        self.rows_per_file = rows_per_file
+        self.schema = self._schema()
+        self.rows: List[Dict] = []
+        os.makedirs(directory, exist_ok=True)
+        self.next_part = len(self._parts())
+
+    @staticmethod
+    def _schema() -> "pa.Schema":
+        # Column types follow the text_analyses table
+        from sqlalchemy import Float, Integer
+        from .compression import json_column
+        from .models import TextAnalysis
+
+        fields = [pa.field("id", pa.string()), pa.field("error", pa.string())]
+        for column in TextAnalysis.__table__.columns:
+            if column.name in ("id", "title", "text", "excerpt", "text_hash", "created_at", "user_id"):
+                continue
+            if isinstance(column.type, Integer):
+                arrow_type = pa.int64()
+            elif isinstance(column.type, Float):
+                arrow_type = pa.float64()
+            else:
+                arrow_type = pa.string()
+            metadata = {"json": "1"} if json_column(column) else None
+            fields.append(pa.field(column.name, arrow_type, metadata=metadata))
+        return pa.schema(fields)
+
+    def _parts(self) -> List[str]:
+        return sorted(glob.glob(os.path.join(self.directory, "part-*.parquet")))
+
+    def completed_ids(self) -> Set[str]:
+        for leftover in glob.glob(os.path.join(self.directory, "part-*.parquet.tmp")):
+            os.remove(leftover)
+        done = set()
+        for part in self._parts():
+            done.update(pq.read_table(part, columns=["id"]).column("id").to_pylist())
+        return done
+
+    def write(self, records: List[Dict]):
+        for record in records:
+            row = {}
+            for field in self.schema:
+                value = record.get(field.name)
+                if value is not None and field.metadata:
+                    value = json.dumps(value)
+                row[field.name] = value
+            self.rows.append(row)
+            if len(self.rows) >= self.rows_per_file:
+                self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        path = os.path.join(self.directory, f"part-{self.next_part:05d}.parquet")
+        pq.write_table(pa.Table.from_pylist(self.rows, schema=self.schema), path + ".tmp")
+        os.replace(path + ".tmp", path)
+        self.next_part += 1
+        self.rows = []
+
+    def close(self):
+        self._flush()
+
+
+class Progress:
+    """Counts finished documents and reports throughput every `interval` seconds."""
+
+    def __init__(self, interval: float = 10.0):
+        self.interval = interval
+        self.start = self.last_report = time.perf_counter()
+        self.docs = 0
+        self.errors = 0
+        self.tokens = 0
+
+    def update(self, records: List[Dict], tokens: int):
+        self.docs += len(records)
+        self.errors += sum(1 for record in records if record.get("error"))
+        self.tokens += tokens
+        if time.perf_counter() - self.last_report >= self.interval:
+            self.report()
+
+    def report(self):
+        self.last_report = time.perf_counter()
+        elapsed = max(self.last_report - self.start, 1e-9)
+        print(
+            f"{self.docs} docs ({self.errors} errors) in {elapsed:.0f} s: "
+            f"{self.docs / elapsed:.1f} docs/s, {self.tokens / elapsed:.0f} tokens/s",
+            file=sys.stderr, flush=True,
+        )
+
+
+def run(documents: Iterator[Document], writer, executor: AnalysisExecutor, fields: Optional[List[str]],
+        batch_size: int, max_length: int, progress: Progress):
+    """Analyze documents on the executor and write results in input order as batches finish."""
+    in_flight = deque()
+    max_in_flight = executor.max_workers * 2
+
+    def collect_oldest():
+        future, ids, tokens = in_flight.popleft()
+        results = future.result()
+        records = [{"id": doc_id, **result} for doc_id, result in zip(ids, results)]
+        writer.write(records)
+        progress.update(records, tokens)
+
+    batch = []
+
+    def submit():
+        ids = [doc_id for doc_id, _ in batch]
+        texts = [text for _, text in batch]
+        tokens = sum(len(text.split()) for text in texts)
+        in_flight.append((executor.submit(analyze_documents, texts, fields, max_length), ids, tokens))
+        batch.clear()
+        while len(in_flight) >= max_in_flight:
+            collect_oldest()
+
+    for doc_id, text, error in documents:
+        if error is None:
+            text = normalize_text(text)
+            if not text:
+                error = "Text cannot be empty"
+        if error is not None:
+            # Documents that cannot be analyzed are written right away, ahead of pending batches
+            writer.write([{"id": doc_id, "error": error}])
+            progress.update([{"error": error}], 0)
+            continue
+        batch.append((doc_id, text))
+        if len(batch) >= batch_size:
+            submit()
+    if batch:
+        submit()
+    while in_flight:
+        collect_oldest()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        description='Analyze a directory of text files or a JSONL file with the full TextScope analysis. '
+                    'Rerunning the same command resumes an interrupted run.'
+    )
+    parser.add_argument('input', help='Directory of text files, or a JSONL file')
+    parser.add_argument('output', help='JSONL file, or a directory for --format parquet')
+    parser.add_argument('--format', choices=['jsonl', 'parquet'], default='jsonl', help='Output format')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Worker processes, each with its own copy of the model (0 analyzes in this process)')
+    parser.add_argument('--batch-size', type=int, default=32, help='Documents sent to a worker at once')
+    parser.add_argument('--fields', help='Comma-separated analysis components (default: all)')
+    parser.add_argument('--max-length', type=int, default=int(os.getenv('MAX_CONTENT_LENGTH', 10000)),
+                        help='Longer texts are analyzed in chunks of this many characters')
+    parser.add_argument('--extensions', default=','.join(DEFAULT_EXTENSIONS),
+                        help='File extensions to read from a directory')
+    parser.add_argument('--text-field', default='text', help='JSONL field holding the text')
+    parser.add_argument('--id-field', default='id', help='JSONL field holding the document id (default: line number)')
+    parser.add_argument('--rows-per-file', type=int, default=10000, help='Rows per Parquet file')
+    parser.add_argument('--progress-interval', type=float, default=10.0, help='Seconds between progress reports')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING'))
+    fields = [field.strip() for field in args.fields.split(',')] if args.fields else None
+
+    if args.format == 'parquet':
+        writer = ParquetWriter(args.output, rows_per_file=args.rows_per_file)
+    else:
+        writer = JSONLWriter(args.output)
+    done = writer.completed_ids()
+    if done:
+        print(f"Resuming: skipping {len(done)} documents already in {args.output}", file=sys.stderr)
+
+    if os.path.isdir(args.input):
+        extensions = [extension.strip() for extension in args.extensions.split(',')]
+        documents = read_directory(args.input, extensions, done)
+    else:
+        documents = read_jsonl(args.input, args.text_field, args.id_field, done)
+
+    executor = AnalysisExecutor(mode="process" if args.workers > 0 else "inline", max_workers=args.workers or 1)
+    try:
+        executor.submit(check_fields, fields).result()
+    except ValueError as e:
+        executor.shutdown()
+        parser.error(str(e))
+
+    progress = Progress(args.progress_interval)
+    try:
+        run(documents, writer, executor, fields, args.batch_size, args.max_length, progress)
+    except KeyboardInterrupt:
+        print("Interrupted; run the same command again to resume.", file=sys.stderr)
+        sys.exit(130)
+    finally:
+        executor.shutdown()
+        writer.close()
+        progress.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,30 @@
 import argparse
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Tuple
+
+import numpy as np
+
+# Files are read in blocks of at most this many bytes
+BLOCK_SIZE = 1 << 24
+UNICODE_LIMIT = 0x110000
+# Text decoded on both sides of a block so lower() applies the final sigma rule as on the whole file
+CONTEXT_BYTES = 64
+
+# Code points str.split() treats as whitespace
+WHITESPACE_CODEPOINTS = np.array([0x09, 0x0A, 0x0B, 0x0C, 0x0D, 0x1C, 0x1D, 0x1E, 0x1F, 0x20, 0x85, 0xA0, 0x1680,
+                                  *range(0x2000, 0x200B), 0x2028, 0x2029, 0x202F, 0x205F, 0x3000], dtype=np.uint32)
+ASCII_WHITESPACE_BYTES = [bytes([cp]) for cp in WHITESPACE_CODEPOINTS if cp < 0x80]
+
+# Whitespace lookup table; code points past its end are clipped to its last, False entry
+WHITESPACE = np.zeros(int(WHITESPACE_CODEPOINTS.max()) + 2, dtype=bool)
+WHITESPACE[WHITESPACE_CODEPOINTS] = True
+
+# Lookup tables for blocks that are pure ASCII
+ASCII_WHITESPACE = WHITESPACE[:256].copy()
+ASCII_LOWER = np.arange(256, dtype=np.uint8)
+ASCII_LOWER[ord('A'):ord('Z') + 1] += 32
 
 def count_words(text):
     return len(text.split())
@@ -15,23 +41,166 @@ def get_book_text(path):
     with open(path, 'r', encoding='utf-8') as f:
         return f.read()
 
+class RangeCounts(NamedTuple):
+    words: int
+    starts_in_word: bool     # the range starts with a non-whitespace character
+    ends_in_word: bool       # the range ends with a non-whitespace character
+    codepoints: np.ndarray   # lowercased code points that occur
+    counts: np.ndarray       # and how often
+    order: List[int]         # code points in order of first occurrence
+
+def _split_point(mm, start, end):
+    """Largest offset <= end that is safe to split at: after ASCII whitespace, else at a UTF-8 character start."""
+    split = max(mm.rfind(byte, start, end) for byte in ASCII_WHITESPACE_BYTES)
+    if split >= start:
+        return split + 1
+    while end > start and mm[end] & 0xC0 == 0x80:
+        end -= 1
+    return end
+
+def _char_start(mm, offset):
+    """Move offset forward to the start of a UTF-8 character."""
+    while offset < len(mm) and mm[offset] & 0xC0 == 0x80:
+        offset += 1
+    return offset
+
+def _blocks(mm, start, stop) -> Iterator[Tuple[int, int]]:
+    position = start
+    while position < stop:
+        end = min(position + BLOCK_SIZE, stop)
+        if end < stop:
+            end = _split_point(mm, position, end)
+        yield position, end
+        position = end
+
+def _first_occurrences(codepoints, wanted) -> List[int]:
+    """The wanted code points ordered by where they first occur, scanning growing windows."""
+    wanted = set(wanted)
+    order = []
+    start, size = 0, 4096
+    while wanted and start < len(codepoints):
+        window = codepoints[start:start + size]
+        unique, first = np.unique(window, return_index=True)
+        found = sorted((index, int(cp)) for cp, index in zip(unique, first) if int(cp) in wanted)
+        order.extend(cp for _, cp in found)
+        wanted.difference_update(cp for _, cp in found)
+        start += size
+        size *= 4
+    return order
+
+def _lowered_codepoints(mm, start, end) -> np.ndarray:
+    """Code points of the lowercased text in mm[start:end]."""
+    data = np.frombuffer(mm, dtype=np.uint8, count=end - start, offset=start)
+    if data.max() < 0x80:
+        return ASCII_LOWER[data]
+    # Lowercase with the surrounding text, then cut the block back out: how many
+    # characters a character lowercases to does not depend on its context
+    before = mm[_char_start(mm, max(0, start - CONTEXT_BYTES)):start].decode('utf-8')
+    after = mm[end:_char_start(mm, min(len(mm), end + CONTEXT_BYTES))].decode('utf-8')
+    lowered = (before + bytes(data).decode('utf-8') + after).lower()
+    text = lowered[len(before.lower()):len(lowered) - len(after.lower())]
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+
+def count_range(path, start, stop) -> RangeCounts:
+    """Count words and lowercased characters in bytes [start, stop) of a UTF-8 file."""
+    counts = np.zeros(UNICODE_LIMIT, dtype=np.int64)
+    order = []
+    words = 0
+    starts_in_word = None
+    previous_whitespace = True
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for block_start, block_end in _blocks(mm, start, stop):
+            codepoints = _lowered_codepoints(mm, block_start, block_end)
+            if not len(codepoints):
+                continue
+            if codepoints.dtype == np.uint8:
+                whitespace = ASCII_WHITESPACE[codepoints]
+            else:
+                whitespace = WHITESPACE[np.minimum(codepoints, len(WHITESPACE) - 1)]
+
+            # A word starts at every non-whitespace character that follows whitespace
+            words += int(previous_whitespace and not whitespace[0])
+            words += int(np.count_nonzero(whitespace[:-1] & ~whitespace[1:]))
+            if starts_in_word is None:
+                starts_in_word = not whitespace[0]
+            previous_whitespace = bool(whitespace[-1])
+
+            block_counts = np.bincount(codepoints)
+            new = np.flatnonzero((block_counts > 0) & (counts[:len(block_counts)] == 0))
+            if len(new):
+                order.extend(_first_occurrences(codepoints, new))
+            counts[:len(block_counts)] += block_counts
+    present = np.flatnonzero(counts)
+    return RangeCounts(words, bool(starts_in_word), not previous_whitespace, present, counts[present], order)
+
+def _shards(path, workers) -> List[Tuple[int, int]]:
+    """Split a file into up to `workers` byte ranges that end at safe split points."""
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        bounds = [0]
+        for i in range(1, workers):
+            target = size * i // workers
+            split = _split_point(mm, max(bounds[-1], target - BLOCK_SIZE), target)
+            if split > bounds[-1]:
+                bounds.append(split)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def analyze_file(path, workers=1) -> Tuple[int, Dict[str, int]]:
+    """
+    Word count and letter frequencies of a UTF-8 file, as count_words and count_characters report them.
+
+    The file is memory-mapped and counted in blocks with NumPy, optionally
+    sharded across `workers` processes, so memory use does not grow with the
+    file. Letters are returned in order of first occurrence.
+    """
+    if os.path.getsize(path) == 0:
+        return 0, {}
+    shards = _shards(path, workers) if workers > 1 else [(0, os.path.getsize(path))]
+    if len(shards) > 1:
+        with ProcessPoolExecutor(max_workers=len(shards)) as executor:
+            results = list(executor.map(count_range, [path] * len(shards), *zip(*shards)))
+    else:
+        results = [count_range(path, *shards[0])]
+
+    word_count = 0
+    counts = {}
+    previous = None
+    for result in results:
+        word_count += result.words
+        # A word split across two shards was counted in both
+        if previous is not None and previous.ends_in_word and result.starts_in_word:
+            word_count -= 1
+        for cp in result.order:
+            counts.setdefault(cp, 0)
+        for cp, count in zip(result.codepoints.tolist(), result.counts.tolist()):
+            counts[cp] += count
+        if result.codepoints.size:
+            previous = result
+
+    char_counts = {}
+    for cp, count in counts.items():
+        char = chr(cp)
+        if char.isalpha():
+            char_counts[char] = count
+    return word_count, char_counts
+
 def main():
     parser = argparse.ArgumentParser(description='Analyze text files')
     parser.add_argument('path', help='Path to text file')
+    parser.add_argument('--workers', type=int, default=1, help='Processes to shard the file across')
     args = parser.parse_args()
-    
-    text = get_book_text(args.path)
-    word_count = count_words(text)
-    char_counts = count_characters(text)
-    
+
+    word_count, char_counts = analyze_file(args.path, args.workers)
+
     print(f"--- Begin report of {args.path} ---")
     print(f"{word_count} words found in the document\n")
-    
+
     sorted_chars = sorted(char_counts.items(), key=lambda x: x[1], reverse=True)
     for char, count in sorted_chars:
         print(f"The '{char}' character was found {count} times")
-    
+
     print("\n--- End report ---")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different submissions share a cache entry."""
+    text = unicodedata.normalize("NFC", text)
+    text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text.strip()
+
+
+def cache_key(text: str, version: str, fields: Optional[Iterable[str]] = None) -> str:
+    """Content address of an analysis: hash of the analyzer version, requested fields and normalized text."""
+    digest = hashlib.sha256()
+    digest.update(version.encode("utf-8"))
+    digest.update(b"\0")
+    if fields is not None:
+        digest.update(",".join(sorted(fields)).encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+
+class MemoryCache:
+    """In-process LRU cache with per-entry TTL."""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, stored_at = entry
+            if self.ttl is not None and time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    Cache stored in a SQLite file, shared by every process that opens the same path.
+
+    Entries expire after ``ttl`` seconds; when more than ``max_entries`` are
+    stored, the least recently used ones are removed.
+    """
+
+    def __init__(self, path: str, max_entries: int = 100000, ttl: Optional[float] = None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS analysis_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_analysis_cache_accessed_at "
+                "ON analysis_cache (accessed_at)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            # WAL lets readers in other processes proceed while one process writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[str]:
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, stored_at FROM analysis_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, stored_at = row
+        now = time.time()
+        with conn:
+            if self.ttl is not None and now - stored_at > self.ttl:
+                conn.execute("DELETE FROM analysis_cache WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE analysis_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        return value
+
+    def set(self, key: str, value: str):
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO analysis_cache (key, value, stored_at, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            count = conn.execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0]
+            if count > self.max_entries:
+                conn.execute(
+                    "DELETE FROM analysis_cache WHERE key IN ("
+                    "SELECT key FROM analysis_cache ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM analysis_cache")
+
+
+class AnalysisCache:
+    """
+    Content-addressed cache in front of analyze_text.
+
+    Looks in the in-process memory cache first, then in the optional shared
+    backend; shared hits are copied into memory. Results are stored as JSON
+    so every lookup returns a fresh copy.
+    """
+
+    def __init__(self, version: str, memory: Optional[MemoryCache] = None,
+                 shared: Optional[SQLiteCache] = None):
+        self.version = version
+        self.memory = memory
+        self.shared = shared
+        self._stats = {"hits": 0, "memory_hits": 0, "shared_hits": 0, "misses": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, version: str) -> "AnalysisCache":
+        max_entries = int(os.getenv("ANALYSIS_CACHE_SIZE", 1024))
+        ttl = float(os.getenv("ANALYSIS_CACHE_TTL", 86400)) or None
+        path = os.getenv("ANALYSIS_CACHE_PATH")
+
+        memory = MemoryCache(max_entries=max_entries, ttl=ttl) if max_entries > 0 else None
+        shared = None
+        if path:
+            try:
+                shared = SQLiteCache(
+                    path,
+                    max_entries=int(os.getenv("ANALYSIS_CACHE_SHARED_SIZE", 100000)),
+                    ttl=ttl,
+                )
+                logger.info(f"Shared analysis cache enabled at {path}")
+            except sqlite3.Error as e:
+                logger.warning(f"Shared analysis cache unavailable, using memory only: {e}")
+        return cls(version, memory=memory, shared=shared)
+
+    @property
+    def enabled(self) -> bool:
+        return self.memory is not None or self.shared is not None
+
+    def key(self, text: str, fields: Optional[Iterable[str]] = None) -> str:
+        return cache_key(text, self.version, fields)
+
+    def _count(self, *names: str):
+        with self._lock:
+            for name in names:
+                self._stats[name] += 1
+
+    def get(self, text: str, fields: Optional[Iterable[str]] = None) -> Optional[Dict]:
+        """Return the cached analysis of text (limited to fields), or None on a miss."""
+        if not self.enabled:
+            return None
+        key = self.key(text, fields)
+
+        if self.memory is not None:
+            value = self.memory.get(key)
+            if value is not None:
+                self._count("hits", "memory_hits")
+                return json.loads(value)
+
+        if self.shared is not None:
+            try:
+                value = self.shared.get(key)
+            except sqlite3.Error as e:
+                logger.warning(f"Shared analysis cache read failed: {e}")
+                self._count("errors")
+                value = None
+            if value is not None:
+                if self.memory is not None:
+                    self.memory.set(key, value)
+                self._count("hits", "shared_hits")
+                return json.loads(value)
+
+        self._count("misses")
+        return None
+
+    def set(self, text: str, result: Dict, fields: Optional[Iterable[str]] = None):
+        """Store the analysis of text in every configured backend."""
+        if not self.enabled:
+            return
+        key = self.key(text, fields)
+        value = json.dumps(result)
+        if self.memory is not None:
+            self.memory.set(key, value)
+        if self.shared is not None:
+            try:
+                self.shared.set(key, value)
+            except sqlite3.Error as e:
+                logger.warning(f"Shared analysis cache write failed: {e}")
+                self._count("errors")
+
+    def clear(self):
+        if self.memory is not None:
+            self.memory.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 3) if lookups else 0.0
+        stats["memory_entries"] = len(self.memory) if self.memory is not None else 0
+        stats["version"] = self.version
+        return stats
@@ -0,0 +1,411 @@
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+import zstandard
+from sqlalchemy import JSON, LargeBinary, Text, bindparam, cast, func, inspect, select, text, type_coerce, update
+from sqlalchemy.orm import Session
+from sqlalchemy.types import TypeDecorator
+
+logger = logging.getLogger(__name__)
+
+# First bytes of every zstd frame. No UTF-8 text starts with them (0xb5 cannot
+# follow "("), so a stored value without them is plain text or JSON.
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", 3))
+# Optional dictionary trained on stored analyses (python -m src.compression train)
+COMPRESSION_DICTIONARY = os.getenv("COMPRESSION_DICTIONARY")
+DICTIONARY_SIZE = 112640
+
+# SQLite function returning the text of an analysis as a string, for SQL that
+# reads it (the search index); see register_sqlite_functions
+SQLITE_TEXT_FUNCTION = "analysis_text"
+
+
+class Codec:
+    """
+    zstd compression of column values, with an optional shared dictionary.
+
+    A value is stored as a zstd frame, or as its plain UTF-8 when that is no
+    larger (short values). Values stored before compression (strings, or
+    bytes without the zstd magic number) read back as they are. Each frame
+    records the id of the dictionary it was compressed with; the codec reads
+    frames of its own dictionary and of those in ``previous``, so rows can
+    be rewritten after a new dictionary has been trained.
+    """
+
+    def __init__(self, level: int = 3, dictionary: Optional[bytes] = None, previous: Iterable[bytes] = ()):
+        self.level = level
+        self.dictionary = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        self._dictionaries = {}
+        for data in [*previous, dictionary]:
+            if data:
+                loaded = zstandard.ZstdCompressionDict(data)
+                self._dictionaries[loaded.dict_id()] = loaded
+        # zstd contexts are not safe to share between threads
+        self._local = threading.local()
+
+    @classmethod
+    def from_env(cls) -> "Codec":
+        dictionary = None
+        if COMPRESSION_DICTIONARY:
+            with open(COMPRESSION_DICTIONARY, "rb") as f:
+                dictionary = f.read()
+        return cls(COMPRESSION_LEVEL, dictionary)
+
+    @property
+    def dict_id(self) -> int:
+        """Id of the dictionary new values are compressed with, 0 for none."""
+        return self.dictionary.dict_id() if self.dictionary else 0
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self.dictionary)
+            self._local.compressor = compressor
+        frame = compressor.compress(data)
+        return frame if len(frame) < len(data) else data
+
+    def decompress(self, data: bytes) -> bytes:
+        if not data.startswith(ZSTD_MAGIC):
+            return data
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        decompressors = self._local.__dict__.setdefault("decompressors", {})
+        if dict_id not in decompressors:
+            if dict_id and dict_id not in self._dictionaries:
+                raise ValueError(f"Value was compressed with dictionary {dict_id}, which is not loaded "
+                                 f"(set COMPRESSION_DICTIONARY)")
+            decompressors[dict_id] = zstandard.ZstdDecompressor(dict_data=self._dictionaries.get(dict_id))
+        return decompressors[dict_id].decompress(data)
+
+    def encode_text(self, value: Optional[str]) -> Optional[bytes]:
+        return None if value is None else self.compress(value.encode("utf-8"))
+
+    def decode_text(self, value: Any) -> Optional[str]:
+        """The text of a stored value: None, a string stored before compression, or bytes from encode_text."""
+        if value is None or isinstance(value, str):
+            return value
+        return self.decompress(bytes(value)).decode("utf-8")
+
+
+codec = Codec.from_env()
+
+
+class CompressedText(TypeDecorator):
+    """
+    Text stored zstd-compressed (see Codec).
+
+    On PostgreSQL the column stays text: TOAST compresses long values there
+    already, and the full-text index and ts_headline need the text itself.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(Text())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if dialect.name == "postgresql":
+            return value
+        return codec.encode_text(value)
+
+    def process_result_value(self, value, dialect):
+        if dialect.name == "postgresql":
+            return value
+        return codec.decode_text(value)
+
+
+class CompressedJSON(TypeDecorator):
+    """JSON stored zstd-compressed (see Codec), as bytea on PostgreSQL."""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return codec.encode_text(json.dumps(value, separators=(",", ":")))
+
+    def process_result_value(self, value, dialect):
+        value = codec.decode_text(value)
+        return None if value is None else json.loads(value)
+
+
+def _analysis_text(value):
+    return codec.decode_text(value)
+
+
+def register_sqlite_functions(dbapi_connection, connection_record):
+    """Connect hook of SQLite engines adding analysis_text() (see SQLITE_TEXT_FUNCTION)."""
+    dbapi_connection.create_function(SQLITE_TEXT_FUNCTION, 1, _analysis_text, deterministic=True)
+
+
+def json_column(column) -> bool:
+    """Whether a column holds JSON, compressed or not."""
+    return isinstance(column.type, (JSON, CompressedJSON))
+
+
+def compressed_columns(table) -> List:
+    """Columns of a table of the compressed types."""
+    return [column for column in table.columns if isinstance(column.type, (CompressedText, CompressedJSON))]
+
+
+def _stored_columns(dialect: str, table) -> List:
+    """The compressed columns whose values the codec writes on a database (not text on PostgreSQL)."""
+    return [column for column in compressed_columns(table)
+            if not (dialect == "postgresql" and isinstance(column.type, CompressedText))]
+
+
+def prepare_schema(db: Session):
+    """
+    Changes to the schema needed before analyses are read or written
+    compressed: on PostgreSQL the JSON columns become bytea (holding the
+    same JSON as UTF-8 until rewritten) and new text values are TOASTed with
+    lz4; on SQLite the search index reads the text through analysis_text().
+
+    On PostgreSQL it also turns language_confidence, once a label such as
+    "high", into the float the model now stores, keeping numeric values and
+    making labels NULL (asyncpg rejects floats for a varchar column). Tables
+    made without the excerpt or text_hash columns get them, empty until
+    migrate (excerpt) or python -m src.parse_store prune (text_hash) fills them.
+
+    Every step checks whether it is needed, so this runs at each startup.
+    """
+    from . import models
+    from .search import create_search_index
+
+    connection = db.connection()
+    table = models.TextAnalysis.__table__
+    postgresql = connection.dialect.name == "postgresql"
+    if postgresql:
+        # Held until the commit, so workers starting together convert each column once
+        connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:table))"), {"table": table.name})
+    existing = {column["name"] for column in inspect(connection).get_columns(table.name)}
+    for name in ("excerpt", "text_hash"):
+        if name not in existing:
+            column_type = table.c[name].type.compile(dialect=connection.dialect)
+            connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {name} {column_type}"))
+    if postgresql:
+        types = dict(connection.execute(text(
+            "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = :table"
+        ), {"table": table.name}).all())
+        if types.get("language_confidence") in ("character varying", "text"):
+            connection.execute(text(
+                f"ALTER TABLE {table.name} ALTER COLUMN language_confidence TYPE double precision "
+                f"USING CASE WHEN language_confidence ~ '^[0-9]*\\.?[0-9]+$' "
+                f"THEN language_confidence::double precision END"
+            ))
+        for column in compressed_columns(table):
+            if isinstance(column.type, CompressedJSON) and types.get(column.name) in ("json", "jsonb"):
+                connection.execute(text(
+                    f"ALTER TABLE {table.name} ALTER COLUMN {column.name} TYPE bytea "
+                    f"USING convert_to({column.name}::text, 'UTF8')"
+                ))
+            elif isinstance(column.type, CompressedText):
+                try:
+                    with connection.begin_nested():
+                        connection.execute(text(f'ALTER TABLE {table.name} ALTER COLUMN "{column.name}" SET COMPRESSION lz4'))
+                except Exception as e:
+                    logger.warning(f"Keeping the default compression of {column.name}: {e}")
+    create_search_index(connection)
+    db.commit()
+
+
+def fill_excerpts(db: Session, batch_size: int = 500) -> int:
+    """Set the excerpt of analyses stored before it had a column. Returns how many were set."""
+    from . import models
+
+    table = models.TextAnalysis.__table__
+    statement = update(table).where(table.c.id == bindparam("_id")).values(excerpt=bindparam("_excerpt"))
+    filled = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(table.c.id, table.c.text)
+            .where(table.c.id > last_id, table.c.excerpt.is_(None), table.c.text.is_not(None))
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return filled
+        last_id = rows[-1].id
+        db.execute(statement, [{"_id": row.id, "_excerpt": row.text[:models.EXCERPT_LENGTH]} for row in rows])
+        db.commit()
+        filled += len(rows)
+        print(f"Set excerpts up to id {last_id}, {filled} in all", file=sys.stderr, flush=True)
+
+
+def migrate(db: Session, batch_size: int = 500) -> int:
+    """
+    Rewrite stored analyses with the current codec: compress those stored
+    before compression and recompress those of another dictionary. Rows
+    already stored as the codec would store them are left alone, so an
+    interrupted run can be started again. Returns how many rows were
+    rewritten.
+
+    Analyses stored without an excerpt get one first.
+    """
+    from . import models
+
+    prepare_schema(db)
+    fill_excerpts(db, batch_size)
+    table = models.TextAnalysis.__table__
+    dialect = db.get_bind().dialect
+    columns = _stored_columns(dialect.name, table)
+    statement = update(table).where(table.c.id == bindparam("_id")).values(
+        {column.key: bindparam(f"_{column.key}", type_=LargeBinary) for column in columns}
+    )
+    rewritten = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(table.c.id, *(type_coerce(column, LargeBinary).label(column.key) for column in columns))
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return rewritten
+        last_id = rows[-1].id
+        changed = []
+        for row in rows:
+            values = {"_id": row.id}
+            for column in columns:
+                stored = getattr(row, column.key)
+                value = column.type.process_result_value(stored, dialect)
+                values[f"_{column.key}"] = column.type.process_bind_param(value, dialect)
+            if any(values[f"_{column.key}"] != getattr(row, column.key) for column in columns):
+                changed.append(values)
+        if changed:
+            db.execute(statement, changed)
+            rewritten += len(changed)
+        db.commit()
+        print(f"Checked analyses up to id {last_id}, {rewritten} rewritten", file=sys.stderr, flush=True)
+
+
+def sample_values(db: Session, samples: int) -> List[bytes]:
+    """Text and JSON values of randomly chosen analyses, as the codec compresses them."""
+    from . import models
+
+    table = models.TextAnalysis.__table__
+    columns = _stored_columns(db.get_bind().dialect.name, table)
+    ids = db.scalars(select(table.c.id)).all()
+    chosen = random.Random(0).sample(ids, min(samples, len(ids)))
+    values = []
+    for first in range(0, len(chosen), 500):
+        rows = db.execute(select(*columns).where(table.c.id.in_(chosen[first:first + 500]))).all()
+        for row in rows:
+            for column, value in zip(columns, row):
+                if value is None:
+                    continue
+                if isinstance(column.type, CompressedJSON):
+                    value = json.dumps(value, separators=(",", ":"))
+                values.append(value.encode("utf-8"))
+    return values
+
+
+def train(db: Session, samples: int = 2000, size: int = DICTIONARY_SIZE) -> bytes:
+    """A zstd dictionary trained on the stored analyses."""
+    values = sample_values(db, samples)
+    if not values:
+        raise RuntimeError("No stored analyses to train a dictionary on")
+    return zstandard.train_dictionary(size, values, level=codec.level).as_bytes()
+
+
+def storage_report(db: Session) -> List[Dict]:
+    """For each compressed column: rows with a value, bytes stored and bytes of the values uncompressed."""
+    from . import models
+
+    table = models.TextAnalysis.__table__
+    dialect = db.get_bind().dialect
+    stored_columns = {column.key for column in _stored_columns(dialect.name, table)}
+    report = []
+    for column in compressed_columns(table):
+        if dialect.name == "postgresql":
+            stored_size = func.pg_column_size(column)
+        else:
+            stored_size = func.length(cast(column, LargeBinary))
+        stored = db.execute(select(func.count(column), func.coalesce(func.sum(stored_size), 0))).one()
+        if column.key not in stored_columns:
+            # Kept as text (and compressed by the database)
+            plain = db.scalar(select(func.coalesce(func.sum(func.octet_length(column)), 0)))
+            report.append({"column": column.key, "rows": stored[0], "stored": stored[1], "plain": plain})
+            continue
+        plain = 0
+        for (value,) in db.execute(select(type_coerce(column, LargeBinary)).where(column.is_not(None))):
+            value = column.type.process_result_value(value, dialect)
+            if isinstance(column.type, CompressedJSON):
+                value = json.dumps(value, separators=(",", ":"))
+            plain += len(value.encode("utf-8"))
+        report.append({"column": column.key, "rows": stored[0], "stored": stored[1], "plain": plain})
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    global codec
+
+    parser = argparse.ArgumentParser(description='Manage the compressed columns of stored analyses')
+    parser.add_argument('--level', type=int, default=COMPRESSION_LEVEL, help='zstd compression level')
+    parser.add_argument('--dictionary', default=COMPRESSION_DICTIONARY,
+                        help='Dictionary to compress with (default: COMPRESSION_DICTIONARY)')
+    parser.add_argument('--previous-dictionary', action='append', default=[],
+                        help='Older dictionary stored values may have been compressed with (repeatable)')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    train_parser = subcommands.add_parser('train', help='Train a dictionary on the stored analyses')
+    train_parser.add_argument('output', help='File to write the dictionary to')
+    train_parser.add_argument('--samples', type=int, default=2000, help='Analyses sampled')
+    train_parser.add_argument('--size', type=int, default=DICTIONARY_SIZE, help='Dictionary size in bytes')
+    migrate_parser = subcommands.add_parser('migrate', help='Rewrite stored analyses compressed')
+    migrate_parser.add_argument('--batch-size', type=int, default=500, help='Analyses read and written at once')
+    migrate_parser.add_argument('--vacuum', action='store_true', help='VACUUM afterwards, to return the space freed')
+    subcommands.add_parser('report', help='Show the space taken by the compressed columns')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING'))
+    from . import models
+    from .database import SessionLocal, engine
+
+    def read(path):
+        with open(path, "rb") as f:
+            return f.read()
+
+    codec = Codec(args.level, read(args.dictionary) if args.dictionary else None,
+                  [read(path) for path in args.previous_dictionary])
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.command == 'train':
+            dictionary = train(db, args.samples, args.size)
+            with open(args.output, "wb") as f:
+                f.write(dictionary)
+            dict_id = zstandard.ZstdCompressionDict(dictionary).dict_id()
+            print(f"Wrote dictionary {dict_id} ({len(dictionary)} bytes) to {args.output}; set "
+                  f"COMPRESSION_DICTIONARY to it and run migrate", file=sys.stderr)
+        elif args.command == 'migrate':
+            rewritten = migrate(db, args.batch_size)
+            print(f"Rewrote {rewritten} analyses", file=sys.stderr)
+            if args.vacuum:
+                db.close()
+                with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                    connection.execute(text("VACUUM"))
+        else:
+            print(f"{'column':>22} {'rows':>8} {'stored':>12} {'uncompressed':>14} {'ratio':>6}")
+            for row in storage_report(db):
+                ratio = row["plain"] / row["stored"] if row["stored"] else 0
+                print(f"{row['column']:>22} {row['rows']:>8} {row['stored']:>12} {row['plain']:>14} {ratio:>6.2f}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # Run as src.compression rather than __main__, the module whose column
+    # types and codec the models use
+    from src.compression import main
+    main()
@@ -1,10 +1,13 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 import os
 import logging
 
+from .compression import register_sqlite_functions
+
 load_dotenv()
 
 # Get database URL from environment
@@ -14,6 +17,21 @@ DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./textscope.db")
 if DATABASE_URL.startswith("postgres://"):
     DATABASE_URL = DATABASE_URL.replace("postgres://", "postgresql://", 1)
 
+# Async drivers for the async endpoints, by dialect
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+def async_database_url(url: str) -> str:
+    """The URL of the same database through its async driver."""
+    scheme, rest = url.split("://", 1)
+    dialect = scheme.split("+", 1)[0]
+    if dialect not in ASYNC_DRIVERS:
+        raise RuntimeError(f"No async driver for database '{dialect}', set ASYNC_DATABASE_URL")
+    return f"{ASYNC_DRIVERS[dialect]}://{rest}"
+
+# asyncpg does not take libpq query options such as sslmode, so a URL with
+# them needs an ASYNC_DATABASE_URL of its own
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+
 # Configure engine based on database type
 if DATABASE_URL.startswith("sqlite"):
     # SQLite configuration for development
@@ -22,6 +40,10 @@ if DATABASE_URL.startswith("sqlite"):
         connect_args={"check_same_thread": False},
         echo=False  # Set to True for SQL debugging
     )
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, echo=False)
+    # analysis_text() reads compressed texts in SQL (see compression)
+    event.listen(engine, "connect", register_sqlite_functions)
+    event.listen(async_engine.sync_engine, "connect", register_sqlite_functions)
 else:
     # PostgreSQL configuration for production
     engine = create_engine(
@@ -32,9 +54,21 @@ else:
         pool_recycle=300,
         echo=False  # Set to True for SQL debugging
     )
+    async_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        pool_size=10,
+        max_overflow=20,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        echo=False
+    )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects stay loaded after commit: an expired attribute would need a query
+# to reload, which an AsyncSession cannot run on attribute access
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 # Dependency
@@ -45,6 +79,10 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 # Health check function for database
 def check_database_health():
     """Check if database connection is healthy."""
@@ -67,3 +105,15 @@ def check_database_health():
     except Exception as e:
         logging.error(f"Database connection failed during health check: {e}")
         return False
+
+async def check_database_health_async():
+    """check_database_health through the async engine, without blocking the event loop."""
+    try:
+        from sqlalchemy import text
+        async with async_engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+            await connection.execute(text("SELECT COUNT(*) FROM users"))
+        return True
+    except Exception as e:
+        logging.error(f"Database health check failed: {e}")
+        return False
@@ -0,0 +1,156 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+EXECUTOR_MODES = ("inline", "thread", "process")
+
+
+class ExecutorBusyError(RuntimeError):
+    """Raised when the analysis queue is full."""
+
+
+def _init_worker():
+    """Load and warm up the spaCy model once when a worker process starts."""
+    # Ctrl-C is handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    from . import nlp  # noqa: F401 - loads the model through the registry
+
+
+def analyze_batch(texts: List[str], n_process: int = 1, fields: Optional[List[str]] = None) -> List[Dict]:
+    """Picklable wrapper that runs analyze_texts and collects the results."""
+    from .nlp import analyze_texts
+    return list(analyze_texts(texts, n_process=n_process, fields=fields))
+
+
+class AnalysisExecutor:
+    """
+    Runs CPU-bound analysis work off the event loop.
+
+    Modes:
+        inline  - run in the calling coroutine (blocks the loop, useful for debugging)
+        thread  - run in a thread pool
+        process - run in a process pool whose workers preload the spaCy model
+
+    At most ``max_workers + queue_size`` jobs are admitted at once; further
+    jobs are rejected with ExecutorBusyError. Each job is bounded by ``timeout``
+    seconds, after which it is cancelled if it has not started yet; one that
+    has started keeps its place until it finishes.
+    """
+
+    def __init__(self, mode: str = "thread", max_workers: Optional[int] = None,
+                 queue_size: int = 32, timeout: Optional[float] = 60.0):
+        if mode not in EXECUTOR_MODES:
+            raise ValueError(f"Unknown executor mode '{mode}', expected one of {EXECUTOR_MODES}")
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self._pool: Optional[Executor] = None
+        # run_local jobs in process mode (see run_local)
+        self._local_pool: Optional[Executor] = None
+        self._pending = 0
+        # Jobs are released from pool threads when they finish
+        self._pending_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "AnalysisExecutor":
+        timeout = float(os.getenv("ANALYSIS_TIMEOUT", 60))
+        return cls(
+            mode=os.getenv("ANALYSIS_EXECUTOR", "thread"),
+            max_workers=int(os.getenv("ANALYSIS_WORKERS", 0)) or None,
+            queue_size=int(os.getenv("ANALYSIS_QUEUE_SIZE", 32)),
+            timeout=timeout if timeout > 0 else None,
+        )
+
+    def start(self):
+        """Create the worker pool. Called from the application startup hook."""
+        if self._pool is not None or self.mode == "inline":
+            return
+        if self.mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analysis")
+        else:
+            # spawn avoids forking a process that already runs the event loop's threads
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+            self._local_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="analysis-local")
+        logger.info(f"Analysis executor started in {self.mode} mode with {self.max_workers} workers")
+
+    def shutdown(self):
+        """Stop the pool, cancelling jobs that have not started."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._local_pool is not None:
+            self._local_pool.shutdown(wait=False, cancel_futures=True)
+            self._local_pool = None
+            logger.info("Analysis executor shut down")
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs currently admitted (running or queued), including those whose caller timed out."""
+        return self._pending
+
+    def submit(self, func: Callable, *args: Any, **kwargs: Any) -> Future:
+        """Submit func(*args, **kwargs) from synchronous code (e.g. the batch CLI), without admission control."""
+        self.start()
+        if self.mode != "inline":
+            return self._pool.submit(func, *args, **kwargs)
+        future = Future()
+        try:
+            future.set_result(func(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """Run func(*args, **kwargs) on the pool and await the result."""
+        return await self._run(False, func, args, kwargs)
+
+    async def run_local(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Like run, but keep func in this process: in process mode it runs in a
+        thread pool of the same size. For callables that update state held
+        here, such as a live document's paragraph cache.
+        """
+        return await self._run(True, func, args, kwargs)
+
+    async def _run(self, local: bool, func: Callable, args, kwargs) -> Any:
+        with self._pending_lock:
+            if self._pending >= self.max_workers + self.queue_size:
+                raise ExecutorBusyError("Analysis queue is full")
+            self._pending += 1
+
+        if self.mode == "inline":
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._release()
+
+        self.start()
+        pool = self._local_pool if local and self.mode == "process" else self._pool
+        try:
+            future = pool.submit(func, *args, **kwargs)
+        except Exception:
+            self._release()
+            raise
+        # Released when the job is done or cancelled before starting, not when
+        # the caller stops waiting: a job that already runs cannot be
+        # interrupted and keeps its worker until it finishes
+        future.add_done_callback(self._release)
+        # wait_for cancels the job on timeout; cancelling the caller (e.g. a
+        # disconnected client) cancels it too
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+
+    def _release(self, future: Optional[Future] = None):
+        with self._pending_lock:
+            self._pending -= 1
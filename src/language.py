@@ -0,0 +1,72 @@
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import NamedTuple, Optional
+
+from langdetect.detector_factory import PROFILES_DIRECTORY, DetectorFactory
+from langdetect.lang_detect_exception import LangDetectException
+
+# Characters from the start of a text that language identification reads
+LANGUAGE_SAMPLE_SIZE = int(os.getenv("LANGUAGE_SAMPLE_SIZE", 2000))
+# Seed of langdetect's random sampling of n-grams, so a text always gets the same answer
+LANGUAGE_SEED = 0
+
+WHITESPACE = re.compile(r"\s")
+
+
+class LanguageGuess(NamedTuple):
+    code: str          # ISO 639-1 code (zh-cn and zh-tw for Chinese), or "unknown"
+    confidence: float  # probability of that language, 0 to 1
+
+
+UNKNOWN = LanguageGuess("unknown", 0.0)
+
+_factory: Optional[DetectorFactory] = None
+_factory_lock = threading.Lock()
+
+
+def _detector_factory() -> DetectorFactory:
+    """langdetect's n-gram profiles, loaded once per process and seeded."""
+    global _factory
+    if _factory is None:
+        with _factory_lock:
+            if _factory is None:
+                factory = DetectorFactory()
+                factory.load_profile(PROFILES_DIRECTORY)
+                factory.set_seed(LANGUAGE_SEED)
+                _factory = factory
+    return _factory
+
+
+def sample_text(text: str, size: int = LANGUAGE_SAMPLE_SIZE) -> str:
+    """The first size characters of text, cut back to a whitespace so the last word is whole."""
+    if len(text) <= size:
+        return text
+    sample = text[:size + 1]
+    cut = max((match.start() for match in WHITESPACE.finditer(sample, size // 2)), default=size)
+    return sample[:cut]
+
+
+@lru_cache(maxsize=1024)
+def _identify_sample(sample: str) -> LanguageGuess:
+    detector = _detector_factory().create()
+    try:
+        detector.append(sample)
+        probabilities = detector.get_probabilities()
+    except LangDetectException:
+        # No letters to go on (numbers, symbols, empty text)
+        return UNKNOWN
+    if not probabilities:
+        return UNKNOWN
+    return LanguageGuess(probabilities[0].lang, round(probabilities[0].prob, 3))
+
+
+def identify_language(text: str) -> LanguageGuess:
+    """
+    Most likely language of text and its probability.
+
+    Reads only a bounded prefix of the text (LANGUAGE_SAMPLE_SIZE characters)
+    and is deterministic; results are cached by that prefix.
+    """
+    return _identify_sample(sample_text(text))
@@ -0,0 +1,90 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import and_, func, select, tuple_
+from sqlalchemy.orm import load_only, with_expression
+
+from . import models
+
+# Columns of an analysis shown in the history list; the text, summary and
+# detailed results are only read by GET /analyses/{id}
+LIST_COLUMNS = [
+    models.TextAnalysis.title, models.TextAnalysis.excerpt, models.TextAnalysis.created_at, models.TextAnalysis.user_id,
+    models.TextAnalysis.sentiment, models.TextAnalysis.polarity, models.TextAnalysis.word_count,
+    models.TextAnalysis.flesch_score, models.TextAnalysis.difficulty_level, models.TextAnalysis.content_category,
+]
+
+SORT_FIELDS = ["created_at", "title", "sentiment", "word_count"]
+SORT_ORDERS = ["asc", "desc"]
+
+
+def list_options() -> List:
+    """Loader options that read only the list columns and the key phrase count."""
+    # Counted from analysis_key_phrases rather than the compressed key_phrases column
+    key_phrase_count = select(func.count()).where(
+        models.AnalysisKeyPhrase.analysis_id == models.TextAnalysis.id
+    ).scalar_subquery()
+    return [
+        load_only(*LIST_COLUMNS),
+        with_expression(models.TextAnalysis.key_phrase_count, key_phrase_count),
+    ]
+
+
+def encode_cursor(sort_by: str, sort_order: str, value: Any, analysis_id: int) -> str:
+    """Opaque cursor pointing just past an analysis in the given sort order."""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort_by, sort_order, value, analysis_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, sort_order: str) -> Tuple[Any, int]:
+    """The sort value and id a cursor points past. Raises ValueError for a cursor of another sort order."""
+    try:
+        payload = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort_by, cursor_sort_order, value, analysis_id = json.loads(payload)
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if (cursor_sort_by, cursor_sort_order) != (sort_by, sort_order):
+        raise ValueError("Cursor was issued for a different sort order")
+    if not isinstance(analysis_id, int):
+        raise ValueError("Invalid cursor")
+    if sort_by == "created_at" and value is not None:
+        value = datetime.fromisoformat(value)
+    return value, analysis_id
+
+
+def keyset_order(sort_by: str, sort_order: str) -> List:
+    """
+    ORDER BY of a page: the sort column, then id to break ties.
+
+    NULLs come first ascending and last descending, which is SQLite's own
+    order, so descending is exactly ascending reversed.
+    """
+    column = getattr(models.TextAnalysis, sort_by)
+    if sort_order == "desc":
+        return [column.desc().nulls_last(), models.TextAnalysis.id.desc()]
+    return [column.asc().nulls_first(), models.TextAnalysis.id.asc()]
+
+
+def keyset_after(sort_by: str, sort_order: str, value: Optional[Any], analysis_id: int) -> List:
+    """
+    WHERE clauses selecting the analyses after (value, analysis_id) in
+    keyset_order, as consecutive segments of that order.
+
+    Each one is a range of the user's index, so a page starts with an index
+    seek however deep it is; a page that runs past the end of the first
+    segment continues into the second (the NULLs, or the values after them).
+    """
+    column = getattr(models.TextAnalysis, sort_by)
+    position = tuple_(column, models.TextAnalysis.id)
+    if sort_order == "desc":
+        if value is None:
+            return [and_(column.is_(None), models.TextAnalysis.id < analysis_id)]
+        return [position < tuple_(value, analysis_id), column.is_(None)]
+    if value is None:
+        return [and_(column.is_(None), models.TextAnalysis.id > analysis_id), column.is_not(None)]
+    return [position > tuple_(value, analysis_id)]
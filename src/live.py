@@ -0,0 +1,265 @@
+import asyncio
+import logging
+import threading
+from collections import Counter
+from typing import Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from .executor import ExecutorBusyError
+from .long_document import DEFAULT_CHUNK_SIZE, PARAGRAPH_BREAK, iter_chunks
+from .nlp import COMPONENT_FEATURES, TextAnalyzer, TokenStatistics, nlp, plan_pipeline, _build_analysis
+
+logger = logging.getLogger(__name__)
+
+# Components that can be kept up to date edit by edit: they only read merged
+# token statistics and sentiment totals
+LIVE_FIELDS = {"sentiment", "professional_metrics", "readability", "category"}
+DEFAULT_LIVE_FIELDS = {"sentiment", "readability"}
+
+
+def resolve_live_fields(fields: Optional[Iterable[str]] = None) -> Set[str]:
+    """Validate the components of a live session; None means DEFAULT_LIVE_FIELDS."""
+    if fields is None:
+        return set(DEFAULT_LIVE_FIELDS)
+    fields = set(fields)
+    unsupported = fields - LIVE_FIELDS
+    if unsupported:
+        raise ValueError(
+            f"Fields not available in live analysis: {', '.join(sorted(unsupported))}. "
+            f"Valid fields are: {', '.join(sorted(LIVE_FIELDS))}"
+        )
+    if not fields:
+        raise ValueError("At least one analysis field must be requested")
+    return fields
+
+
+def split_paragraphs(text: str, max_length: int = DEFAULT_CHUNK_SIZE) -> List[str]:
+    """Non-empty paragraphs of text; paragraphs longer than max_length are split as iter_chunks does."""
+    paragraphs = []
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        paragraph = paragraph.strip()
+        if len(paragraph) > max_length:
+            paragraphs.extend(piece for _, piece in iter_chunks(paragraph, max_length))
+        elif paragraph:
+            paragraphs.append(paragraph)
+    return paragraphs
+
+
+class ParagraphStatistics(NamedTuple):
+    stats: TokenStatistics
+    token_count: int
+    sentiment: Tuple[float, float, int]  # polarity, subjectivity, scored expressions
+
+
+class LiveUpdate(NamedTuple):
+    analysis: Optional[Dict]  # None while the text has no words
+    paragraphs: int
+    parsed: int               # paragraphs parsed for this update; the others came from the cache
+
+
+class LiveDocument:
+    """
+    A document edited in place and re-analyzed after every batch of edits.
+
+    The text is split into paragraphs and each distinct paragraph is parsed
+    once; its statistics are cached by paragraph text. analyze() parses only
+    paragraphs that are new since the previous call and moves the running
+    totals by the paragraphs added and removed, so the cost of an update
+    follows the size of the edit rather than the size of the document.
+    """
+
+    def __init__(self, fields: Optional[Iterable[str]] = None, max_length: Optional[int] = None,
+                 max_paragraph_length: int = DEFAULT_CHUNK_SIZE, batch_size: int = 8):
+        self.fields = resolve_live_fields(fields)
+        # Without these components the pruned pipeline sets no sentence boundaries
+        self._needs_sentences = any("sents" in COMPONENT_FEATURES[field] for field in self.fields)
+        self.max_length = max_length
+        self.max_paragraph_length = max_paragraph_length
+        self.batch_size = batch_size
+        self.text = ""
+        self.version = 0
+        # An analysis that timed out keeps running in its thread; the next one waits for it
+        self._lock = threading.Lock()
+
+        # Paragraphs as of the last analyze(), with how often each occurs
+        self._paragraphs: List[str] = []
+        self._counts: Counter = Counter()
+        self._analyzed: Dict[str, ParagraphStatistics] = {}
+
+        # Totals over self._paragraphs
+        self._stats = TokenStatistics(nlp.make_doc(""))
+        self._token_count = 0
+        self._polarity_sum = self._subjectivity_sum = 0.0
+        self._assessments = 0
+
+    def set_text(self, text: str):
+        self._check_length(len(text))
+        self.text = text
+        self.version += 1
+
+    def apply_edit(self, start: int, end: int, replacement: str):
+        """Replace the characters in [start, end) with replacement."""
+        if not 0 <= start <= end <= len(self.text):
+            raise ValueError(f"Edit range [{start}, {end}) is outside the text of {len(self.text)} characters")
+        self._check_length(len(self.text) - (end - start) + len(replacement))
+        self.text = self.text[:start] + replacement + self.text[end:]
+        self.version += 1
+
+    def _check_length(self, length: int):
+        if self.max_length is not None and length > self.max_length:
+            raise ValueError(f"Text exceeds maximum length of {self.max_length} characters")
+
+    def analyze(self, text: Optional[str] = None) -> LiveUpdate:
+        """Bring the analysis up to date with text (by default the current text)."""
+        with self._lock:
+            return self._analyze(self.text if text is None else text)
+
+    def _analyze(self, text: str) -> LiveUpdate:
+        paragraphs = split_paragraphs(text, self.max_paragraph_length)
+        counts = Counter(paragraphs)
+        added = counts - self._counts
+        removed = self._counts - counts
+
+        new = [paragraph for paragraph in added if paragraph not in self._analyzed]
+        self._parse(new)
+        for paragraph, times in removed.items():
+            for _ in range(times):
+                self._remove(self._analyzed[paragraph])
+            if paragraph not in counts:
+                del self._analyzed[paragraph]
+        for paragraph, times in added.items():
+            for _ in range(times):
+                self._add(self._analyzed[paragraph])
+
+        self._paragraphs = paragraphs
+        self._counts = counts
+        # update() appends sentences at the end; keep them in document order
+        self._stats.sentences = [
+            sentence for paragraph in paragraphs for sentence in self._analyzed[paragraph].stats.sentences
+        ]
+        return LiveUpdate(self._build(), len(paragraphs), len(new))
+
+    def _parse(self, paragraphs: List[str]):
+        plan = plan_pipeline(self.fields)
+        for doc in nlp.pipe(paragraphs, batch_size=self.batch_size, disable=plan.disable):
+            for name in plan.extra:
+                doc = nlp.get_pipe(name)(doc)
+            analyzer = TextAnalyzer(doc.text, doc=doc, fields=self.fields)
+            sentiment = analyzer.sentiment_scores if "sentiment" in self.fields else (0.0, 0.0, 0)
+            self._analyzed[doc.text] = ParagraphStatistics(analyzer.stats, analyzer.token_count, sentiment)
+
+    def _add(self, paragraph: ParagraphStatistics):
+        self._stats.update(paragraph.stats)
+        self._token_count += paragraph.token_count
+        polarity, subjectivity, count = paragraph.sentiment
+        self._polarity_sum += polarity * count
+        self._subjectivity_sum += subjectivity * count
+        self._assessments += count
+
+    def _remove(self, paragraph: ParagraphStatistics):
+        self._stats.subtract(paragraph.stats)
+        self._token_count -= paragraph.token_count
+        polarity, subjectivity, count = paragraph.sentiment
+        self._assessments -= count
+        if self._assessments:
+            self._polarity_sum -= polarity * count
+            self._subjectivity_sum -= subjectivity * count
+        else:
+            # Start from exact zeros rather than accumulated rounding error
+            self._polarity_sum = self._subjectivity_sum = 0.0
+
+    def _build(self) -> Optional[Dict]:
+        if not self._stats.word_count or (self._needs_sentences and not self._stats.sentences):
+            return None
+        # A view over the totals, read by the same components as a full analysis
+        analyzer = TextAnalyzer("\n\n".join(self._paragraphs), fields=self.fields)
+        analyzer.stats = self._stats
+        analyzer.token_count = self._token_count
+        if self._assessments:
+            analyzer.sentiment_scores = (self._polarity_sum / self._assessments,
+                                         self._subjectivity_sum / self._assessments, self._assessments)
+        else:
+            analyzer.sentiment_scores = (0.0, 0.0, 0)
+        return _build_analysis(analyzer, self.fields)
+
+
+class LiveSession:
+    """
+    Applies edit messages to a LiveDocument and pushes its analysis once the
+    edits pause for `debounce` seconds.
+
+    Messages:
+        {"type": "set", "text": "..."}                      replace the whole text
+        {"type": "edit", "start": 0, "end": 5, "text": ""}  replace characters [start, end)
+
+    Each push is {"type": "analysis", "version": n, ...}, where version counts
+    the edits applied; edits arriving during an analysis are picked up by the
+    next one. Analyses run through `run` (by default asyncio.to_thread; the
+    server passes AnalysisExecutor.run_local), one at a time per session.
+    """
+
+    def __init__(self, document: LiveDocument, send: Callable[[Dict], Awaitable], debounce: float = 0.3,
+                 run: Callable[..., Awaitable] = asyncio.to_thread):
+        self.document = document
+        self.send = send
+        self.debounce = debounce
+        self.run = run
+        self._deadline = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def receive(self, message: Dict):
+        """Apply an edit message and schedule an analysis. Raises ValueError for invalid messages."""
+        kind = message.get("type")
+        if kind == "set":
+            text = message.get("text")
+            if not isinstance(text, str):
+                raise ValueError("'set' needs a 'text' string")
+            self.document.set_text(text)
+        elif kind == "edit":
+            start, end, text = message.get("start"), message.get("end"), message.get("text", "")
+            if not isinstance(start, int) or not isinstance(end, int) or not isinstance(text, str):
+                raise ValueError("'edit' needs integer 'start' and 'end' and a 'text' string")
+            self.document.apply_edit(start, end, text)
+        else:
+            raise ValueError(f"Unknown message type '{kind}'")
+
+        loop = asyncio.get_running_loop()
+        self._deadline = loop.time() + self.debounce
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._push_when_idle())
+
+    async def _push_when_idle(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = self._deadline - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+                continue
+            version, text = self.document.version, self.document.text
+            try:
+                update = await self.run(self.document.analyze, text)
+                message = {"type": "analysis", "version": version, "paragraphs": update.paragraphs,
+                           "parsed": update.parsed, "result": update.analysis}
+            except ExecutorBusyError:
+                message = {"type": "error", "version": version,
+                           "detail": "Too many analyses in progress. Please try again later."}
+            except asyncio.TimeoutError:
+                message = {"type": "error", "version": version, "detail": "Text analysis timed out"}
+            except Exception as e:
+                logger.error(f"Live analysis error: {str(e)}")
+                message = {"type": "error", "version": version, "detail": "Live analysis failed"}
+            try:
+                await self.send(message)
+            except Exception as e:
+                logger.debug(f"Live session closed before its analysis was sent: {e}")
+                return
+            if self.document.version == version:
+                return
+
+    async def close(self):
+        """Stop pending analyses. An analysis already running in its thread finishes unobserved."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
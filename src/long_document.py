@@ -0,0 +1,191 @@
+import logging
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from spacy.tokens import Doc, DocBin
+
+from .nlp import (
+    TextAnalyzer, TokenStatistics, analyze_text, language_gate, match_phrases, nlp, plan_pipeline,
+    resolve_fields, _build_analysis
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 10000
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+")
+WHITESPACE = re.compile(r"\s+")
+
+# Where a chunk may end, in order of preference, with the minimum chunk length
+# (as a fraction of chunk_size) each kind of break is accepted at
+CHUNK_BREAKS = [(PARAGRAPH_BREAK, 0.5), (SENTENCE_BREAK, 0.5), (SENTENCE_BREAK, 0), (WHITESPACE, 0)]
+
+# Components whose results are built from the merged TokenStatistics
+STATISTICS_FIELDS = {"professional_metrics", "readability", "category", "summary"}
+
+
+def _last_break(pattern: re.Pattern, window: str, min_start: int) -> Optional[re.Match]:
+    last = None
+    for match in pattern.finditer(window, min_start):
+        if match.start() > 0:
+            last = match
+    return last
+
+
+def iter_chunks(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Tuple[int, str]]:
+    """
+    Split text into pieces of at most chunk_size characters.
+
+    Pieces end at the last paragraph break that fits in their second half,
+    otherwise at the last sentence end, otherwise at the last whitespace. The
+    whitespace between pieces is dropped. Yields (character offset in text, piece).
+    """
+    position = 0
+    while position < len(text):
+        if len(text) - position <= chunk_size:
+            end, next_position = len(text), len(text)
+        else:
+            window = text[position:position + chunk_size + 1]
+            for pattern, min_fraction in CHUNK_BREAKS:
+                match = _last_break(pattern, window, int(chunk_size * min_fraction))
+                if match is not None:
+                    end, next_position = position + match.start(), position + match.end()
+                    break
+            else:
+                # A single run of chunk_size characters without whitespace
+                end = next_position = position + chunk_size
+        if text[position:end].strip():
+            yield position, text[position:end]
+        position = next_position
+
+
+class LongTextAnalyzer(TextAnalyzer):
+    """
+    Analyzes a text too long to parse as one Doc.
+
+    The text is parsed chunk by chunk (see iter_chunks) and only mergeable
+    aggregates of each chunk are kept: token statistics, sentiment totals,
+    entity mentions and key phrase candidates. Memory used by spaCy is bounded
+    by the chunk size; what is kept grows only with the number of sentences
+    and the vocabulary.
+
+    Key phrase frequencies and first positions are counted in a second,
+    tokenizer-only pass once every chunk has proposed its candidates. Token
+    based phrase features come from the first chunk that proposes a phrase.
+
+    docs, when given, are the already parsed chunks (e.g. restored from a
+    stored parse) and nothing is parsed; every chunk Doc is added to doc_bin
+    when one is given.
+    """
+
+    def __init__(self, text: str, fields: Optional[Set[str]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 batch_size: int = 4, docs: Optional[Iterable[Doc]] = None, doc_bin: Optional[DocBin] = None):
+        super().__init__(text, fields=fields)
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self._entities: Set[Tuple[str, str]] = set()
+        self._phrase_features: Dict[str, Tuple] = {}
+        self._analyze_chunks(docs, doc_bin)
+
+    @property
+    def doc(self):
+        raise RuntimeError("LongTextAnalyzer does not keep a Doc of the whole text")
+
+    def _entity_mentions(self) -> Iterable[Tuple[str, str]]:
+        return self._entities
+
+    def chunks(self) -> Iterator[Tuple[int, str]]:
+        return iter_chunks(self.text, self.chunk_size)
+
+    def _parse_chunks(self, fields: Set[str]) -> Iterator[Doc]:
+        plan = plan_pipeline(fields)
+        docs = nlp.pipe((chunk for _, chunk in self.chunks()), batch_size=self.batch_size, disable=plan.disable)
+        for doc in docs:
+            for name in plan.extra:
+                doc = nlp.get_pipe(name)(doc)
+            yield doc
+
+    def _analyze_chunks(self, docs: Optional[Iterable[Doc]] = None, doc_bin: Optional[DocBin] = None):
+        fields = self.fields if self.fields is not None else resolve_fields()
+        if docs is None:
+            docs = self._parse_chunks(fields)
+        token_count = 0
+        stats = None
+        polarity_sum = subjectivity_sum = 0.0
+        assessments = 0
+        for doc in docs:
+            if doc_bin is not None:
+                doc_bin.add(doc)
+            chunk = TextAnalyzer(doc.text, doc=doc, fields=fields)
+
+            token_count += chunk.token_count
+            if fields & STATISTICS_FIELDS:
+                if stats is None:
+                    stats = chunk.stats
+                else:
+                    stats.update(chunk.stats)
+            if "sentiment" in fields:
+                # Polarity and subjectivity are averages over scored expressions
+                polarity, subjectivity, count = chunk.sentiment_scores
+                polarity_sum += polarity * count
+                subjectivity_sum += subjectivity * count
+                assessments += count
+            if "named_entities" in fields:
+                self._entities.update(chunk._entity_mentions())
+            if "key_phrases" in fields:
+                self._collect_phrase_candidates(chunk)
+
+        # Whole-text values of the cached properties the analysis components read
+        self.token_count = token_count
+        self.stats = stats if stats is not None else TokenStatistics(nlp.make_doc(""))
+        if assessments:
+            self.sentiment_scores = (polarity_sum / assessments, subjectivity_sum / assessments, assessments)
+        else:
+            self.sentiment_scores = (0.0, 0.0, 0)
+
+    def _collect_phrase_candidates(self, chunk: TextAnalyzer):
+        """Record features of the phrases this chunk is the first to propose."""
+        candidates = {
+            phrase: tokens for phrase, tokens in chunk._key_phrase_candidates().items()
+            if phrase not in self._phrase_features
+        }
+        unresolved = [phrase for phrase, tokens in candidates.items() if tokens is None]
+        located = chunk._match_phrases(unresolved) if unresolved else {}
+        for phrase, tokens in candidates.items():
+            if tokens is None:
+                if phrase not in located:
+                    continue
+                tokens = list(located[phrase][1])
+            self._phrase_features[phrase] = chunk._phrase_features(phrase, tokens)
+
+    def extract_key_phrases(self, top_n: int = 15) -> List[Dict]:
+        candidates = list(self._phrase_features)
+        if not candidates:
+            return []
+        docs = ((offset, nlp.make_doc(chunk)) for offset, chunk in self.chunks())
+        occurrences = match_phrases(candidates, docs)
+        phrases = [
+            (phrase, occurrences[phrase][0], occurrences[phrase][2], features)
+            for phrase, features in self._phrase_features.items() if phrase in occurrences
+        ]
+        return self._rank_key_phrases(phrases, len(candidates), top_n)
+
+
+def analyze_long_text(text: str, fields: Optional[Iterable[str]] = None,
+                      chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict:
+    """
+    Analyze a text of any length.
+
+    Texts up to chunk_size characters are analyzed in one pass by analyze_text;
+    longer ones are analyzed chunk by chunk with LongTextAnalyzer.
+    """
+    if len(text) <= chunk_size:
+        return analyze_text(text, fields)
+    fields = resolve_fields(fields)
+    skipped = language_gate(text)
+    if skipped is not None:
+        return skipped
+    analyzer = LongTextAnalyzer(text, fields=fields, chunk_size=chunk_size)
+    logger.info(f"Analyzed {len(text)} characters in chunks of at most {chunk_size}")
+    return _build_analysis(analyzer, fields)
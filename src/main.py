@@ -1,24 +1,42 @@
-from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi import FastAPI, Depends, HTTPException, Query, Response, status, Request, WebSocket, WebSocketDisconnect
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.orm import undefer_group
+from sqlalchemy.sql import Select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta, datetime
-from typing import List
+from typing import List, Optional
 import json
 import os
+import asyncio
 import sys
 import logging
-import spacy
 from textblob import TextBlob
 import sqlalchemy.exc
 
 from . import models, schemas, security
-from .database import get_db, engine, check_database_health
-from .text_preprocessor import analyze_text
+from .database import get_async_db, engine, async_engine, check_database_health_async, AsyncSessionLocal, SessionLocal
+from .text_preprocessor import (
+    analyze_long_text, resolve_fields, UnsupportedLanguageError, ANALYSIS_COMPONENTS, ANALYZER_VERSION, SENTIMENT_BACKEND
+)
+from .cache import AnalysisCache, normalize_text
+from .model_registry import registry as model_registry, DEFAULT_MODEL
+from .executor import AnalysisExecutor, ExecutorBusyError, analyze_batch
+from .live import LiveDocument, LiveSession
+from .parse_store import (
+    analyze_stored, analyze_with_parse, delete_orphaned_parse, get_current_parse, has_parse, parse_key,
+    save_parse, serialize_parse,
+)
+from .listing import SORT_FIELDS, SORT_ORDERS, list_options, encode_cursor, decode_cursor, keyset_order, keyset_after
+from .terms import attach_terms, delete_terms, top_phrases, top_entities, mentioning
+from .search import search_query
+from .compression import prepare_schema
+from .persister import WriteBehindError, WriteBehindPersister
 
 # Configure logging
 logging.basicConfig(
@@ -51,9 +69,151 @@ if IS_PRODUCTION:
     except ImportError:
         logger.warning("Sentry not available, skipping error tracking setup")
 
+# Result keys that are stored on models.TextAnalysis
+ANALYSIS_FIELDS = [
+    'sentiment', 'polarity', 'subjectivity', 'sentiment_confidence', 'tone', 'professional_metrics',
+    'flesch_score', 'avg_sentence_length', 'word_count', 'sentence_count', 'syllable_count', 
+    'difficulty_level', 'professional_scores', 'writing_improvements',
+    'key_phrases', 'named_entities',
+    'language_code', 'language_confidence', 'content_category', 'category_confidence', 
+    'category_distribution', 'summary'
+]
+
+MAX_BATCH_SIZE = int(os.getenv('MAX_BATCH_SIZE', 100))
+BATCH_N_PROCESS = int(os.getenv('BATCH_N_PROCESS', 1))
+
+# Texts longer than MAX_CONTENT_LENGTH are analyzed in chunks of at most that
+# many characters; /analyze/ accepts texts up to MAX_DOCUMENT_LENGTH
+MAX_CONTENT_LENGTH = int(os.getenv('MAX_CONTENT_LENGTH', 10000))
+MAX_DOCUMENT_LENGTH = int(os.getenv('MAX_DOCUMENT_LENGTH', 1000000))
+
+# Most analyses GET /analyses/ returns per page
+MAX_PAGE_SIZE = int(os.getenv('MAX_PAGE_SIZE', 100))
+
+# Live analysis pushes an update once edits pause for this long
+LIVE_DEBOUNCE_MS = int(os.getenv('LIVE_DEBOUNCE_MS', 300))
+
+# Store the spaCy parse of every fully analyzed text (see parse_store)
+STORE_PARSES = os.getenv('STORE_PARSES', 'false').lower() in ('1', 'true', 'yes')
+
+# Runs analyses off the event loop (ANALYSIS_EXECUTOR=inline|thread|process)
+analysis_executor = AnalysisExecutor.from_env()
+
+# Content-addressed result cache in front of the analysis
+analysis_cache = AnalysisCache.from_env(version=ANALYZER_VERSION)
+
+# Stores new analyses in background batches after responding (WRITE_BEHIND=true)
+analysis_persister = WriteBehindPersister.from_env(AsyncSessionLocal)
+
+def requested_fields(fields: Optional[List[str]]) -> Optional[List[str]]:
+    """Validate the fields of a request; None (or every component) means a full analysis."""
+    if fields is None:
+        return None
+    fields = resolve_fields(fields)
+    if fields == set(ANALYSIS_COMPONENTS):
+        return None
+    return sorted(fields)
+
+async def run_cached_analysis(text: str, fields: Optional[List[str]] = None, db: Optional[AsyncSession] = None) -> dict:
+    """
+    Return the analysis of text from the cache, analyzing it on a miss.
+
+    With STORE_PARSES and a db session, a text analyzed before is analyzed
+    from its stored parse rather than parsed again, and the parse of a full
+    analysis is stored unless the text already has one.
+    """
+    text = normalize_text(text)
+    store_parses = STORE_PARSES and db is not None
+    parse = None
+    analysis_result = analysis_cache.get(text, fields)
+    if analysis_result is None:
+        stored = await db.run_sync(get_current_parse, text) if store_parses else None
+        if stored is not None:
+            analysis_result = await analysis_executor.run(analyze_stored, text, stored.data, stored.chunk_size, fields)
+        elif store_parses and fields is None and not await db.run_sync(has_parse, text):
+            analysis_result, parse = await analysis_executor.run(analyze_with_parse, text, fields, MAX_CONTENT_LENGTH)
+        else:
+            analysis_result = await analysis_executor.run(analyze_long_text, text, fields, MAX_CONTENT_LENGTH)
+        analysis_cache.set(text, analysis_result, fields)
+    elif store_parses and fields is None and not await db.run_sync(has_parse, text):
+        parse = await analysis_executor.run(serialize_parse, text, MAX_CONTENT_LENGTH)
+    if parse is not None:
+        await db.run_sync(save_parse, text, parse, MAX_CONTENT_LENGTH)
+    return analysis_result
+
+def new_analysis(title: str, text: str, user_id: int, analysis_result: dict) -> models.TextAnalysis:
+    """A models.TextAnalysis for an analysis result, with its key phrase and entity rows."""
+    db_analysis = models.TextAnalysis(
+        title=title,
+        text=text,
+        excerpt=text[:models.EXCERPT_LENGTH],
+        text_hash=parse_key(text),
+        user_id=user_id,
+        # Fields not requested are set to None rather than left unset, which
+        # after the insert would expire them (a query on the next access)
+        **{k: analysis_result.get(k) for k in ANALYSIS_FIELDS}
+    )
+    attach_terms(db_analysis)
+    return db_analysis
+
+async def store_analysis(db: AsyncSession, title: str, text: str, user_id: int, analysis_result: dict) -> models.TextAnalysis:
+    """Save an analysis result for a user (in the background with write-behind)."""
+    db_analysis = new_analysis(title, text, user_id, analysis_result)
+    if analysis_persister.enabled:
+        return await analysis_persister.add(db_analysis)
+    db.add(db_analysis)
+    await db.commit()
+    # Not refreshed: the session keeps every attribute loaded after commit,
+    # while a refresh would expire the deferred columns the response needs
+    return db_analysis
+
+async def get_current_user_synced(
+    current_user: models.User = Depends(security.get_current_active_user)
+) -> models.User:
+    """The current user, once their write-behind analyses are stored, so that reads include them."""
+    try:
+        await analysis_persister.sync(current_user.id)
+    except WriteBehindError as e:
+        logger.error(f"Write-behind error for user {current_user.username}: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+    return current_user
+
+async def analyses_page(db: AsyncSession, query: Select, response: Response, sort_by: str, sort_order: str,
+                        limit: int, cursor: Optional[str] = None, skip: int = 0) -> List[models.TextAnalysis]:
+    """
+    A page of the analyses query selects, in the given order, after cursor
+    (or skip analyses). Sets the X-Next-Cursor header when there are more;
+    raises ValueError for a cursor of another order.
+    """
+    query = query.order_by(*keyset_order(sort_by, sort_order))
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, sort_order)
+        segments = [query.where(after) for after in keyset_after(sort_by, sort_order, value, last_id)]
+    else:
+        segments = [query.offset(skip)]
+    
+    # One more than a page, to know whether there is a next one
+    analyses = []
+    for segment in segments:
+        result = await db.execute(segment.limit(limit + 1 - len(analyses)))
+        analyses.extend(result.scalars().all())
+        if len(analyses) > limit:
+            break
+    if len(analyses) > limit:
+        analyses = analyses[:limit]
+        last = analyses[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(sort_by, sort_order, getattr(last, sort_by), last.id)
+    return analyses
+
 # Create database tables
 try:
     models.Base.metadata.create_all(bind=engine)
+    # New columns, column conversions and the search index, for databases made by earlier versions
+    with SessionLocal() as db:
+        prepare_schema(db)
+    # create_all only adds indexes along with their table
+    for index in models.TextAnalysis.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
     logger.info("Database tables created successfully")
 except Exception as e:
     logger.error(f"Failed to create database tables: {e}")
@@ -77,6 +237,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Security middleware for production
@@ -107,45 +268,34 @@ async def startup_event():
     
     try:
         # Test database connection
-        if not check_database_health():
+        if not await check_database_health_async():
             logger.error("Database health check failed")
             if IS_PRODUCTION:
                 raise RuntimeError("Database connection failed")
         else:
             logger.info("Database connection verified")
         
-        # Test spaCy model loading
+        analysis_executor.start()
+        analysis_persister.start()
+        
+        # Load the shared spaCy model (already loaded and warmed up by the analyzer module)
         try:
-            nlp = spacy.load("en_core_web_sm")
-            logger.info("spaCy model 'en_core_web_sm' loaded successfully")
-        except OSError:
-            error_msg = (
-                "spaCy English model 'en_core_web_sm' not found. "
-                "Please install it using: python -m spacy download en_core_web_sm"
-            )
-            logger.error(f"spaCy model error: {error_msg}")
+            nlp = model_registry.get(DEFAULT_MODEL)
+        except RuntimeError as e:
+            logger.error(f"spaCy model error: {e}")
             if IS_PRODUCTION:
-                raise RuntimeError(error_msg)
+                raise
             else:
                 logger.warning("Continuing anyway as we're in development mode...")
                 return
         
-        # Test spaCy and TextBlob functionality
-        test_text = "This is a test sentence for spaCy and TextBlob."
-        
-        # Test TextBlob
-        blob = TextBlob(test_text)
-        _ = blob.sentiment
-        _ = blob.noun_phrases
+        # Test TextBlob when the compatibility sentiment backend uses it
+        if SENTIMENT_BACKEND == "textblob":
+            blob = TextBlob("This is a test sentence for spaCy and TextBlob.")
+            _ = blob.sentiment
+            _ = blob.noun_phrases
         
-        # Test spaCy functionality
-        doc = nlp(test_text)
-        _ = [token.text for token in doc]
-        _ = [sent.text for sent in doc.sents]
-        _ = [ent.text for ent in doc.ents]
-        _ = [chunk.text for chunk in doc.noun_chunks]
-        
-        logger.info("spaCy and TextBlob initialization successful")
+        logger.info(f"NLP initialization successful (sentiment backend: {SENTIMENT_BACKEND})")
         logger.info(f"spaCy model info: {nlp.meta['name']} v{nlp.meta['version']}")
             
     except Exception as e:
@@ -159,6 +309,9 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on application shutdown."""
     logger.info("Shutting down TextScope application")
+    analysis_executor.shutdown()
+    await analysis_persister.close()
+    await async_engine.dispose()
 
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -168,20 +321,13 @@ templates = Jinja2Templates(directory="templates")
 @app.post("/token", response_model=schemas.Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        # Add connection verification
-        if not check_database_health():
-            logger.error("Database connection failed during login attempt")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail="Service temporarily unavailable. Please try again later.",
-                headers={"Retry-After": "30"},
-            )
-            
-        user = db.query(models.User).filter(models.User.username == form_data.username).first()
-        if not user or not security.verify_password(form_data.password, user.hashed_password):
+        # A database that is down surfaces here as an OperationalError (503 below)
+        result = await db.execute(select(models.User).where(models.User.username == form_data.username))
+        user = result.scalars().first()
+        if not user or not await security.verify_password_async(form_data.password, user.hashed_password):
             logger.warning(f"Failed login attempt for username: {form_data.username}")
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -215,28 +361,28 @@ async def login_for_access_token(
 
 # User endpoints
 @app.post("/users/", response_model=schemas.User)
-def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
     try:
         # Check for existing email
-        db_user = db.query(models.User).filter(models.User.email == user.email).first()
-        if db_user:
+        result = await db.execute(select(models.User).where(models.User.email == user.email))
+        if result.scalars().first():
             raise HTTPException(status_code=400, detail="Email already registered")
         
         # Check for existing username
-        db_user = db.query(models.User).filter(models.User.username == user.username).first()
-        if db_user:
+        result = await db.execute(select(models.User).where(models.User.username == user.username))
+        if result.scalars().first():
             raise HTTPException(status_code=400, detail="Username already taken")
         
         # Create new user
-        hashed_password = security.get_password_hash(user.password)
+        hashed_password = await security.get_password_hash_async(user.password)
         db_user = models.User(
             email=user.email,
             username=user.username,
             hashed_password=hashed_password
         )
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         
         logger.info(f"New user created: {user.username}")
         return db_user
@@ -245,7 +391,7 @@ def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         logger.error(f"User creation error: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during user creation"
@@ -261,7 +407,7 @@ async def read_users_me(
 @app.post("/analyze/", response_model=schemas.TextAnalysis)
 async def analyze_text_endpoint(
     text_input: schemas.TextAnalysisCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(security.get_current_active_user)
 ):
     try:
@@ -272,20 +418,22 @@ async def analyze_text_endpoint(
                 detail="Text cannot be empty"
             )
         
-        max_length = int(os.getenv('MAX_CONTENT_LENGTH', 10000))
-        if len(text_input.text) > max_length:
+        if len(text_input.text) > MAX_DOCUMENT_LENGTH:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Text exceeds maximum length of {max_length} characters"
+                detail=f"Text exceeds maximum length of {MAX_DOCUMENT_LENGTH} characters"
             )
 
-        # Verify spaCy model availability
         try:
-            nlp = spacy.load("en_core_web_sm")
-            # Test basic functionality
-            test_doc = nlp("Test sentence")
-            _ = [token.text for token in test_doc]
-        except OSError:
+            fields = requested_fields(text_input.fields)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        # Verify spaCy model availability
+        if not model_registry.is_ready(DEFAULT_MODEL):
             logger.error("spaCy model not available")
             raise HTTPException(
                 status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -294,63 +442,332 @@ async def analyze_text_endpoint(
                     "message": "spaCy English model 'en_core_web_sm' not found. Please install it using: python -m spacy download en_core_web_sm"
                 }
             )
-        except Exception as e:
-            logger.error(f"spaCy error: {str(e)}")
-            raise HTTPException(
-                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-                detail={
-                    "error": "spaCy error",
-                    "message": str(e)
-                }
-            )
 
         # Perform analysis
         logger.info(f"Starting text analysis for user: {current_user.username}")
-        analysis_result = analyze_text(text_input.text)
+        analysis_result = await run_cached_analysis(text_input.text, fields, db)
         
         # Create database entry
-        db_analysis = models.TextAnalysis(
-            title=text_input.title,
-            text=text_input.text,
-            user_id=current_user.id,
-            **{k: v for k, v in analysis_result.items() if k in [
-                'sentiment', 'polarity', 'subjectivity', 'sentiment_confidence', 'tone', 'professional_metrics',
-                'flesch_score', 'avg_sentence_length', 'word_count', 'sentence_count', 'syllable_count', 
-                'difficulty_level', 'professional_scores', 'writing_improvements',
-                'key_phrases', 'named_entities',
-                'language_code', 'language_confidence', 'content_category', 'category_confidence', 
-                'category_distribution', 'summary'
-            ]}
-        )
-        
-        db.add(db_analysis)
-        db.commit()
-        db.refresh(db_analysis)
+        db_analysis = await store_analysis(db, text_input.title, text_input.text, current_user.id, analysis_result)
         
         logger.info(f"Text analysis completed for user: {current_user.username}, analysis ID: {db_analysis.id}")
         return db_analysis
         
     except HTTPException:
         raise
+    except UnsupportedLanguageError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=str(e)
+        )
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many analyses in progress. Please try again later.",
+            headers={"Retry-After": "5"},
+        )
+    except asyncio.TimeoutError:
+        logger.error(f"Text analysis timed out for user: {current_user.username}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Text analysis timed out"
+        )
     except Exception as e:
         logger.error(f"Text analysis error: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during text analysis"
         )
 
+@app.websocket("/ws/analyze")
+async def live_analysis_endpoint(websocket: WebSocket, token: str = "", fields: Optional[str] = None):
+    """
+    Analyze a document while it is being written (see live.LiveSession for the edit messages).
+
+    Browsers cannot set headers on a WebSocket, so the access token is passed
+    as the `token` query parameter; `fields` is a comma-separated subset of
+    live.LIVE_FIELDS. Nothing is stored until the client sends
+    {"type": "save", "title": "..."}, which runs a full analysis of the current
+    text and replies {"type": "saved", "id": <analysis id>}.
+    """
+    async with AsyncSessionLocal() as db:
+        current_user = await security.user_from_token(token, db)
+    if current_user is None or not current_user.is_active:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    if not model_registry.is_ready(DEFAULT_MODEL):
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
+        return
+    try:
+        document = LiveDocument(
+            fields.split(',') if fields else None,
+            max_length=MAX_DOCUMENT_LENGTH,
+            max_paragraph_length=MAX_CONTENT_LENGTH,
+        )
+    except ValueError as e:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION, reason=str(e))
+        return
+
+    await websocket.accept()
+    session = LiveSession(document, websocket.send_json, debounce=LIVE_DEBOUNCE_MS / 1000,
+                          run=analysis_executor.run_local)
+    logger.info(f"Live analysis session started for user: {current_user.username}")
+    try:
+        while True:
+            try:
+                message = await websocket.receive_json()
+                if not isinstance(message, dict):
+                    raise ValueError("Messages must be JSON objects")
+                if message.get("type") == "save":
+                    await websocket.send_json(await save_live_document(document, message, current_user))
+                else:
+                    session.receive(message)
+            except ValueError as e:
+                await websocket.send_json({"type": "error", "detail": str(e)})
+            except ExecutorBusyError:
+                await websocket.send_json({"type": "error", "detail": "Too many analyses in progress. Please try again later."})
+            except asyncio.TimeoutError:
+                await websocket.send_json({"type": "error", "detail": "Text analysis timed out"})
+    except WebSocketDisconnect:
+        logger.info(f"Live analysis session ended for user: {current_user.username}")
+    finally:
+        await session.close()
+
+async def save_live_document(document: LiveDocument, message: dict, current_user: models.User) -> dict:
+    """Run a full analysis of a live document's current text and store it."""
+    version, text = document.version, document.text
+    if not text.strip():
+        raise ValueError("Text cannot be empty")
+    fields = requested_fields(message.get("fields"))
+    async with AsyncSessionLocal() as db:
+        analysis_result = await run_cached_analysis(text, fields, db)
+        db_analysis = await store_analysis(db, message.get("title") or "Untitled", text, current_user.id, analysis_result)
+    logger.info(f"Live analysis saved for user: {current_user.username}, analysis ID: {db_analysis.id}")
+    return {"type": "saved", "version": version, "id": db_analysis.id}
+
+@app.post("/analyze/batch", response_model=List[schemas.BatchAnalysisResult])
+async def analyze_batch_endpoint(
+    text_inputs: List[schemas.TextAnalysisCreate],
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(security.get_current_active_user)
+):
+    if not text_inputs:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Batch cannot be empty"
+        )
+    if len(text_inputs) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Batch exceeds maximum size of {MAX_BATCH_SIZE} items"
+        )
+
+    max_length = MAX_CONTENT_LENGTH
+    results = [{"index": i, "analysis": None, "error": None} for i in range(len(text_inputs))]
+    
+    # Oversized texts get a per-item error and are not analyzed
+    texts = []
+    item_fields = []
+    for i, text_input in enumerate(text_inputs):
+        texts.append(normalize_text(text_input.text))
+        try:
+            item_fields.append(requested_fields(text_input.fields))
+        except ValueError as e:
+            item_fields.append(None)
+            results[i]["error"] = str(e)
+        if len(text_input.text) > max_length:
+            results[i]["error"] = f"Text exceeds maximum length of {max_length} characters"
+
+    try:
+        logger.info(f"Starting batch analysis of {len(texts)} texts for user: {current_user.username}")
+        # Process-pool workers cannot start their own nlp.pipe worker processes
+        n_process = 1 if analysis_executor.mode == "process" else BATCH_N_PROCESS
+        
+        # Serve what we can from the cache and analyze the misses, one run per distinct field set
+        batch_results = [None] * len(texts)
+        misses = {}
+        for i, text in enumerate(texts):
+            if not results[i]["error"]:
+                batch_results[i] = analysis_cache.get(text, item_fields[i])
+                if batch_results[i] is None:
+                    key = tuple(item_fields[i]) if item_fields[i] is not None else None
+                    misses.setdefault(key, []).append(i)
+        for key, indices in misses.items():
+            fields = list(key) if key is not None else None
+            analyzed = await analysis_executor.run(analyze_batch, [texts[i] for i in indices], n_process, fields)
+            for i, analysis_result in zip(indices, analyzed):
+                batch_results[i] = analysis_result
+                if "error" not in analysis_result:
+                    analysis_cache.set(texts[i], analysis_result, fields)
+        
+        db_analyses = {}
+        for i, analysis_result in enumerate(batch_results):
+            if results[i]["error"]:
+                continue
+            if "error" in analysis_result:
+                results[i]["error"] = analysis_result["error"]
+                continue
+            db_analyses[i] = new_analysis(text_inputs[i].title, text_inputs[i].text, current_user.id, analysis_result)
+
+        # Persist every successful analysis in a single transaction
+        if analysis_persister.enabled:
+            await analysis_persister.assign_ids(db_analyses.values())
+        db.add_all(db_analyses.values())
+        await db.commit()
+        for i, db_analysis in db_analyses.items():
+            results[i]["analysis"] = db_analysis
+
+        logger.info(
+            f"Batch analysis completed for user: {current_user.username}, "
+            f"{len(db_analyses)} stored, {len(texts) - len(db_analyses)} failed"
+        )
+        return results
+
+    except ExecutorBusyError:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many analyses in progress. Please try again later.",
+            headers={"Retry-After": "5"},
+        )
+    except asyncio.TimeoutError:
+        logger.error(f"Batch analysis timed out for user: {current_user.username}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Batch analysis timed out"
+        )
+    except Exception as e:
+        logger.error(f"Batch analysis error: {str(e)}")
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error during batch analysis"
+        )
+
+# Routes under /analyses/ are declared before /analyses/{analysis_id}, which would match them
+@app.get("/analyses/phrases", response_model=List[schemas.PhraseCount])
+async def get_top_phrases(
+    last: Optional[int] = Query(None, ge=1),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_synced)
+):
+    """Key phrases found in the most of the user's analyses, or of their `last` analyses."""
+    try:
+        result = await db.execute(top_phrases(current_user.id, last, limit))
+        return result.all()
+    except Exception as e:
+        logger.error(f"Get top phrases error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error while retrieving key phrases"
+        )
+
+@app.get("/analyses/entities", response_model=List[schemas.EntityCount])
+async def get_top_entities(
+    label: Optional[str] = None,
+    last: Optional[int] = Query(None, ge=1),
+    limit: int = Query(20, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_synced)
+):
+    """Named entities (of one `label`, e.g. ORGANIZATION, if given) found in the most of the user's analyses."""
+    try:
+        result = await db.execute(top_entities(current_user.id, label.upper() if label else None, last, limit))
+        return result.all()
+    except Exception as e:
+        logger.error(f"Get top entities error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error while retrieving entities"
+        )
+
+@app.get("/analyses/mentions", response_model=List[schemas.TextAnalysisListItem])
+async def get_mentions(
+    response: Response,
+    label: Optional[str] = None,
+    text: Optional[str] = None,
+    phrase: Optional[str] = None,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_synced)
+):
+    """
+    The user's analyses, newest first, that mention an entity (`label` and
+    `text`, e.g. ORGANIZATION and Acme) or have a key phrase (`phrase`).
+    Matching ignores case and a leading article. Paged like GET /analyses/.
+    """
+    if (phrase is None) == (label is None or text is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Give either label and text, or phrase"
+        )
+    try:
+        ids = mentioning(label.upper() if label else None, text, phrase)
+        query = select(models.TextAnalysis).options(*list_options()).where(
+            models.TextAnalysis.user_id == current_user.id,
+            models.TextAnalysis.id.in_(ids)
+        )
+        try:
+            return await analyses_page(db, query, response, "created_at", "desc", limit, cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Get mentions error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error while retrieving analyses"
+        )
+
+@app.get("/analyses/search", response_model=List[schemas.SearchResult])
+async def search_analyses(
+    q: str = Query(..., min_length=1, max_length=500),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_synced)
+):
+    """
+    The user's analyses whose title, text or summary have every word of `q`,
+    most relevant first, each with a snippet of the matching text. Paged
+    with skip and limit: every match is ranked to order a page anyway, so a
+    cursor would save nothing.
+    """
+    try:
+        query = search_query(async_engine.dialect.name, current_user.id, q)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    try:
+        result = await db.execute(query.offset(skip).limit(limit))
+        return result.scalars().all()
+    except Exception as e:
+        logger.error(f"Search analyses error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error while searching analyses"
+        )
+
 @app.delete("/analyses/{analysis_id}")
 async def delete_analysis(
     analysis_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(security.get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_synced)
 ):
     try:
-        analysis = db.query(models.TextAnalysis).filter(
+        result = await db.execute(select(models.TextAnalysis).where(
             models.TextAnalysis.id == analysis_id,
             models.TextAnalysis.user_id == current_user.id
-        ).first()
+        ))
+        analysis = result.scalars().first()
         
         if not analysis:
             raise HTTPException(
@@ -358,8 +775,14 @@ async def delete_analysis(
                 detail="Analysis not found or you don't have permission to delete it"
             )
         
-        db.delete(analysis)
-        db.commit()
+        text_hash = analysis.text_hash
+        for statement in delete_terms(analysis.id):
+            await db.execute(statement)
+        await db.delete(analysis)
+        await db.flush()
+        for statement in delete_orphaned_parse(text_hash):
+            await db.execute(statement)
+        await db.commit()
         
         logger.info(f"Analysis {analysis_id} deleted by user: {current_user.username}")
         return {"message": "Analysis deleted successfully"}
@@ -368,7 +791,7 @@ async def delete_analysis(
         raise
     except Exception as e:
         logger.error(f"Delete analysis error: {str(e)}")
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal server error during analysis deletion"
@@ -377,14 +800,15 @@ async def delete_analysis(
 @app.get("/analyses/{analysis_id}", response_model=schemas.TextAnalysis)
 async def get_analysis(
     analysis_id: int,
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(security.get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_synced)
 ):
     try:
-        analysis = db.query(models.TextAnalysis).filter(
+        result = await db.execute(select(models.TextAnalysis).options(undefer_group(models.CONTENT)).where(
             models.TextAnalysis.id == analysis_id,
             models.TextAnalysis.user_id == current_user.id
-        ).first()
+        ))
+        analysis = result.scalars().first()
         
         if not analysis:
             raise HTTPException(
@@ -403,42 +827,49 @@ async def get_analysis(
             detail="Internal server error while retrieving analysis"
         )
 
-@app.get("/analyses/", response_model=List[schemas.TextAnalysis])
+@app.get("/analyses/", response_model=List[schemas.TextAnalysisListItem])
 async def get_analyses(
+    response: Response,
     skip: int = 0,
-    limit: int = 10,
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
     sort_by: str = "created_at",
     sort_order: str = "desc",
-    db: Session = Depends(get_db),
-    current_user: models.User = Depends(security.get_current_active_user)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user_synced)
 ):
+    """
+    A page of the user's analyses, without their text or detailed results.
+
+    When there are more, the X-Next-Cursor response header holds the `cursor`
+    of the next page. `skip` is still accepted without a cursor, but deep
+    offsets get slower, where a cursor does not.
+    """
     try:
         # Validate sort parameters
-        valid_sort_fields = ["created_at", "title", "sentiment", "word_count"]
-        if sort_by not in valid_sort_fields:
+        if sort_by not in SORT_FIELDS:
             sort_by = "created_at"
-        
-        valid_sort_orders = ["asc", "desc"]
-        if sort_order not in valid_sort_orders:
+        if sort_order not in SORT_ORDERS:
             sort_order = "desc"
         
         # Build query
-        query = db.query(models.TextAnalysis).filter(
+        query = select(models.TextAnalysis).options(*list_options()).where(
             models.TextAnalysis.user_id == current_user.id
         )
         
-        # Apply sorting
-        if sort_order == "desc":
-            query = query.order_by(getattr(models.TextAnalysis, sort_by).desc())
-        else:
-            query = query.order_by(getattr(models.TextAnalysis, sort_by).asc())
-        
-        # Apply pagination
-        analyses = query.offset(skip).limit(limit).all()
+        try:
+            analyses = await analyses_page(db, query, response, sort_by, sort_order, limit, cursor, skip)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
         
         logger.info(f"Retrieved {len(analyses)} analyses for user: {current_user.username}")
         return analyses
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Get analyses error: {str(e)}")
         raise HTTPException(
@@ -456,16 +887,10 @@ async def health_check():
     """Health check endpoint for monitoring."""
     try:
         # Check database connection
-        db_healthy = check_database_health()
+        db_healthy = await check_database_health_async()
         
-        # Check spaCy model availability
-        spacy_healthy = False
-        try:
-            nlp = spacy.load("en_core_web_sm")
-            test_doc = nlp("Test")
-            spacy_healthy = True
-        except:
-            pass
+        # Check spaCy model availability without loading anything
+        spacy_healthy = model_registry.is_ready(DEFAULT_MODEL)
         
         status_code = 200 if db_healthy and spacy_healthy else 503
         
@@ -473,6 +898,9 @@ async def health_check():
             "status": "healthy" if status_code == 200 else "unhealthy",
             "database": "connected" if db_healthy else "disconnected",
             "spacy": "available" if spacy_healthy else "unavailable",
+            "model": model_registry.info(DEFAULT_MODEL),
+            "cache": analysis_cache.stats(),
+            "write_behind": analysis_persister.stats(),
             "environment": ENVIRONMENT,
             "timestamp": datetime.utcnow().isoformat()
         }
@@ -0,0 +1,112 @@
+import logging
+import os
+import resource
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import spacy
+from spacy.language import Language
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "en_core_web_sm"
+WARMUP_TEXT = "TextScope warms up the pipeline. This sentence mentions London and Acme Corp."
+
+
+def _rss_bytes() -> int:
+    """Current resident set size of this process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Outside Linux fall back to the peak RSS (kilobytes on Linux, bytes on macOS)
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return usage if os.uname().sysname == "Darwin" else usage * 1024
+
+
+class ModelRegistry:
+    """
+    Loads each spaCy pipeline once per process and hands out the shared instance.
+
+    Setup hooks (e.g. adding a custom component) run on every model before it
+    is warmed up. Load time, memory footprint
+    and load errors are recorded so the health check can report readiness
+    without loading anything itself.
+    """
+
+    def __init__(self):
+        self._models: Dict[str, Language] = {}
+        self._info: Dict[str, Dict] = {}
+        self._setup: List[Callable[[Language], None]] = []
+        self._lock = threading.Lock()
+
+    def add_setup(self, hook: Callable[[Language], None]):
+        """Run hook(model) on every model before its warm-up; models loaded already get it right away."""
+        with self._lock:
+            self._setup.append(hook)
+            for name, model in self._models.items():
+                hook(model)
+                self._info[name]["pipeline"] = list(model.pipe_names)
+
+    def get(self, name: str = DEFAULT_MODEL) -> Language:
+        """Return the loaded pipeline, loading and warming it up on first use."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            if name not in self._models:
+                self._models[name] = self._load(name)
+            return self._models[name]
+
+    def _load(self, name: str) -> Language:
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        try:
+            model = spacy.load(name)
+        except OSError as e:
+            self._info[name] = {"ready": False, "error": str(e)}
+            raise RuntimeError(
+                f"spaCy English model '{name}' not found. "
+                f"Please install it using: python -m spacy download {name}"
+            )
+        for hook in self._setup:
+            hook(model)
+        load_seconds = time.perf_counter() - start
+
+        warmup_start = time.perf_counter()
+        model(WARMUP_TEXT)
+        warmup_seconds = time.perf_counter() - warmup_start
+
+        self._info[name] = {
+            "ready": True,
+            "name": model.meta.get("name"),
+            "version": model.meta.get("version"),
+            "pipeline": list(model.pipe_names),
+            "load_time_ms": round(load_seconds * 1000, 1),
+            "warmup_time_ms": round(warmup_seconds * 1000, 1),
+            "memory_mb": round((_rss_bytes() - rss_before) / (1024 * 1024), 1),
+        }
+        logger.info(
+            f"spaCy model '{name}' v{model.meta.get('version')} loaded in "
+            f"{self._info[name]['load_time_ms']} ms ({self._info[name]['memory_mb']} MB)"
+        )
+        return model
+
+    def is_ready(self, name: str = DEFAULT_MODEL) -> bool:
+        return name in self._models
+
+    def info(self, name: Optional[str] = None) -> Dict:
+        """Load statistics for one model, or for every model requested so far."""
+        if name is not None:
+            return dict(self._info.get(name, {"ready": False}))
+        return {model_name: dict(info) for model_name, info in self._info.items()}
+
+
+# Process-wide registry shared by every consumer
+registry = ModelRegistry()
+
+
+def get_model(name: str = DEFAULT_MODEL) -> Language:
+    return registry.get(name)
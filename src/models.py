@@ -1,9 +1,17 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Text, Float, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, String, DateTime, Text, Float, LargeBinary
+from sqlalchemy.orm import deferred, query_expression, relationship
 from sqlalchemy.sql import func
 from datetime import datetime
+from .compression import CompressedJSON, CompressedText
 from .database import Base
 
+# Deferred columns of an analysis: its text, summary and detailed results,
+# loaded only by queries that ask for them with undefer_group(CONTENT)
+CONTENT = "content"
+
+# Characters at the start of the text stored, uncompressed, as its excerpt
+EXCERPT_LENGTH = 200
+
 class User(Base):
     __tablename__ = "users"
 
@@ -21,7 +29,9 @@ class TextAnalysis(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, index=True)
-    text = Column(Text)
+    text = deferred(Column(CompressedText), group=CONTENT)
+    excerpt = Column(String)  # shown in the history list without reading the text
+    text_hash = Column(String(64))  # key of the text's stored parse (see parse_store.parse_key)
     created_at = Column(DateTime, default=datetime.utcnow)
     user_id = Column(Integer, ForeignKey("users.id"))
 
@@ -31,7 +41,7 @@ class TextAnalysis(Base):
     subjectivity = Column(Float)
     sentiment_confidence = Column(Float)
     tone = Column(String)
-    professional_metrics = Column(JSON)
+    professional_metrics = deferred(Column(CompressedJSON), group=CONTENT)
 
     # Readability Metrics
     flesch_score = Column(Float)
@@ -40,22 +50,87 @@ class TextAnalysis(Base):
     sentence_count = Column(Integer)
     syllable_count = Column(Integer)
     difficulty_level = Column(String)
-    professional_scores = Column(JSON)
-    writing_improvements = Column(JSON)
+    professional_scores = deferred(Column(CompressedJSON), group=CONTENT)
+    writing_improvements = deferred(Column(CompressedJSON), group=CONTENT)
 
     # Key Phrases and Entities
-    key_phrases = Column(JSON)
-    named_entities = Column(JSON)
+    key_phrases = deferred(Column(CompressedJSON), group=CONTENT)
+    named_entities = deferred(Column(CompressedJSON), group=CONTENT)
 
     # Language and Category
     language_code = Column(String)
-    language_confidence = Column(String)
+    language_confidence = Column(Float)  # probability of language_code, 0 to 1
     content_category = Column(String)
     category_confidence = Column(Float)
-    category_distribution = Column(JSON)
+    category_distribution = deferred(Column(CompressedJSON), group=CONTENT)
 
     # Summary
-    summary = Column(Text)
+    summary = deferred(Column(Text), group=CONTENT)
+
+    # Computed by the history list query (see listing.list_options)
+    key_phrase_count = query_expression()
+    # Computed by search queries (see search.search_query)
+    snippet = query_expression()
+    rank = query_expression()
 
     # Relationships
     user = relationship("User", back_populates="analyses")
+    # Rows of key_phrases and named_entities (see terms); written with the
+    # analysis and deleted explicitly, never loaded through the analysis
+    key_phrase_terms = relationship("AnalysisKeyPhrase", lazy="raise", passive_deletes="all")
+    entity_terms = relationship("AnalysisEntity", lazy="raise", passive_deletes="all")
+
+    # Keyset pagination of a user's analyses in each sort order of GET /analyses/
+    __table_args__ = (
+        Index("ix_text_analyses_user_created_at", "user_id", "created_at", "id"),
+        Index("ix_text_analyses_user_title", "user_id", "title", "id"),
+        Index("ix_text_analyses_user_sentiment", "user_id", "sentiment", "id"),
+        Index("ix_text_analyses_user_word_count", "user_id", "word_count", "id"),
+        # Finds the other analyses of a text when one is deleted (see parse_store.delete_orphaned_parse)
+        Index("ix_text_analyses_text_hash", "text_hash"),
+    )
+
+class AnalysisIdReservation(Base):
+    __tablename__ = "analysis_id_reservations"
+
+    # One row: the last analysis id reserved by write-behind on SQLite (see persister.IdAllocator)
+    id = Column(Integer, primary_key=True)
+    last_id = Column(Integer, nullable=False)
+
+class DocumentParse(Base):
+    __tablename__ = "document_parses"
+
+    # SHA-256 of the normalized text; every analysis of the same text shares its parse
+    text_hash = Column(String(64), primary_key=True)
+    model = Column(String)        # spaCy model name-version that produced the parse
+    chunk_size = Column(Integer)  # longer texts are stored as one Doc per chunk of at most this size
+    data = Column(LargeBinary)    # compressed DocBin (see parse_store)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class AnalysisKeyPhrase(Base):
+    __tablename__ = "analysis_key_phrases"
+
+    id = Column(Integer, primary_key=True)
+    analysis_id = Column(Integer, ForeignKey("text_analyses.id", ondelete="CASCADE"), nullable=False)
+    phrase = Column(String)      # as extracted
+    normalized = Column(String)  # casefolded, without a leading article (see terms.normalize_term)
+    score = Column(Float)        # relevance_score of the phrase in its analysis
+
+    __table_args__ = (
+        Index("ix_analysis_key_phrases_analysis_id", "analysis_id"),
+        Index("ix_analysis_key_phrases_normalized", "normalized", "analysis_id"),
+    )
+
+class AnalysisEntity(Base):
+    __tablename__ = "analysis_entities"
+
+    id = Column(Integer, primary_key=True)
+    analysis_id = Column(Integer, ForeignKey("text_analyses.id", ondelete="CASCADE"), nullable=False)
+    label = Column(String)       # category of named_entities: PERSON, ORGANIZATION, LOCATION, ...
+    text = Column(String)
+    normalized = Column(String)
+
+    __table_args__ = (
+        Index("ix_analysis_entities_analysis_id", "analysis_id"),
+        Index("ix_analysis_entities_label_normalized", "label", "normalized", "analysis_id"),
+    )
@@ -1,71 +1,277 @@
 from textblob import TextBlob
 import spacy
 from spacy.lang.en.stop_words import STOP_WORDS
-from typing import Dict, List, Tuple, Optional
+from spacy.language import Language
+from spacy.tokens import Doc, Span
+from spacy.matcher import PhraseMatcher
+from .model_registry import get_model, registry
+from .sentiment import COMPONENT_NAME as SENTIMENT_COMPONENT
+from .syllables import count_syllables, count_syllables_lower
+from .summarizer import summarize
+from .language import LanguageGuess, identify_language
+from typing import Dict, List, Tuple, Optional, Iterable, Iterator, Set, NamedTuple
+from functools import cached_property
 import json
 import math
 from collections import Counter
 import re
-from langdetect import detect
 import numpy as np
 import os
 
-# Load spaCy model
-def load_spacy_model():
-    """Load spaCy model with error handling."""
-    try:
-        # Try to load the model
-        nlp = spacy.load("en_core_web_sm")
-        return nlp
-    except OSError:
-        # If model not found, provide helpful error message
-        raise RuntimeError(
-            "spaCy English model 'en_core_web_sm' not found. "
-            "Please install it using: python -m spacy download en_core_web_sm"
-        )
+# "spacy" scores sentiment and extracts noun phrases from the spaCy parse;
+# "textblob" keeps the original TextBlob implementation for compatibility
+SENTIMENT_BACKEND = os.getenv("SENTIMENT_BACKEND", "spacy")
+if SENTIMENT_BACKEND not in ("spacy", "textblob"):
+    raise RuntimeError(f"Unknown SENTIMENT_BACKEND '{SENTIMENT_BACKEND}', expected 'spacy' or 'textblob'")
+
+
+def _add_sentiment_component(model: Language):
+    if SENTIMENT_COMPONENT not in model.component_names:
+        # Needs only the tokenizer, so it runs first and survives any pipeline pruning
+        model.add_pipe(SENTIMENT_COMPONENT, first=True)
+
+
+if SENTIMENT_BACKEND == "spacy":
+    # Through the registry, so the component is warmed up and listed in its model info
+    registry.add_setup(_add_sentiment_component)
+
+# Shared pipeline from the process-wide model registry
+nlp = get_model()
+
+# What to do with text identified as another language before it is parsed:
+# "analyze" runs the English pipeline anyway, "skip" returns only the language
+# fields and "reject" raises UnsupportedLanguageError
+NON_ENGLISH_POLICY = os.getenv("NON_ENGLISH_POLICY", "analyze")
+if NON_ENGLISH_POLICY not in ("analyze", "skip", "reject"):
+    raise RuntimeError(f"Unknown NON_ENGLISH_POLICY '{NON_ENGLISH_POLICY}', expected 'analyze', 'skip' or 'reject'")
+# Texts are only skipped or rejected when identified with at least this confidence
+NON_ENGLISH_MIN_CONFIDENCE = float(os.getenv("NON_ENGLISH_MIN_CONFIDENCE", 0.9))
+
+# Identifies the analysis output format; bump it whenever a change alters results
+# so cached analyses from the previous version are not reused
+ANALYZER_VERSION = f"1.4.0+{SENTIMENT_BACKEND}+{NON_ENGLISH_POLICY}+{nlp.meta['name']}-{nlp.meta['version']}"
+
+# Analysis components that can be requested with fields=, and the result keys each one produces
+ANALYSIS_COMPONENTS = {
+    "sentiment": ["sentiment", "polarity", "subjectivity", "sentiment_confidence", "tone"],
+    "professional_metrics": ["professional_metrics"],
+    "readability": [
+        "flesch_score", "avg_sentence_length", "word_count", "sentence_count", "syllable_count",
+        "difficulty_level", "professional_scores", "writing_improvements"
+    ],
+    "key_phrases": ["key_phrases"],
+    "named_entities": ["named_entities"],
+    "language": ["language_code", "language_confidence"],
+    "category": ["content_category", "category_confidence", "category_distribution"],
+    "summary": ["summary"],
+}
+
+# Doc annotations each analysis component reads
+COMPONENT_FEATURES = {
+    "sentiment": {"sentiment"} if SENTIMENT_BACKEND == "spacy" else set(),
+    "professional_metrics": {"sents", "dep", "lemma"},
+    "readability": {"sents", "dep", "lemma"},
+    "key_phrases": {"pos", "dep", "lemma", "ents", "tensor"},
+    "named_entities": {"ents"},
+    "language": set(),
+    "category": {"lemma"},
+    "summary": {"sents", "lemma"},
+}
+
+# spaCy components that produce each annotation. Sentence boundaries come from the
+# lightweight senter unless the parser runs anyway for dependencies.
+FEATURE_PIPES = {
+    "pos": ["tok2vec", "tagger", "attribute_ruler"],
+    "lemma": ["tok2vec", "tagger", "attribute_ruler", "lemmatizer"],
+    "dep": ["tok2vec", "parser"],
+    "sents": ["senter"],
+    "ents": ["ner"],
+    "tensor": ["tok2vec"],
+    "sentiment": [SENTIMENT_COMPONENT],
+}
+PRUNABLE_PIPES = {name for pipes in FEATURE_PIPES.values() for name in pipes}
+
+class PipelinePlan(NamedTuple):
+    disable: List[str]  # enabled pipes to skip
+    extra: List[str]    # disabled pipes (e.g. senter) to run after the others
+
+def plan_pipeline(fields: Optional[Set[str]] = None) -> PipelinePlan:
+    """Work out which spaCy components the requested analysis components need."""
+    if fields is None:
+        return PipelinePlan([], [])
+    features = set().union(*(COMPONENT_FEATURES[field] for field in fields))
+    if "sents" in features and ("dep" in features or "senter" not in nlp.component_names):
+        features = (features - {"sents"}) | {"dep"}
+    needed = set().union(*(FEATURE_PIPES[feature] for feature in features))
+    
+    # Components this module doesn't know about always run
+    disable = [name for name in nlp.pipe_names if name in PRUNABLE_PIPES and name not in needed]
+    extra = [name for name in nlp.disabled if name in needed]
+    return PipelinePlan(disable, extra)
+
+def parse(text: str, fields: Optional[Set[str]] = None) -> Doc:
+    """Parse text running only the spaCy components the requested fields need."""
+    plan = plan_pipeline(fields)
+    doc = nlp(text, disable=plan.disable)
+    for name in plan.extra:
+        doc = nlp.get_pipe(name)(doc)
+    return doc
+
+def match_phrases(phrases: List[str], docs: Iterable[Tuple[int, Doc]]) -> Dict[str, Tuple[int, Span, int]]:
+    """
+    Count case-insensitive, token-aligned occurrences of every phrase in one PhraseMatcher pass.
+
+    docs are consecutive parts of one text, given with the character offset
+    where each part starts. Returns phrase -> (non-overlapping frequency,
+    first matching span, character offset of that span in the whole text)
+    for the phrases that occur.
+    """
+    # Phrases that lowercase to the same tokens share one pattern
+    phrase_keys = {}
+    patterns = {}
+    for phrase in phrases:
+        pattern = nlp.make_doc(phrase.strip())
+        key = tuple(token.lower_ for token in pattern)
+        phrase_keys[phrase] = key
+        patterns.setdefault(key, pattern)
+    
+    matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+    matcher.add("KEY_PHRASE_CANDIDATE", list(patterns.values()))
+    
+    matches = {}
+    for offset, doc in docs:
+        last_end = {}
+        for _, start, end in sorted(matcher(doc), key=lambda m: (m[1], m[2])):
+            key = tuple(token.lower_ for token in doc[start:end])
+            match = matches.get(key)
+            if match is None:
+                span = doc[start:end]
+                matches[key] = match = [0, span, offset + span.start_char]
+            elif start < last_end.get(key, 0):
+                continue
+            match[0] += 1
+            last_end[key] = end
+    
+    return {
+        phrase: tuple(matches[key]) for phrase, key in phrase_keys.items() if key in matches
+    }
+
+class SentenceStatistics(NamedTuple):
+    text: str                  # stripped sentence text
+    word_count: int            # tokens that are not punctuation or space
+    content_lemmas: List[str]  # lowercased lemmas of non-stop, non-punct, non-space tokens
+    is_passive: bool           # contains an auxpass or nsubjpass dependency
+
+class TokenStatistics:
+    """
+    Token statistics for a Doc, gathered in a single pass.
+
+    Every analysis component reads its counts from here instead of walking
+    the Doc again. Sentence statistics are only collected when the Doc has
+    sentence boundaries.
+    """
+
+    def __init__(self, doc: Doc):
+        self.lemma_freq = Counter()          # every token
+        self.content_lemma_freq = Counter()  # excluding stop words, punctuation and spaces
+        self.word_count = 0                  # excluding punctuation and spaces
+        self.syllable_count = 0
+        self.complex_words = 0               # words with more than two syllables
+        self.sentences: List[SentenceStatistics] = []
 
-# Initialize spaCy
-nlp = load_spacy_model()
+        has_sents = doc.has_annotation("DEP") or doc.has_annotation("SENT_START")
+        for span in (doc.sents if has_sents else [doc[:]]):
+            sent_words = 0
+            content_lemmas = []
+            is_passive = False
+            for token in span:
+                lemma = token.lemma_.lower()
+                self.lemma_freq[lemma] += 1
+                if token.is_space or token.is_punct:
+                    continue
+                sent_words += 1
+                syllables = count_syllables_lower(token.lower_)
+                self.syllable_count += syllables
+                if syllables > 2:
+                    self.complex_words += 1
+                if not token.is_stop:
+                    content_lemmas.append(lemma)
+                if token.dep_ == "auxpass" or token.dep_ == "nsubjpass":
+                    is_passive = True
+            self.word_count += sent_words
+            self.content_lemma_freq.update(content_lemmas)
+            if has_sents:
+                self.sentences.append(
+                    SentenceStatistics(span.text.strip(), sent_words, content_lemmas, is_passive)
+                )
+
+    def update(self, other: "TokenStatistics"):
+        """Add the statistics of the text that follows this one (e.g. the next chunk of a document)."""
+        self.lemma_freq.update(other.lemma_freq)
+        self.content_lemma_freq.update(other.content_lemma_freq)
+        self.word_count += other.word_count
+        self.syllable_count += other.syllable_count
+        self.complex_words += other.complex_words
+        self.sentences.extend(other.sentences)
+
+    def subtract(self, other: "TokenStatistics"):
+        """Remove the counts of a text added with update(). Its sentences are left for the caller to drop."""
+        for counter, part in ((self.lemma_freq, other.lemma_freq),
+                              (self.content_lemma_freq, other.content_lemma_freq)):
+            counter.subtract(part)
+            for lemma in part:
+                if counter[lemma] <= 0:
+                    del counter[lemma]
+        self.word_count -= other.word_count
+        self.syllable_count -= other.syllable_count
+        self.complex_words -= other.complex_words
 
 class TextAnalyzer:
-    def __init__(self, text: str):
+    """
+    Analyzes a single text.
+
+    The TextBlob (only used by the "textblob" sentiment backend), the spaCy
+    Doc and the values derived from them are cached properties, built the
+    first time a component needs them, so a caller asking only for e.g.
+    readability never builds the TextBlob. When fields is given, the Doc is
+    parsed with only the spaCy components those analysis components need.
+    """
+
+    def __init__(self, text: str, doc: Optional[Doc] = None, fields: Optional[Set[str]] = None):
         self.text = text
-        self.blob = TextBlob(text)
-        self.doc = nlp(text)
-        self.tokens = [token.text for token in self.doc if not token.is_space]
-        self.sentences = [sent.text.strip() for sent in self.doc.sents]
+        self.fields = fields
         self.stop_words = STOP_WORDS
-            
-        # Add professional writing metrics
-        self.professional_metrics = self._calculate_professional_metrics()
-
-    def _get_wordnet_pos(self, word: str) -> str:
-        """Map POS tag to first character lemmatize() accepts (for TextBlob compatibility)"""
-        # Get spaCy POS tag
-        token = nlp(word)[0]
-        pos = token.pos_
-        
-        # Map to WordNet format for TextBlob compatibility
-        if pos.startswith('ADJ'):
-            return 'a'  # adjective
-        elif pos.startswith('NOUN'):
-            return 'n'  # noun
-        elif pos.startswith('VERB'):
-            return 'v'  # verb
-        elif pos.startswith('ADV'):
-            return 'r'  # adverb
-        else:
-            return 'n'  # default to noun
-
-    def _normalize_word(self, word: str) -> str:
-        """Normalize word using spaCy lemmatization"""
-        # Convert to lowercase and remove basic punctuation
-        word = word.lower().strip('.,!?;:\'\"')
-        # Use spaCy for lemmatization
-        doc = nlp(word)
-        if doc:
-            return doc[0].lemma_
-        return word
+        if doc is not None:
+            # Reuse a Doc parsed elsewhere (e.g. by nlp.pipe) instead of parsing again
+            self.doc = doc
+
+    @cached_property
+    def blob(self) -> TextBlob:
+        return TextBlob(self.text)
+
+    @cached_property
+    def doc(self) -> Doc:
+        return parse(self.text, self.fields)
+
+    @cached_property
+    def tokens(self) -> List[str]:
+        return [token.text for token in self.doc if not token.is_space]
+
+    @cached_property
+    def token_count(self) -> int:
+        return len(self.tokens)
+
+    @cached_property
+    def stats(self) -> TokenStatistics:
+        return TokenStatistics(self.doc)
+
+    @cached_property
+    def sentences(self) -> List[str]:
+        return [sent.text for sent in self.stats.sentences]
+
+    @cached_property
+    def professional_metrics(self) -> Dict:
+        return self._calculate_professional_metrics()
 
     def _calculate_professional_metrics(self) -> Dict:
         """Calculate professional writing metrics."""
@@ -77,32 +283,21 @@ class TextAnalyzer:
             "clarity_score": 0
         }
         
-        # Count passive voice using spaCy dependency parsing
-        for sent in self.doc.sents:
-            # Look for passive voice patterns
-            for token in sent:
-                if token.dep_ == "auxpass" or (token.dep_ == "nsubjpass"):
-                    metrics["passive_voice_count"] += 1
-                    break
-            
-            # Count long sentences (more than 20 words)
-            sent_tokens = [t for t in sent if not t.is_space and not t.is_punct]
-            if len(sent_tokens) > 20:
+        # Passive voice (from the dependency parse) and long sentences (more than 20 words)
+        for sent in self.stats.sentences:
+            if sent.is_passive:
+                metrics["passive_voice_count"] += 1
+            if sent.word_count > 20:
                 metrics["long_sentences"] += 1
         
         # Count complex words (more than 2 syllables)
-        for token in self.doc:
-            if not token.is_space and not token.is_punct:
-                if self._count_syllables(token.text) > 2:
-                    metrics["complex_words"] += 1
+        metrics["complex_words"] = self.stats.complex_words
         
         # Find repetitive words
-        word_freq = Counter(token.lemma_.lower() for token in self.doc 
-                          if not token.is_stop and not token.is_punct and not token.is_space)
-        metrics["repetitive_words"] = sum(1 for word, count in word_freq.items() if count > 3)
+        metrics["repetitive_words"] = sum(1 for word, count in self.stats.content_lemma_freq.items() if count > 3)
         
         # Calculate clarity score (0-100)
-        total_words = len([t for t in self.doc if not t.is_space and not t.is_punct])
+        total_words = self.stats.word_count
         if total_words > 0:
             clarity_factors = [
                 (1 - metrics["passive_voice_count"] / len(self.sentences)) * 25,  # Passive voice impact
@@ -114,12 +309,17 @@ class TextAnalyzer:
         
         return metrics
 
-    def get_sentiment_analysis(self) -> Dict:
-        """
-        Enhanced sentiment analysis with professional writing insights.
-        """
-        polarity = self.blob.sentiment.polarity
-        subjectivity = self.blob.sentiment.subjectivity
+    @cached_property
+    def sentiment_scores(self) -> Tuple[float, float, int]:
+        """Polarity, subjectivity and the number of scored expressions they average over."""
+        if SENTIMENT_BACKEND == "spacy":
+            return self.doc._.polarity, self.doc._.subjectivity, self.doc._.sentiment_assessments
+        sentiment = self.blob.sentiment_assessments
+        return sentiment.polarity, sentiment.subjectivity, len(sentiment.assessments)
+
+    def _get_sentiment_scores(self) -> Dict:
+        """Sentiment label, polarity, subjectivity and tone from sentiment_scores (either backend)."""
+        polarity, subjectivity, _ = self.sentiment_scores
         
         # Calculate confidence based on subjectivity and polarity strength
         confidence = (abs(polarity) + (1 - abs(subjectivity - 0.5))) / 2
@@ -142,8 +342,7 @@ class TextAnalyzer:
             "polarity": round(polarity, 3),
             "subjectivity": round(subjectivity, 3),
             "confidence": round(confidence, 3),
-            "tone": tone,
-            "professional_metrics": self.professional_metrics
+            "tone": tone
         }
 
     def get_readability_metrics(self) -> Dict:
@@ -151,10 +350,9 @@ class TextAnalyzer:
         Enhanced readability metrics with professional writing insights.
         """
         # Count words excluding punctuation and spaces
-        word_count = len([token for token in self.doc if not token.is_space and not token.is_punct])
+        word_count = self.stats.word_count
         sentence_count = len(self.sentences)
-        syllable_count = sum(self._count_syllables(token.text) for token in self.doc 
-                           if not token.is_space and not token.is_punct)
+        syllable_count = self.stats.syllable_count
         
         # Average sentence length
         avg_sentence_length = word_count / sentence_count if sentence_count > 0 else 0
@@ -194,7 +392,7 @@ class TextAnalyzer:
         if self.professional_metrics["long_sentences"] > len(self.sentences) * 0.3:
             improvements.append("Break down long sentences to improve clarity and readability")
         
-        if self.professional_metrics["complex_words"] > len(self.tokens) * 0.2:
+        if self.professional_metrics["complex_words"] > self.token_count * 0.2:
             improvements.append("Simplify complex vocabulary where possible to enhance understanding")
         
         if self.professional_metrics["repetitive_words"] > 0:
@@ -205,45 +403,88 @@ class TextAnalyzer:
     def extract_key_phrases(self, top_n: int = 15) -> List[Dict]:
         """
         Advanced key phrase extraction with multiple algorithms and enhanced features.
+
+        Candidates keep the tokens of ``self.doc`` they were taken from, so the
+        per-phrase scores are computed from the existing parse instead of
+        running the pipeline again for every candidate. Frequencies and first
+        positions of all candidates come from a single PhraseMatcher pass.
         """
-        phrase_scores = []
+        candidates = self._key_phrase_candidates()
+        if not candidates:
+            return []
         
-        # 1. Extract noun phrases from TextBlob
-        textblob_phrases = list(set(str(phrase) for phrase in self.blob.noun_phrases))
+        occurrences = self._match_phrases(list(candidates))
         
-        # 2. Extract noun chunks from spaCy
-        spacy_noun_chunks = [chunk.text.strip() for chunk in self.doc.noun_chunks if len(chunk.text.strip()) > 2]
+        phrases = []
+        for phrase, tokens in candidates.items():
+            occurrence = occurrences.get(phrase)
+            if occurrence is None:
+                continue
+            frequency, first_span = occurrence
+            if tokens is None:
+                tokens = list(first_span)
+            phrases.append((phrase, frequency, first_span.start_char, self._phrase_features(phrase, tokens)))
         
-        # 3. Extract verb phrases (verb + object patterns)
-        verb_phrases = self._extract_verb_phrases()
+        return self._rank_key_phrases(phrases, len(candidates), top_n)
+    
+    def _key_phrase_candidates(self) -> Dict[str, Optional[List]]:
+        """
+        Candidate key phrases mapped to the tokens they were taken from.
+
+        Noun phrases map to None; their tokens are those of their first match in the Doc.
+        """
+        candidates = {}
         
-        # 4. Extract multi-word expressions using dependency parsing
-        dependency_phrases = self._extract_dependency_phrases()
+        # 1. Extract noun chunks from spaCy
+        for chunk in self.doc.noun_chunks:
+            if len(chunk.text.strip()) > 2:
+                candidates.setdefault(chunk.text.strip(), list(chunk))
         
-        # 5. Extract significant single words (high TF-IDF)
-        significant_words = self._extract_significant_words()
+        # 2. Extract verb phrases (verb + object patterns)
+        for phrase, tokens in self._extract_verb_phrases().items():
+            candidates.setdefault(phrase, tokens)
         
-        # Combine all phrase sources
-        all_phrases = list(set(textblob_phrases + spacy_noun_chunks + verb_phrases + dependency_phrases + significant_words))
+        # 3. Extract multi-word expressions using dependency parsing
+        for phrase, tokens in self._extract_dependency_phrases().items():
+            candidates.setdefault(phrase, tokens)
         
-        # Filter out very short or very long phrases
-        all_phrases = [phrase for phrase in all_phrases if 2 <= len(phrase.split()) <= 6 and len(phrase) >= 3]
+        # 4. Extract significant single words (high TF-IDF)
+        for phrase, tokens in self._extract_significant_words().items():
+            candidates.setdefault(phrase, tokens)
         
-        total_phrases = len(all_phrases)
-        if total_phrases == 0:
-            return []
+        # 5. Extract TextBlob-style noun phrases (aligned to their first match in the Doc)
+        noun_phrases = self.doc._.noun_phrases if SENTIMENT_BACKEND == "spacy" else self.blob.noun_phrases
+        for phrase in set(str(phrase) for phrase in noun_phrases):
+            candidates.setdefault(phrase, None)
         
-        # Calculate advanced scores for each phrase
-        for phrase in all_phrases:
-            phrase_clean = phrase.lower().strip()
+        # Filter out very short or very long phrases
+        return {
+            phrase: tokens for phrase, tokens in candidates.items()
+            if 2 <= len(phrase.split()) <= 6 and len(phrase) >= 3
+        }
+    
+    def _phrase_features(self, phrase: str, tokens: List) -> Tuple[float, float, str, str]:
+        """Scores and labels of a phrase that depend on its tokens: POS diversity, coherence, type and category."""
+        return (
+            self._calculate_pos_diversity_score(tokens),
+            self._calculate_semantic_coherence_score(phrase, tokens),
+            self._classify_phrase_type(tokens),
+            self._classify_phrase_category(phrase, tokens),
+        )
+    
+    def _rank_key_phrases(self, phrases: List[Tuple[str, int, int, Tuple]], total_phrases: int,
+                          top_n: int) -> List[Dict]:
+        """
+        Score and rank phrases given as (phrase, frequency, first character offset, features).
+
+        total_phrases is the number of candidates the phrases were selected from.
+        """
+        phrase_scores = []
+        for phrase, frequency, first_char, features in phrases:
+            pos_diversity_score, semantic_coherence_score, phrase_type, phrase_category = features
             
-            # Basic frequency metrics
-            frequency = self.text.lower().count(phrase_clean)
-            if frequency == 0:
-                continue
-                
             # Term frequency
-            tf = frequency / len(self.tokens)
+            tf = frequency / self.token_count
             
             # Inverse document frequency (simplified)
             idf = math.log(total_phrases / (1 + frequency))
@@ -253,9 +494,7 @@ class TextAnalyzer:
             
             # Advanced scoring factors
             phrase_length_score = self._calculate_phrase_length_score(phrase)
-            pos_diversity_score = self._calculate_pos_diversity_score(phrase)
-            semantic_coherence_score = self._calculate_semantic_coherence_score(phrase)
-            position_score = self._calculate_position_score(phrase)
+            position_score = self._calculate_position_score(first_char)
             capitalization_score = self._calculate_capitalization_score(phrase)
             
             # Combine scores with weights
@@ -268,10 +507,6 @@ class TextAnalyzer:
                 capitalization_score * 0.10
             )
             
-            # Determine phrase type and category
-            phrase_type = self._classify_phrase_type(phrase)
-            phrase_category = self._classify_phrase_category(phrase)
-            
             phrase_scores.append({
                 "phrase": phrase.strip(),
                 "relevance_score": round(final_score, 4),
@@ -299,68 +534,82 @@ class TextAnalyzer:
         
         return sorted_phrases[:top_n]
     
-    def _extract_verb_phrases(self) -> List[str]:
+    def _match_phrases(self, phrases: List[str]) -> Dict[str, Tuple[int, Span]]:
+        """
+        Count case-insensitive, token-aligned occurrences of every phrase in one pass.
+
+        Returns phrase -> (non-overlapping frequency, first matching span) for
+        the phrases that occur in the text.
+        """
+        return {
+            phrase: (frequency, first_span)
+            for phrase, (frequency, first_span, _) in match_phrases(phrases, [(0, self.doc)]).items()
+        }
+    
+    def _extract_verb_phrases(self) -> Dict[str, List]:
         """Extract verb phrases using dependency parsing."""
-        verb_phrases = []
+        verb_phrases = {}
         
         for token in self.doc:
             if token.pos_ == "VERB" and not token.is_stop:
                 # Find objects and complements of the verb
-                phrase_parts = [token.text]
+                phrase_parts = [token]
                 
                 for child in token.children:
                     if child.dep_ in ["dobj", "pobj", "acomp", "xcomp"] and not child.is_stop:
-                        phrase_parts.append(child.text)
+                        phrase_parts.append(child)
                         # Add children of the object
                         for grandchild in child.children:
                             if grandchild.dep_ in ["amod", "compound"] and not grandchild.is_stop:
-                                phrase_parts.insert(-1, grandchild.text)
+                                phrase_parts.insert(-1, grandchild)
                 
                 if len(phrase_parts) > 1:
-                    verb_phrases.append(" ".join(phrase_parts))
+                    verb_phrases.setdefault(" ".join(t.text for t in phrase_parts), phrase_parts)
         
-        return list(set(verb_phrases))
+        return verb_phrases
     
-    def _extract_dependency_phrases(self) -> List[str]:
+    def _extract_dependency_phrases(self) -> Dict[str, List]:
         """Extract phrases based on dependency relationships."""
-        dependency_phrases = []
+        dependency_phrases = {}
         
         for token in self.doc:
             if token.pos_ in ["NOUN", "PROPN"] and not token.is_stop:
-                phrase_parts = [token.text]
+                phrase_parts = [token]
                 
                 # Add modifiers
                 for child in token.children:
                     if child.dep_ in ["amod", "compound", "nmod"] and not child.is_stop:
                         if child.i < token.i:
-                            phrase_parts.insert(0, child.text)
+                            phrase_parts.insert(0, child)
                         else:
-                            phrase_parts.append(child.text)
+                            phrase_parts.append(child)
                 
                 if len(phrase_parts) > 1:
-                    dependency_phrases.append(" ".join(phrase_parts))
+                    dependency_phrases.setdefault(" ".join(t.text for t in phrase_parts), phrase_parts)
         
-        return list(set(dependency_phrases))
+        return dependency_phrases
     
-    def _extract_significant_words(self) -> List[str]:
+    def _extract_significant_words(self) -> Dict[str, List]:
         """Extract significant single words based on TF-IDF."""
         word_scores = {}
+        word_tokens = {}
         
         for token in self.doc:
             if (not token.is_stop and not token.is_punct and not token.is_space 
                 and token.pos_ in ["NOUN", "PROPN", "ADJ", "VERB"] and len(token.text) > 3):
                 
                 word = token.lemma_.lower()
-                frequency = sum(1 for t in self.doc if t.lemma_.lower() == word)
+                frequency = self.stats.lemma_freq[word]
                 
                 if frequency >= 2:  # Only include words that appear at least twice
-                    tf = frequency / len(self.tokens)
-                    idf = math.log(len(self.tokens) / frequency)
+                    tf = frequency / self.token_count
+                    idf = math.log(self.token_count / frequency)
                     word_scores[token.text] = tf * idf
+                    word_tokens.setdefault(token.text, [token])
         
         # Return top significant words
         sorted_words = sorted(word_scores.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, score in sorted_words[:10]]
+        return {word: word_tokens[word] for word, score in sorted_words[:10]}
     
     def _calculate_phrase_length_score(self, phrase: str) -> float:
         """Calculate score based on phrase length (optimal length gets higher score)."""
@@ -376,10 +625,9 @@ class TextAnalyzer:
         else:
             return 0.4
     
-    def _calculate_pos_diversity_score(self, phrase: str) -> float:
+    def _calculate_pos_diversity_score(self, tokens: List) -> float:
         """Calculate score based on part-of-speech diversity."""
-        phrase_doc = nlp(phrase)
-        pos_tags = set(token.pos_ for token in phrase_doc if not token.is_punct)
+        pos_tags = set(token.pos_ for token in tokens if not token.is_punct)
         
         # Reward phrases with good POS diversity
         if len(pos_tags) >= 2:
@@ -387,11 +635,10 @@ class TextAnalyzer:
         else:
             return 0.5
     
-    def _calculate_semantic_coherence_score(self, phrase: str) -> float:
+    def _calculate_semantic_coherence_score(self, phrase: str, tokens: List) -> float:
         """Calculate semantic coherence using word vectors."""
         try:
-            phrase_doc = nlp(str(phrase))  # Ensure phrase is a string
-            tokens = [token for token in phrase_doc if not token.is_punct and not token.is_space]
+            tokens = [token for token in tokens if not token.is_punct and not token.is_space]
             
             if len(tokens) < 2:
                 return 0.5
@@ -428,11 +675,8 @@ class TextAnalyzer:
             else:
                 return 0.6
     
-    def _calculate_position_score(self, phrase: str) -> float:
-        """Calculate score based on phrase position in text (earlier = higher score)."""
-        phrase_lower = phrase.lower()
-        first_occurrence = self.text.lower().find(phrase_lower)
-        
+    def _calculate_position_score(self, first_occurrence: int) -> float:
+        """Calculate score based on the phrase's first character offset (earlier = higher score)."""
         if first_occurrence == -1:
             return 0.0
         
@@ -454,10 +698,9 @@ class TextAnalyzer:
         else:
             return 0.3  # No capitalization
     
-    def _classify_phrase_type(self, phrase: str) -> str:
+    def _classify_phrase_type(self, tokens: List) -> str:
         """Classify the type of phrase."""
-        phrase_doc = nlp(phrase)
-        pos_tags = [token.pos_ for token in phrase_doc if not token.is_punct]
+        pos_tags = [token.pos_ for token in tokens if not token.is_punct]
         
         if any(pos in pos_tags for pos in ["PROPN"]):
             return "proper_noun"
@@ -470,7 +713,7 @@ class TextAnalyzer:
         else:
             return "general"
     
-    def _classify_phrase_category(self, phrase: str) -> str:
+    def _classify_phrase_category(self, phrase: str, tokens: List) -> str:
         """Classify the semantic category of the phrase."""
         phrase_lower = phrase.lower()
         
@@ -491,15 +734,16 @@ class TextAnalyzer:
                 return category
         
         # Use spaCy's entity recognition for additional categorization
-        phrase_doc = nlp(phrase)
-        for ent in phrase_doc.ents:
-            if ent.label_ == "PERSON":
+        for token in tokens:
+            if not token.ent_type_:
+                continue
+            if token.ent_type_ == "PERSON":
                 return "person"
-            elif ent.label_ in ["ORG", "COMPANY"]:
+            elif token.ent_type_ in ["ORG", "COMPANY"]:
                 return "organization"
-            elif ent.label_ in ["GPE", "LOC"]:
+            elif token.ent_type_ in ["GPE", "LOC"]:
                 return "location"
-            elif ent.label_ in ["PRODUCT", "WORK_OF_ART"]:
+            elif token.ent_type_ in ["PRODUCT", "WORK_OF_ART"]:
                 return "product"
         
         return "general"
@@ -526,31 +770,33 @@ class TextAnalyzer:
             'CARDINAL': 'PERCENT',  # Numbers can be percentages
         }
         
-        for ent in self.doc.ents:
-            entity_type = label_mapping.get(ent.label_)
+        for text, label in self._entity_mentions():
+            entity_type = label_mapping.get(label)
             if entity_type and entity_type in entities:
-                entities[entity_type].append(ent.text)
+                entities[entity_type].append(text)
         
         # Remove duplicates and keep only non-empty categories
         return {k: list(set(v)) for k, v in entities.items() if v}
 
+    def _entity_mentions(self) -> Iterable[Tuple[str, str]]:
+        """(text, spaCy label) of every entity in the Doc."""
+        return ((ent.text, ent.label_) for ent in self.doc.ents)
+
+    @cached_property
+    def language(self) -> LanguageGuess:
+        return identify_language(self.text)
+
     def get_language_info(self) -> Dict:
         """
         Detect language and provide confidence metrics.
         """
-        try:
-            language = detect(self.text)
-            return {
-                "language_code": language,
-                "is_english": language == 'en',
-                "confidence": "high" if len(self.text.split()) > 30 else "medium"
-            }
-        except:
-            return {
-                "language_code": "unknown",
-                "is_english": None,
-                "confidence": "low"
-            }
+        if self.language.code == "unknown":
+            return {"language_code": "unknown", "is_english": None, "confidence": 0.0}
+        return {
+            "language_code": self.language.code,
+            "is_english": self.language.code == 'en',
+            "confidence": self.language.confidence
+        }
 
     def get_content_category(self) -> Dict:
         """
@@ -565,8 +811,7 @@ class TextAnalyzer:
         }
         
         # Use spaCy lemmatized tokens
-        words = set(token.lemma_.lower() for token in self.doc 
-                   if not token.is_stop and not token.is_punct and not token.is_space)
+        words = set(self.stats.content_lemma_freq)
         
         category_scores = {}
         for category, keywords in categories.items():
@@ -581,71 +826,20 @@ class TextAnalyzer:
             "category_distribution": category_scores
         }
 
-    def get_summary(self, num_sentences: int = 3) -> str:
+    def get_summary(self, num_sentences: int = 3, ratio: Optional[float] = None, method: str = "frequency") -> str:
         """
-        Generate a summary using sentence scoring with spaCy lemmatization.
+        Extractive summary: the top num_sentences (or ratio of the) sentences in document order.
+
+        method is "frequency" (lemma frequency, position and length) or
+        "textrank" (centrality among similar sentences); see summarizer.
         """
-        # Get lemmatized words and remove stopwords using spaCy
-        lemmatized_words = [
-            token.lemma_.lower()
-            for token in self.doc
-            if not token.is_stop and not token.is_punct and not token.is_space
-        ]
-        
-        # Calculate word frequencies
-        word_freq = Counter(lemmatized_words)
-        
-        # Score sentences based on word frequencies and position
-        sentence_scores = {}
-        for i, sent in enumerate(self.doc.sents):
-            # Get lemmatized words in the sentence
-            sentence_words = [
-                token.lemma_.lower()
-                for token in sent
-                if not token.is_stop and not token.is_punct and not token.is_space
-            ]
-            
-            # Calculate sentence score
-            word_count = len(sentence_words)
-            if word_count > 0:
-                # Base score from word frequencies
-                freq_score = sum(word_freq[word] for word in sentence_words) / word_count
-                # Position score (favor earlier sentences)
-                pos_score = 1.0 / (1 + i)
-                # Length score (penalize very short or very long sentences)
-                length_score = 1.0 if 5 <= word_count <= 25 else 0.5
-                
-                # Combine scores
-                sentence_scores[sent.text.strip()] = (freq_score * 0.6 + pos_score * 0.3 + length_score * 0.1)
-        
-        # Get top sentences
-        summary_sentences = sorted(
-            sentence_scores.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:num_sentences]
-        
-        # Sort sentences by their original order
-        summary_sentences.sort(key=lambda x: self.sentences.index(x[0]))
-        
-        # Join sentences
-        return ' '.join(sentence for sentence, score in summary_sentences)
+        sentences = self.stats.sentences
+        chosen = summarize(sentences, num_sentences, ratio=ratio, method=method)
+        return ' '.join(sentences[i].text for i in chosen)
 
     def _count_syllables(self, word: str) -> int:
         """Helper method to count syllables in a word."""
-        word = word.lower()
-        count = 0
-        vowels = 'aeiouy'
-        if word[0] in vowels:
-            count += 1
-        for index in range(1, len(word)):
-            if word[index] in vowels and word[index - 1] not in vowels:
-                count += 1
-        if word.endswith('e'):
-            count -= 1
-        if count == 0:
-            count += 1
-        return count
+        return count_syllables(word)
 
     def _get_difficulty_level(self, flesch_score: float) -> str:
         """Helper method to convert Flesch score to difficulty level."""
@@ -664,52 +858,154 @@ class TextAnalyzer:
         else:
             return "Very Difficult"
 
-def analyze_text(text: str) -> Dict:
+def resolve_fields(fields: Optional[Iterable[str]] = None) -> Set[str]:
+    """Validate requested analysis components; None means all of them."""
+    if fields is None:
+        return set(ANALYSIS_COMPONENTS)
+    fields = set(fields)
+    unknown = fields - set(ANALYSIS_COMPONENTS)
+    if unknown:
+        raise ValueError(
+            f"Unknown analysis fields: {', '.join(sorted(unknown))}. "
+            f"Valid fields are: {', '.join(ANALYSIS_COMPONENTS)}"
+        )
+    if not fields:
+        raise ValueError("At least one analysis field must be requested")
+    return fields
+
+class UnsupportedLanguageError(ValueError):
+    """Raised for text in another language when NON_ENGLISH_POLICY is "reject"."""
+
+def language_gate(text: str) -> Optional[Dict]:
+    """
+    Identify the language of text before it is parsed.
+
+    Returns None when the text should be analyzed. For text confidently
+    identified as another language, returns the language fields to use as
+    the whole result ("skip") or raises UnsupportedLanguageError ("reject").
+    """
+    if NON_ENGLISH_POLICY == "analyze":
+        return None
+    language = identify_language(text)
+    if language.code in ("en", "unknown") or language.confidence < NON_ENGLISH_MIN_CONFIDENCE:
+        return None
+    if NON_ENGLISH_POLICY == "reject":
+        raise UnsupportedLanguageError(
+            f"Text appears to be in '{language.code}' (confidence {language.confidence:.2f}); "
+            f"only English text can be analyzed"
+        )
+    return {"language_code": language.code, "language_confidence": language.confidence}
+
+def analyze_text(text: str, fields: Optional[Iterable[str]] = None) -> Dict:
     """
     Enhanced main function to analyze text with professional insights.
+
+    fields limits the analysis to the named components (see ANALYSIS_COMPONENTS);
+    keys of components that were not requested are left out of the result.
+    """
+    fields = resolve_fields(fields)
+    skipped = language_gate(text)
+    if skipped is not None:
+        return skipped
+    return _build_analysis(TextAnalyzer(text, fields=fields), fields)
+
+def analyze_texts(texts: Iterable[str], batch_size: int = 50, n_process: int = 1,
+                  fields: Optional[Iterable[str]] = None) -> Iterator[Dict]:
     """
-    analyzer = TextAnalyzer(text)
+    Analyze many texts, parsing them in batches with nlp.pipe.
+
+    Yields one result per input, in input order. A text that cannot be
+    analyzed yields {"error": "<message>"} instead of stopping the batch.
+    """
+    fields = resolve_fields(fields)
+
+    def prepare(items):
+        # Texts that are not parsed pass through as empty Docs with their result
+        for item in items:
+            if not isinstance(item, str):
+                yield "", {"error": "Text must be a string"}
+            elif not item.strip():
+                yield "", {"error": "Text cannot be empty"}
+            else:
+                try:
+                    skipped = language_gate(item)
+                except UnsupportedLanguageError as e:
+                    skipped = {"error": str(e)}
+                if skipped is not None:
+                    yield "", skipped
+                else:
+                    yield item, None
+
+    plan = plan_pipeline(fields)
+    docs = nlp.pipe(prepare(texts), as_tuples=True, batch_size=batch_size, n_process=n_process,
+                    disable=plan.disable)
+    for doc, ready in docs:
+        if ready is not None:
+            yield ready
+            continue
+        try:
+            for name in plan.extra:
+                doc = nlp.get_pipe(name)(doc)
+            yield _build_analysis(TextAnalyzer(doc.text, doc=doc, fields=fields), fields)
+        except Exception as e:
+            yield {"error": str(e)}
+
+def _build_analysis(analyzer: TextAnalyzer, fields: Set[str]) -> Dict:
+    """Run the requested analysis components and flatten the results into one dict."""
+    result = {}
     
-    sentiment_analysis = analyzer.get_sentiment_analysis()
-    readability = analyzer.get_readability_metrics()
-    key_phrases = analyzer.extract_key_phrases()
-    named_entities = analyzer.get_named_entities()
-    language_info = analyzer.get_language_info()
-    content_category = analyzer.get_content_category()
-    summary = analyzer.get_summary()
+    # Sentiment Analysis fields
+    if "sentiment" in fields:
+        sentiment_analysis = analyzer._get_sentiment_scores()
+        result.update({
+            "sentiment": sentiment_analysis["sentiment"],
+            "polarity": sentiment_analysis["polarity"],
+            "subjectivity": sentiment_analysis["subjectivity"],
+            "sentiment_confidence": sentiment_analysis["confidence"],
+            "tone": sentiment_analysis["tone"],
+        })
+    if "professional_metrics" in fields:
+        result["professional_metrics"] = analyzer.professional_metrics
     
-    return {
-        # Sentiment Analysis fields
-        "sentiment": sentiment_analysis["sentiment"],
-        "polarity": sentiment_analysis["polarity"],
-        "subjectivity": sentiment_analysis["subjectivity"],
-        "sentiment_confidence": sentiment_analysis["confidence"],
-        "tone": sentiment_analysis["tone"],
-        "professional_metrics": sentiment_analysis["professional_metrics"],
-        
-        # Readability fields
-        "flesch_score": readability["flesch_reading_ease"],
-        "avg_sentence_length": readability["avg_sentence_length"],
-        "word_count": readability["word_count"],
-        "sentence_count": readability["sentence_count"],
-        "syllable_count": readability["syllable_count"],
-        "difficulty_level": readability["difficulty_level"],
-        "professional_scores": readability["professional_scores"],
-        "writing_improvements": readability["writing_improvements"],
-        
-        # Key Phrases and Entities
-        "key_phrases": key_phrases,
-        "named_entities": named_entities,
-        
-        # Language Info
-        "language_code": language_info["language_code"],
-        "language_confidence": language_info["confidence"],
-        
-        # Content Category
-        "content_category": content_category["primary_category"],
-        "category_confidence": content_category["confidence_score"],
-        "category_distribution": content_category["category_distribution"],
-        
-        # Summary
-        "summary": summary
-    }
+    # Readability fields
+    if "readability" in fields:
+        readability = analyzer.get_readability_metrics()
+        result.update({
+            "flesch_score": readability["flesch_reading_ease"],
+            "avg_sentence_length": readability["avg_sentence_length"],
+            "word_count": readability["word_count"],
+            "sentence_count": readability["sentence_count"],
+            "syllable_count": readability["syllable_count"],
+            "difficulty_level": readability["difficulty_level"],
+            "professional_scores": readability["professional_scores"],
+            "writing_improvements": readability["writing_improvements"],
+        })
+    
+    # Key Phrases and Entities
+    if "key_phrases" in fields:
+        result["key_phrases"] = analyzer.extract_key_phrases()
+    if "named_entities" in fields:
+        result["named_entities"] = analyzer.get_named_entities()
+    
+    # Language Info
+    if "language" in fields:
+        language_info = analyzer.get_language_info()
+        result.update({
+            "language_code": language_info["language_code"],
+            "language_confidence": language_info["confidence"],
+        })
+    
+    # Content Category
+    if "category" in fields:
+        content_category = analyzer.get_content_category()
+        result.update({
+            "content_category": content_category["primary_category"],
+            "category_confidence": content_category["confidence_score"],
+            "category_distribution": content_category["category_distribution"],
+        })
+    
+    # Summary
+    if "summary" in fields:
+        result["summary"] = analyzer.get_summary()
+    
+    return result
@@ -0,0 +1,240 @@
+import argparse
+import hashlib
+import logging
+import os
+import sys
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import delete, exists, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from . import models
+from .cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Token attributes kept in a stored parse: those the analysis components read.
+# Sentiment and doc.tensor are not stored; restore_docs recomputes them.
+STORED_ATTRS = ["ORTH", "TAG", "HEAD", "DEP", "ENT_IOB", "ENT_TYPE", "LEMMA", "POS", "SENT_START"]
+
+DEFAULT_CHUNK_SIZE = int(os.getenv('MAX_CONTENT_LENGTH', 10000))
+
+
+class SerializedParse(NamedTuple):
+    model: str   # spaCy model name-version
+    data: bytes  # DocBin.to_bytes() (zlib-compressed), one Doc per chunk of the text
+
+
+def parse_key(text: str) -> str:
+    """Hash a parse is stored under: SHA-256 of the normalized text."""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def model_name(nlp) -> str:
+    return f"{nlp.meta['name']}-{nlp.meta['version']}"
+
+
+def serialize_parse(text: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> SerializedParse:
+    """Parse text with the full pipeline, in chunks as analyze_long_text would, and serialize it."""
+    from spacy.tokens import DocBin
+    from .long_document import iter_chunks
+    from .nlp import nlp
+
+    chunks = [text] if len(text) <= chunk_size else [chunk for _, chunk in iter_chunks(text, chunk_size)]
+    doc_bin = DocBin(attrs=STORED_ATTRS, docs=nlp.pipe(chunks, batch_size=4))
+    return SerializedParse(model_name(nlp), doc_bin.to_bytes())
+
+
+def analyze_with_parse(text: str, fields: Optional[List[str]] = None,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> Tuple[Dict, Optional[SerializedParse]]:
+    """
+    analyze_long_text that also returns the serialized parse of text.
+
+    The text is parsed with the full pipeline whatever fields asks for, so
+    the stored parse serves any later analysis. Text the language gate keeps
+    from being parsed has no parse.
+    """
+    from spacy.tokens import DocBin
+    from .long_document import LongTextAnalyzer
+    from .nlp import TextAnalyzer, language_gate, nlp, resolve_fields, _build_analysis
+
+    fields = resolve_fields(fields)
+    skipped = language_gate(text)
+    if skipped is not None:
+        return skipped, None
+    doc_bin = DocBin(attrs=STORED_ATTRS)
+    if len(text) <= chunk_size:
+        analyzer = TextAnalyzer(text)
+        result = _build_analysis(analyzer, fields)
+        doc_bin.add(analyzer.doc)
+    else:
+        analyzer = LongTextAnalyzer(text, chunk_size=chunk_size, doc_bin=doc_bin)
+        result = _build_analysis(analyzer, fields)
+    return result, SerializedParse(model_name(nlp), doc_bin.to_bytes())
+
+
+def restore_docs(data: bytes, fields: Optional[List[str]] = None) -> List:
+    """
+    The Docs of a serialized parse, ready for the requested analysis components.
+
+    The sentiment component (which only reads tokens) runs again, so lexicon
+    changes apply to stored parses. Key phrase coherence reads doc.tensor,
+    which DocBin does not keep, so tok2vec runs again when key phrases are
+    requested; the tagger, parser and NER never do.
+    """
+    from spacy.tokens import DocBin
+    from .nlp import nlp, resolve_fields, SENTIMENT_BACKEND
+    from .sentiment import COMPONENT_NAME as SENTIMENT_COMPONENT
+
+    fields = resolve_fields(fields)
+    docs = list(DocBin().from_bytes(data).get_docs(nlp.vocab))
+    if "key_phrases" in fields and "tok2vec" in nlp.pipe_names:
+        docs = list(nlp.get_pipe("tok2vec").pipe(docs))
+    if "sentiment" in fields and SENTIMENT_BACKEND == "spacy":
+        sentiment = nlp.get_pipe(SENTIMENT_COMPONENT)
+        docs = [sentiment(doc) for doc in docs]
+    return docs
+
+
+def rebuild_analyzer(text: str, data: bytes, chunk_size: int, fields: Optional[List[str]] = None):
+    """A TextAnalyzer over the stored parse (data, chunk_size) of text, without parsing it again."""
+    from .long_document import LongTextAnalyzer
+    from .nlp import TextAnalyzer, resolve_fields
+
+    fields = resolve_fields(fields)
+    text = normalize_text(text)
+    docs = restore_docs(data, fields)
+    if len(docs) == 1 and docs[0].text == text:
+        return TextAnalyzer(text, doc=docs[0], fields=fields)
+    return LongTextAnalyzer(text, fields=fields, chunk_size=chunk_size, docs=docs)
+
+
+def analyze_stored(text: str, data: bytes, chunk_size: int, fields: Optional[List[str]] = None) -> Dict:
+    """analyze_long_text from the stored parse of text (see get_current_parse) instead of parsing it."""
+    from .nlp import language_gate, resolve_fields, _build_analysis
+
+    fields = resolve_fields(fields)
+    skipped = language_gate(text)
+    if skipped is not None:
+        return skipped
+    return _build_analysis(rebuild_analyzer(text, data, chunk_size, fields), fields)
+
+
+def get_parse(db: Session, text: str) -> Optional[models.DocumentParse]:
+    return db.query(models.DocumentParse).filter(models.DocumentParse.text_hash == parse_key(text)).first()
+
+
+def get_current_parse(db: Session, text: str) -> Optional[models.DocumentParse]:
+    """The stored parse of text if the loaded model produced it."""
+    from .nlp import nlp
+
+    stored = get_parse(db, text)
+    return stored if stored is not None and stored.model == model_name(nlp) else None
+
+
+def has_parse(db: Session, text: str) -> bool:
+    query = db.query(models.DocumentParse.text_hash).filter(models.DocumentParse.text_hash == parse_key(text))
+    return query.first() is not None
+
+
+def save_parse(db: Session, text: str, parse: SerializedParse, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Store the parse of text unless another request stored it first."""
+    db.add(models.DocumentParse(
+        text_hash=parse_key(text), model=parse.model, chunk_size=chunk_size, data=parse.data
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+
+
+def delete_orphaned_parse(text_hash: Optional[str]) -> List:
+    """Statements deleting the stored parse of text_hash once no analysis has that text (run after deleting one)."""
+    if text_hash is None:
+        return []
+    referenced = exists().where(models.TextAnalysis.text_hash == text_hash)
+    return [delete(models.DocumentParse).where(models.DocumentParse.text_hash == text_hash, ~referenced)]
+
+
+def fill_text_hashes(db: Session, batch_size: int = 500) -> int:
+    """Set text_hash on analyses stored before it had a column. Returns how many were set."""
+    table = models.TextAnalysis.__table__
+    filled = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(table.c.id, table.c.text)
+            .where(table.c.id > last_id, table.c.text_hash.is_(None), table.c.text.is_not(None))
+            .order_by(table.c.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return filled
+        last_id = rows[-1].id
+        for row in rows:
+            db.execute(update(table).where(table.c.id == row.id).values(text_hash=parse_key(row.text)))
+        db.commit()
+        filled += len(rows)
+
+
+def prune(db: Session, batch_size: int = 500) -> int:
+    """Delete stored parses no analysis refers to any more. Returns how many were deleted."""
+    fill_text_hashes(db, batch_size)
+    referenced = exists().where(models.TextAnalysis.text_hash == models.DocumentParse.text_hash)
+    deleted = db.execute(delete(models.DocumentParse).where(~referenced)).rowcount
+    db.commit()
+    return deleted
+
+
+def backfill(db: Session, chunk_size: int = DEFAULT_CHUNK_SIZE, batch_size: int = 50) -> int:
+    """Parse and store the text of every analysis that has no stored parse yet. Returns how many were stored."""
+    stored = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(models.TextAnalysis.id, models.TextAnalysis.text)
+            .filter(models.TextAnalysis.id > last_id)
+            .order_by(models.TextAnalysis.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not rows:
+            return stored
+        last_id = rows[-1].id
+        for row in rows:
+            text = normalize_text(row.text or "")
+            if text and not has_parse(db, text):
+                save_parse(db, text, serialize_parse(text, chunk_size), chunk_size)
+                stored += 1
+        print(f"Checked analyses up to id {last_id}, {stored} parses stored", file=sys.stderr, flush=True)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Manage the stored spaCy parses of analyzed texts')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    backfill_parser = subcommands.add_parser('backfill', help='Store parses for analyses that have none')
+    backfill_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                                 help='Longer texts are stored as chunks of this many characters')
+    backfill_parser.add_argument('--batch-size', type=int, default=50, help='Analyses read from the database at once')
+    subcommands.add_parser('prune', help='Delete parses of texts no analysis has any more')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING'))
+    from .database import SessionLocal, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if args.command == 'backfill':
+            stored = backfill(db, args.chunk_size, args.batch_size)
+            print(f"Stored {stored} parses", file=sys.stderr)
+        else:
+            deleted = prune(db)
+            print(f"Deleted {deleted} parses", file=sys.stderr)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, insert, select, text, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindError(RuntimeError):
+    """Raised by sync() for analyses of the user that could not be stored after their ids were returned."""
+
+
+class IdAllocator:
+    """
+    Hands out analysis ids before the analyses are inserted.
+
+    Ids are reserved in the database a block at a time, so they never collide
+    with ids reserved by other processes (e.g. other uvicorn workers): on
+    PostgreSQL from the table's sequence, on SQLite by moving the counter in
+    analysis_id_reservations past both its last block and the largest stored id.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], block_size: int = 100):
+        self.session_factory = session_factory
+        self.block_size = block_size
+        self._ids: List[int] = []
+        self._lock = asyncio.Lock()
+
+    async def next_id(self) -> int:
+        async with self._lock:
+            if not self._ids:
+                self._ids = await self._reserve()
+            return self._ids.pop(0)
+
+    async def _reserve(self) -> List[int]:
+        async with self.session_factory() as db:
+            if db.bind.dialect.name == "postgresql":
+                result = await db.execute(
+                    text("SELECT nextval(pg_get_serial_sequence('text_analyses', 'id')) FROM generate_series(1, :n)"),
+                    {"n": self.block_size},
+                )
+                return sorted(result.scalars().all())
+            reservation = models.AnalysisIdReservation
+            await db.execute(insert(reservation).prefix_with("OR IGNORE").values(id=1, last_id=0))
+            # The UPDATE takes SQLite's write lock, held until the commit, so
+            # no other process reserves between it and the SELECT
+            largest_id = select(func.coalesce(func.max(models.TextAnalysis.id), 0)).scalar_subquery()
+            await db.execute(
+                update(reservation).where(reservation.id == 1)
+                .values(last_id=func.max(reservation.last_id, largest_id) + self.block_size)
+            )
+            last_id = (await db.execute(select(reservation.last_id).where(reservation.id == 1))).scalar_one()
+            await db.commit()
+        return list(range(last_id - self.block_size + 1, last_id + 1))
+
+
+class WriteBehindPersister:
+    """
+    Stores new analyses in the background, in batches, after their request
+    has been answered.
+
+    add() gives an analysis its id and creation time and buffers it; a
+    background task inserts the buffer with multi-row INSERTs in one
+    transaction (one commit, and so one fsync, per batch) once it holds
+    ``batch_size`` analyses or its oldest has waited ``max_delay`` seconds.
+    A crash therefore loses at most the analyses of the last ``max_delay``
+    seconds (plus the batch being written). At most ``queue_size`` analyses
+    are buffered or being written; add() waits for room beyond that.
+
+    Reads see a user's own analyses once sync() has returned, which writes
+    the buffer without waiting for the delay if it holds any of theirs.
+    close() writes everything left. A batch that fails is retried one
+    analysis at a time, so one bad row does not lose the rest. Analyses
+    that still fail had their ids returned already: they are logged, counted
+    in stats() and reported to their user by the next sync(), which raises
+    WriteBehindError.
+    """
+
+    def __init__(self, session_factory: Callable[[], AsyncSession], enabled: bool = False, batch_size: int = 100,
+                 max_delay: float = 0.2, queue_size: int = 1000):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.max_delay = max_delay
+        self.queue_size = queue_size
+        self.ids = IdAllocator(session_factory)
+        self._buffer: List[Tuple[float, models.TextAnalysis]] = []
+        self._pending_users: Counter = Counter()
+        self._lost: Dict[int, List[int]] = {}  # user id -> ids of analyses that could not be stored
+        self._lost_count = 0
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._urgent = False
+
+    @classmethod
+    def from_env(cls, session_factory: Callable[[], AsyncSession]) -> "WriteBehindPersister":
+        return cls(
+            session_factory,
+            enabled=os.getenv("WRITE_BEHIND", "false").lower() in ("1", "true", "yes"),
+            batch_size=int(os.getenv("WRITE_BEHIND_BATCH_SIZE", 100)),
+            max_delay=float(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", 200)) / 1000,
+            queue_size=int(os.getenv("WRITE_BEHIND_QUEUE_SIZE", 1000)),
+        )
+
+    def start(self):
+        """Start the writer task on the running event loop. Called from the application startup hook."""
+        if not self.enabled or self._task is not None:
+            return
+        self._closing = False
+        self._wakeup = asyncio.Event()
+        self._written = asyncio.Condition()
+        self._space = asyncio.Semaphore(self.queue_size)
+        self.ids = IdAllocator(self.session_factory, self.ids.block_size)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"Write-behind persister started (batches of {self.batch_size}, "
+                    f"at most {self.max_delay * 1000:.0f}ms delay)")
+
+    async def close(self):
+        """Write every buffered analysis and stop the writer task."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        logger.info("Write-behind persister stopped")
+
+    @property
+    def pending(self) -> int:
+        """Number of analyses buffered or being written."""
+        return sum(self._pending_users.values())
+
+    async def assign_ids(self, analyses: Iterable[models.TextAnalysis]):
+        """Give analyses inserted directly ids from the allocator, so they cannot take one already handed out."""
+        self.start()
+        for analysis in analyses:
+            analysis.id = await self.ids.next_id()
+
+    async def add(self, analysis: models.TextAnalysis) -> models.TextAnalysis:
+        """Buffer a new analysis for writing, returning it with its id and creation time set."""
+        self.start()
+        await self._space.acquire()
+        try:
+            analysis.id = await self.ids.next_id()
+        except Exception:
+            self._space.release()
+            raise
+        if analysis.created_at is None:
+            analysis.created_at = datetime.utcnow()
+        loop = asyncio.get_running_loop()
+        self._buffer.append((loop.time(), analysis))
+        self._pending_users[analysis.user_id] += 1
+        if len(self._buffer) == 1 or len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return analysis
+
+    def stats(self) -> Dict:
+        return {"enabled": self.enabled, "pending": self.pending, "lost": self._lost_count}
+
+    async def sync(self, user_id: int):
+        """
+        Wait until the user's buffered analyses are written. Raises
+        WriteBehindError, once, if any of them could not be stored.
+        """
+        if self._pending_users.get(user_id):
+            self._urgent = True
+            self._wakeup.set()
+            async with self._written:
+                await self._written.wait_for(lambda: not self._pending_users.get(user_id))
+        lost = self._lost.pop(user_id, None)
+        if lost:
+            raise WriteBehindError(f"Analyses {', '.join(str(analysis_id) for analysis_id in lost)} could not be stored")
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._buffer or not self._closing:
+            if not self._buffer:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            delay = self._buffer[0][0] + self.max_delay - loop.time()
+            if len(self._buffer) < self.batch_size and delay > 0 and not (self._urgent or self._closing):
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            batch = [analysis for _, analysis in self._buffer[:self.batch_size]]
+            del self._buffer[:self.batch_size]
+            if not self._buffer:
+                self._urgent = False
+            try:
+                await self._write(batch)
+            finally:
+                for analysis in batch:
+                    self._pending_users[analysis.user_id] -= 1
+                    if not self._pending_users[analysis.user_id]:
+                        del self._pending_users[analysis.user_id]
+                    self._space.release()
+                async with self._written:
+                    self._written.notify_all()
+
+    async def _write(self, batch: List[models.TextAnalysis]):
+        try:
+            await self._insert(batch)
+            return
+        except Exception as e:
+            logger.warning(f"Write-behind batch of {len(batch)} analyses failed, retrying one at a time: {e}")
+        for analysis in batch:
+            try:
+                await self._insert([analysis])
+            except Exception as e:
+                logger.error(f"Write-behind lost analysis {analysis.id} of user {analysis.user_id}: {e}")
+                self._lost.setdefault(analysis.user_id, []).append(analysis.id)
+                self._lost_count += 1
+
+    async def _insert(self, analyses: List[models.TextAnalysis]):
+        """Insert analyses and their term rows with one multi-row INSERT per table, in one transaction."""
+        statements = [
+            (models.TextAnalysis, [column_values(analysis) for analysis in analyses]),
+            (models.AnalysisKeyPhrase, [column_values(term, analysis_id=analysis.id)
+                                        for analysis in analyses for term in analysis.key_phrase_terms]),
+            (models.AnalysisEntity, [column_values(term, analysis_id=analysis.id)
+                                     for analysis in analyses for term in analysis.entity_terms]),
+        ]
+        async with self.session_factory() as db:
+            for model, rows in statements:
+                if rows:
+                    await db.execute(insert(model), rows)
+            await db.commit()
+
+
+def column_values(instance: models.Base, **values) -> Dict:
+    """Column values of a new ORM instance as an INSERT row, leaving out a primary key not assigned yet."""
+    for column in instance.__table__.columns:
+        if column.key not in values and not (column.primary_key and getattr(instance, column.key) is None):
+            values[column.key] = getattr(instance, column.key)
+    return values
@@ -1,7 +1,9 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, field_validator
 from typing import Optional, List, Dict, Union, Any
 from datetime import datetime
 
+from .search import highlight
+
 class UserBase(BaseModel):
     email: EmailStr
     username: str
@@ -29,7 +31,8 @@ class TextAnalysisBase(BaseModel):
     text: str
 
 class TextAnalysisCreate(TextAnalysisBase):
-    pass
+    # Analysis components to compute; None computes all of them
+    fields: Optional[List[str]] = None
 
 class SentimentAnalysis(BaseModel):
     sentiment: str
@@ -52,7 +55,7 @@ class KeyPhrase(BaseModel):
 
 class LanguageInfo(BaseModel):
     language_code: str
-    language_confidence: str
+    language_confidence: float
     is_english: Optional[bool]
 
 class ContentCategory(BaseModel):
@@ -65,37 +68,98 @@ class TextAnalysis(TextAnalysisBase):
     created_at: datetime
     user_id: int
 
+    # Analysis fields are None for components that were not requested
     # Sentiment Analysis
-    sentiment: str
-    polarity: float
-    subjectivity: float
-    sentiment_confidence: float
-    tone: str
-    professional_metrics: Dict[str, Any]
+    sentiment: Optional[str] = None
+    polarity: Optional[float] = None
+    subjectivity: Optional[float] = None
+    sentiment_confidence: Optional[float] = None
+    tone: Optional[str] = None
+    professional_metrics: Optional[Dict[str, Any]] = None
 
     # Readability Metrics
-    flesch_score: float
-    avg_sentence_length: float
-    word_count: int
-    sentence_count: int
-    syllable_count: int
-    difficulty_level: str
-    professional_scores: Dict[str, float]
-    writing_improvements: List[str]
+    flesch_score: Optional[float] = None
+    avg_sentence_length: Optional[float] = None
+    word_count: Optional[int] = None
+    sentence_count: Optional[int] = None
+    syllable_count: Optional[int] = None
+    difficulty_level: Optional[str] = None
+    professional_scores: Optional[Dict[str, float]] = None
+    writing_improvements: Optional[List[str]] = None
 
     # Key Phrases and Entities
-    key_phrases: List[Dict[str, Any]]
-    named_entities: Dict[str, List[str]]
+    key_phrases: Optional[List[Dict[str, Any]]] = None
+    named_entities: Optional[Dict[str, List[str]]] = None
 
     # Language and Category
-    language_code: str
-    language_confidence: str
-    content_category: str
-    category_confidence: float
-    category_distribution: Dict[str, float]
+    language_code: Optional[str] = None
+    language_confidence: Optional[float] = None
+    content_category: Optional[str] = None
+    category_confidence: Optional[float] = None
+    category_distribution: Optional[Dict[str, float]] = None
 
     # Summary
-    summary: str
+    summary: Optional[str] = None
+
+    @field_validator("language_confidence", mode="before")
+    @classmethod
+    def numeric_language_confidence(cls, value):
+        # Analyses stored before 1.4.0 hold "high", "medium" or "low" instead of a probability
+        try:
+            return None if value is None else float(value)
+        except (TypeError, ValueError):
+            return None
+
+    class Config:
+        orm_mode = True
+
+# An analysis as listed in the history, without its text or detailed results
+class TextAnalysisListItem(BaseModel):
+    id: int
+    title: str
+    created_at: datetime
+    excerpt: Optional[str] = None  # start of the text
+    sentiment: Optional[str] = None
+    polarity: Optional[float] = None
+    word_count: Optional[int] = None
+    flesch_score: Optional[float] = None
+    difficulty_level: Optional[str] = None
+    content_category: Optional[str] = None
+    key_phrase_count: Optional[int] = None
+
+    class Config:
+        orm_mode = True
+
+# An analysis found by a search, with the matches in its text highlighted
+class SearchResult(TextAnalysisListItem):
+    snippet: Optional[str] = None  # HTML, matched words in <mark> tags
+    rank: Optional[float] = None  # higher is more relevant, within one search
+
+    @field_validator("snippet", mode="before")
+    @classmethod
+    def highlighted_snippet(cls, value):
+        return highlight(value)
+
+# Key phrase or entity across a user's analyses (see terms)
+class PhraseCount(BaseModel):
+    phrase: str
+    normalized: str
+    analyses: int  # analyses it was extracted from
+    score: Optional[float] = None  # summed relevance score
+
+    class Config:
+        orm_mode = True
+
+class EntityCount(BaseModel):
+    label: str
+    text: str
+    normalized: str
+    analyses: int
+
     class Config:
         orm_mode = True
 
+class BatchAnalysisResult(BaseModel):
+    index: int
+    analysis: Optional[TextAnalysis] = None
+    error: Optional[str] = None
@@ -0,0 +1,146 @@
+import html
+import re
+from typing import List, Optional
+
+from sqlalchemy import func, literal_column, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import with_expression
+from sqlalchemy.sql import Select, column, table
+
+from . import models
+from .compression import SQLITE_TEXT_FUNCTION
+from .listing import list_options
+
+# Around the matched words of a snippet; replaced by <mark> tags once the
+# rest of the snippet is HTML-escaped (see highlight)
+MARK_START = "\x02"
+MARK_END = "\x03"
+SNIPPET_WORDS = 24
+
+# SQLite: an FTS5 index of the title, text and summary of analyses. It reads
+# them from text_analyses (external content) rather than storing them again,
+# through a view giving the text decompressed, and triggers keep it in step
+# with inserts, updates and deletes.
+SQLITE_FTS_TABLE = "analyses_fts"
+SQLITE_FTS_CONTENT = "analyses_fts_content"
+SQLITE_DDL = [
+    f"""CREATE VIEW {SQLITE_FTS_CONTENT} AS
+        SELECT id, title, {SQLITE_TEXT_FUNCTION}(text) AS text, summary FROM text_analyses""",
+    f"""CREATE VIRTUAL TABLE {SQLITE_FTS_TABLE} USING fts5(
+        title, text, summary, content='{SQLITE_FTS_CONTENT}', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    f"""CREATE TRIGGER text_analyses_fts_insert AFTER INSERT ON text_analyses BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, text, summary)
+        VALUES (new.id, new.title, {SQLITE_TEXT_FUNCTION}(new.text), new.summary);
+    END""",
+    f"""CREATE TRIGGER text_analyses_fts_delete AFTER DELETE ON text_analyses BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, text, summary)
+        VALUES ('delete', old.id, old.title, {SQLITE_TEXT_FUNCTION}(old.text), old.summary);
+    END""",
+    # Not when only the stored form of the text changes (compression rewrites it)
+    f"""CREATE TRIGGER text_analyses_fts_update AFTER UPDATE OF title, text, summary ON text_analyses
+    WHEN old.title IS NOT new.title OR old.summary IS NOT new.summary
+        OR {SQLITE_TEXT_FUNCTION}(old.text) IS NOT {SQLITE_TEXT_FUNCTION}(new.text) BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, title, text, summary)
+        VALUES ('delete', old.id, old.title, {SQLITE_TEXT_FUNCTION}(old.text), old.summary);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, title, text, summary)
+        VALUES (new.id, new.title, {SQLITE_TEXT_FUNCTION}(new.text), new.summary);
+    END""",
+]
+# Objects of an index created before texts were compressed, which read them directly
+SQLITE_OLD_DDL = [
+    "DROP TRIGGER IF EXISTS text_analyses_fts_insert",
+    "DROP TRIGGER IF EXISTS text_analyses_fts_delete",
+    "DROP TRIGGER IF EXISTS text_analyses_fts_update",
+    f"DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}",
+    f"DROP VIEW IF EXISTS {SQLITE_FTS_CONTENT}",
+]
+# bm25 weights of the title, text and summary columns
+SQLITE_WEIGHTS = (10.0, 1.0, 4.0)
+
+# PostgreSQL: a GIN index on the weighted tsvector of each analysis. Being an
+# expression index it is maintained by every write; queries must use the
+# expression exactly as written here for the planner to pick the index.
+POSTGRESQL_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(summary, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(\"text\", '')), 'C')"
+)
+POSTGRESQL_INDEX = "ix_text_analyses_search"
+POSTGRESQL_HEADLINE = (
+    f"StartSel={MARK_START}, StopSel={MARK_END}, MaxWords={SNIPPET_WORDS}, MinWords={SNIPPET_WORDS // 2}, "
+    "MaxFragments=2, FragmentDelimiter=\" … \""
+)
+
+
+def create_search_index(connection: Connection):
+    """
+    Create the full-text index of analyses if missing (or, on SQLite, made
+    before texts were compressed), indexing those already stored.
+    """
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        definition = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SQLITE_FTS_TABLE}
+        ).scalar()
+        if definition is not None and SQLITE_FTS_CONTENT in definition:
+            return
+        for statement in SQLITE_OLD_DDL + SQLITE_DDL:
+            connection.execute(text(statement))
+        connection.execute(text(f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')"))
+    elif dialect == "postgresql":
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS {POSTGRESQL_INDEX} ON text_analyses USING GIN (({POSTGRESQL_VECTOR}))"
+        ))
+    else:
+        raise RuntimeError(f"No full-text search for {dialect} databases")
+
+
+def search_words(q: str) -> List[str]:
+    """Words of a search; an analysis matches when it has all of them (in any form the stemmer reduces alike)."""
+    return re.findall(r"\w+", q)
+
+
+def search_query(dialect: str, user_id: int, q: str) -> Select:
+    """
+    The user's analyses matching a search, most relevant first, loaded as
+    list items with a snippet around the matches and a rank (higher is more
+    relevant, comparable within one search only). Raises ValueError for a
+    search without words.
+    """
+    words = search_words(q)
+    if not words:
+        raise ValueError("Search has no words")
+    if dialect == "sqlite":
+        fts = literal_column(SQLITE_FTS_TABLE)
+        rank = -func.bm25(fts, *SQLITE_WEIGHTS)
+        snippet = func.snippet(fts, -1, MARK_START, MARK_END, "…", SNIPPET_WORDS)
+        # Each word quoted, so FTS5 query syntax in a search is taken literally
+        fts_table = table(SQLITE_FTS_TABLE, column("rowid"))
+        query = select(models.TextAnalysis).join(fts_table, fts_table.c.rowid == models.TextAnalysis.id).where(
+            fts.match(" ".join(f'"{word}"' for word in words))
+        )
+    elif dialect == "postgresql":
+        vector = literal_column(POSTGRESQL_VECTOR)
+        tsquery = func.plainto_tsquery(literal_column("'english'"), " ".join(words))
+        rank = func.ts_rank_cd(vector, tsquery, 32)
+        snippet = func.ts_headline(literal_column("'english'"), models.TextAnalysis.text, tsquery, POSTGRESQL_HEADLINE)
+        query = select(models.TextAnalysis).where(vector.op("@@")(tsquery))
+    else:
+        raise RuntimeError(f"No full-text search for {dialect} databases")
+    return (
+        query.options(
+            *list_options(),
+            with_expression(models.TextAnalysis.snippet, snippet),
+            with_expression(models.TextAnalysis.rank, rank),
+        )
+        .where(models.TextAnalysis.user_id == user_id)
+        .order_by(rank.desc(), models.TextAnalysis.id.desc())
+    )
+
+
+def highlight(snippet: Optional[str]) -> Optional[str]:
+    """A snippet as HTML: escaped, with the matched words in <mark> tags."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>")
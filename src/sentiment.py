@@ -0,0 +1,56 @@
+from typing import List
+
+from spacy.language import Language
+from spacy.tokens import Doc
+from textblob.en import sentiment as pattern_sentiment
+
+COMPONENT_NAME = "textscope_sentiment"
+
+Doc.set_extension("polarity", default=None, force=True)
+Doc.set_extension("subjectivity", default=None, force=True)
+# Number of scored expressions polarity and subjectivity average over
+Doc.set_extension("sentiment_assessments", default=None, force=True)
+
+
+def get_noun_phrases(doc: Doc) -> List[str]:
+    """
+    Lowercased noun phrases from doc.noun_chunks, shaped like TextBlob's noun_phrases.
+
+    Leading determiners and pronouns are dropped ("the new platform" -> "new platform").
+    Requires a dependency parse.
+    """
+    phrases = []
+    for chunk in doc.noun_chunks:
+        tokens = [token for token in chunk if not token.is_space and not token.is_punct]
+        while tokens and tokens[0].pos_ in ("DET", "PRON"):
+            tokens = tokens[1:]
+        if tokens:
+            phrases.append(" ".join(token.lower_ for token in tokens))
+    return phrases
+
+
+Doc.set_extension("noun_phrases", getter=get_noun_phrases, force=True)
+
+
+class SentimentComponent:
+    """
+    Scores polarity and subjectivity with TextBlob's pattern lexicon, using spaCy's tokens.
+
+    This is the same lexicon and scoring TextBlob's default PatternAnalyzer
+    applies (negations, intensifiers, exclamations, emoticons), but it reuses
+    the Doc's tokenization instead of tokenizing the text a second time.
+    Needs only the tokenizer, so it can run with every other component disabled.
+    """
+
+    def __call__(self, doc: Doc) -> Doc:
+        words = [token.lower_ for token in doc if not token.is_space]
+        score = pattern_sentiment(words)
+        doc._.polarity = score[0]
+        doc._.subjectivity = score[1]
+        doc._.sentiment_assessments = len(score.assessments)
+        return doc
+
+
+@Language.factory(COMPONENT_NAME)
+def create_sentiment_component(nlp: Language, name: str) -> SentimentComponent:
+    return SentimentComponent()
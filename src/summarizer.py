@@ -0,0 +1,132 @@
+from typing import TYPE_CHECKING, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .nlp import SentenceStatistics
+
+SUMMARY_METHODS = ("frequency", "textrank")
+
+# TextRank damping factor and convergence threshold (L1 change of the scores)
+DAMPING = 0.85
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 100
+
+
+class LemmaMatrix(NamedTuple):
+    """Sparse sentence-by-lemma count matrix in coordinate form (one entry per sentence and lemma)."""
+    rows: np.ndarray     # sentence index of each entry
+    cols: np.ndarray     # lemma id of each entry
+    counts: np.ndarray   # occurrences of the lemma in the sentence
+    lengths: np.ndarray  # content lemmas per sentence
+    n_lemmas: int
+
+
+def lemma_matrix(sentences: Sequence["SentenceStatistics"]) -> LemmaMatrix:
+    lengths = np.fromiter((len(sent.content_lemmas) for sent in sentences), dtype=np.int64, count=len(sentences))
+    lemma_ids = {}
+    token_cols = np.fromiter(
+        (lemma_ids.setdefault(lemma, len(lemma_ids)) for sent in sentences for lemma in sent.content_lemmas),
+        dtype=np.int64, count=int(lengths.sum()),
+    )
+    token_rows = np.repeat(np.arange(len(sentences)), lengths)
+    n_lemmas = len(lemma_ids)
+    # Merge repeated lemmas within a sentence into one entry
+    keys, counts = np.unique(token_rows * n_lemmas + token_cols, return_counts=True)
+    return LemmaMatrix(keys // max(n_lemmas, 1), keys % max(n_lemmas, 1), counts, lengths, n_lemmas)
+
+
+def frequency_scores(matrix: LemmaMatrix) -> np.ndarray:
+    """
+    Average document frequency of a sentence's content lemmas (60%), with a
+    bonus for early sentences (30%) and for 5 to 25 content words (10%).
+    Sentences without content words score -inf.
+    """
+    n = len(matrix.lengths)
+    lemma_freq = np.bincount(matrix.cols, weights=matrix.counts, minlength=matrix.n_lemmas)
+    freq_sum = np.bincount(matrix.rows, weights=matrix.counts * lemma_freq[matrix.cols], minlength=n)
+    has_words = matrix.lengths > 0
+    freq_score = np.divide(freq_sum, matrix.lengths, out=np.zeros(n), where=has_words)
+    pos_score = 1.0 / (1 + np.arange(n))
+    length_score = np.where((matrix.lengths >= 5) & (matrix.lengths <= 25), 1.0, 0.5)
+    scores = freq_score * 0.6 + pos_score * 0.3 + length_score * 0.1
+    return np.where(has_words, scores, -np.inf)
+
+
+def textrank_scores(matrix: LemmaMatrix) -> np.ndarray:
+    """
+    Centrality of each sentence in the graph of TF-IDF cosine similarities between sentences (LexRank).
+
+    The similarity matrix W = X X^T - I is never built: every power iteration
+    multiplies by X and X^T, so an iteration costs O(entries of X) instead of
+    O(sentences^2). Sentences without content words score -inf.
+    """
+    n = len(matrix.lengths)
+    has_words = matrix.lengths > 0
+    if not has_words.any():
+        return np.full(n, -np.inf)
+
+    document_freq = np.bincount(matrix.cols, minlength=matrix.n_lemmas)
+    idf = np.log((1 + n) / (1 + document_freq)) + 1
+    weights = matrix.counts * idf[matrix.cols]
+    norms = np.sqrt(np.bincount(matrix.rows, weights=weights ** 2, minlength=n))
+    weights = weights / norms[matrix.rows]
+    self_similarity = has_words.astype(float)
+
+    def similarity_times(vector):
+        lemma_totals = np.bincount(matrix.cols, weights=weights * vector[matrix.rows], minlength=matrix.n_lemmas)
+        return np.bincount(matrix.rows, weights=weights * lemma_totals[matrix.cols], minlength=n) \
+            - self_similarity * vector
+
+    degree = similarity_times(np.ones(n))
+    connected = degree > 1e-12
+    scores = np.full(n, 1.0 / n)
+    for _ in range(MAX_ITERATIONS):
+        # Sentences similar to no other sentence spread their score evenly
+        dangling = scores[~connected].sum()
+        spread = similarity_times(np.divide(scores, degree, out=np.zeros(n), where=connected))
+        updated = (1 - DAMPING) / n + DAMPING * (spread + dangling / n)
+        converged = np.abs(updated - scores).sum() < TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return np.where(has_words, scores, -np.inf)
+
+
+def summary_length(n_sentences: int, num_sentences: Optional[int] = None, ratio: Optional[float] = None) -> int:
+    """Number of sentences to pick: num_sentences, or ratio of the sentences (at least one)."""
+    if ratio is not None:
+        if not 0 < ratio <= 1:
+            raise ValueError("ratio must be in (0, 1]")
+        return max(1, round(n_sentences * ratio))
+    if num_sentences is None or num_sentences < 1:
+        raise ValueError("num_sentences must be at least 1")
+    return num_sentences
+
+
+def summarize(sentences: Sequence["SentenceStatistics"], num_sentences: Optional[int] = 3,
+              ratio: Optional[float] = None, method: str = "frequency") -> List[int]:
+    """
+    Indices of the summary sentences, in document order.
+
+    Picks the highest-scoring sentences (ties go to the earlier one); a
+    sentence whose text repeats one already picked is skipped, so the summary
+    never contains the same sentence twice.
+    """
+    if method not in SUMMARY_METHODS:
+        raise ValueError(f"Unknown summary method '{method}', expected one of {SUMMARY_METHODS}")
+    if not sentences:
+        return []
+    wanted = summary_length(len(sentences), num_sentences, ratio)
+    matrix = lemma_matrix(sentences)
+    scores = frequency_scores(matrix) if method == "frequency" else textrank_scores(matrix)
+
+    chosen = []
+    seen = set()
+    for index in np.lexsort((np.arange(len(scores)), -scores)).tolist():
+        if len(chosen) == wanted or scores[index] == -np.inf:
+            break
+        if sentences[index].text not in seen:
+            seen.add(sentences[index].text)
+            chosen.append(index)
+    return sorted(chosen)
@@ -0,0 +1,32 @@
+from functools import lru_cache
+
+VOWELS = 'aeiouy'
+
+# Distinct lowercase words remembered by count_syllables_lower, shared by every analysis in the process
+SYLLABLE_CACHE_SIZE = 65536
+
+
+@lru_cache(maxsize=SYLLABLE_CACHE_SIZE)
+def count_syllables_lower(word: str) -> int:
+    """
+    Estimate the syllables of an already lowercased word.
+
+    Counts groups of consecutive vowels, less one for a silent final "e",
+    and at least one per word.
+    """
+    count = 0
+    if word[0] in VOWELS:
+        count += 1
+    for index in range(1, len(word)):
+        if word[index] in VOWELS and word[index - 1] not in VOWELS:
+            count += 1
+    if word.endswith('e'):
+        count -= 1
+    if count == 0:
+        count += 1
+    return count
+
+
+def count_syllables(word: str) -> int:
+    return count_syllables_lower(word.lower())
+
@@ -0,0 +1,173 @@
+import argparse
+import logging
+import os
+import re
+import sys
+import unicodedata
+from typing import Dict, List, Optional
+
+from sqlalchemy import Select, delete, distinct, func, insert, select, union
+from sqlalchemy.orm import Session
+
+from . import models
+from .listing import keyset_order
+
+logger = logging.getLogger(__name__)
+
+LEADING_ARTICLE = re.compile(r"^(?:the|a|an)\s+")
+EDGE_PUNCTUATION = " \t\n\"'`.,;:!?()[]{}"
+
+
+def normalize_term(text: str) -> str:
+    """Form key phrases and entities are grouped and looked up by: casefolded, single-spaced, without a leading article."""
+    text = " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+    return LEADING_ARTICLE.sub("", text.strip(EDGE_PUNCTUATION)).strip(EDGE_PUNCTUATION)
+
+
+def key_phrase_rows(key_phrases: Optional[List[Dict]]) -> List[Dict]:
+    """Rows of analysis_key_phrases for the key_phrases result of an analysis."""
+    rows = []
+    for item in key_phrases or []:
+        phrase = item.get("phrase") if isinstance(item, dict) else None
+        if phrase and normalize_term(phrase):
+            rows.append({"phrase": phrase, "normalized": normalize_term(phrase), "score": item.get("relevance_score")})
+    return rows
+
+
+def entity_rows(named_entities: Optional[Dict[str, List[str]]]) -> List[Dict]:
+    """Rows of analysis_entities for the named_entities result of an analysis."""
+    rows = []
+    for label, texts in (named_entities or {}).items():
+        for text in texts or []:
+            if isinstance(text, str) and normalize_term(text):
+                rows.append({"label": label, "text": text, "normalized": normalize_term(text)})
+    return rows
+
+
+def attach_terms(analysis: models.TextAnalysis):
+    """Add the key phrase and entity rows of a new analysis, written when it is flushed."""
+    analysis.key_phrase_terms = [models.AnalysisKeyPhrase(**row) for row in key_phrase_rows(analysis.key_phrases)]
+    analysis.entity_terms = [models.AnalysisEntity(**row) for row in entity_rows(analysis.named_entities)]
+
+
+def delete_terms(analysis_id: int) -> List:
+    """Statements deleting the key phrase and entity rows of an analysis (SQLite does not enforce ON DELETE)."""
+    return [
+        delete(models.AnalysisKeyPhrase).where(models.AnalysisKeyPhrase.analysis_id == analysis_id),
+        delete(models.AnalysisEntity).where(models.AnalysisEntity.analysis_id == analysis_id),
+    ]
+
+
+def user_analysis_ids(user_id: int, last: Optional[int] = None) -> Select:
+    """Ids of a user's analyses, only the last (most recent) ones if given."""
+    query = select(models.TextAnalysis.id).where(models.TextAnalysis.user_id == user_id)
+    if last is not None:
+        query = query.order_by(*keyset_order("created_at", "desc")).limit(last)
+    return query
+
+
+def top_phrases(user_id: int, last: Optional[int] = None, limit: int = 20) -> Select:
+    """
+    Key phrases in the most of a user's analyses, with the number of analyses
+    and their summed relevance score, grouped by normalized form.
+    """
+    phrases = models.AnalysisKeyPhrase
+    analyses = func.count(distinct(phrases.analysis_id)).label("analyses")
+    score = func.sum(phrases.score).label("score")
+    return (
+        select(func.min(phrases.phrase).label("phrase"), phrases.normalized, analyses, score)
+        .where(phrases.analysis_id.in_(user_analysis_ids(user_id, last)))
+        .group_by(phrases.normalized)
+        .order_by(analyses.desc(), score.desc(), phrases.normalized)
+        .limit(limit)
+    )
+
+
+def top_entities(user_id: int, label: Optional[str] = None, last: Optional[int] = None, limit: int = 20) -> Select:
+    """Entities in the most of a user's analyses, with the number of analyses, grouped by label and normalized form."""
+    entities = models.AnalysisEntity
+    analyses = func.count(distinct(entities.analysis_id)).label("analyses")
+    query = select(entities.label, func.min(entities.text).label("text"), entities.normalized, analyses).where(
+        entities.analysis_id.in_(user_analysis_ids(user_id, last))
+    )
+    if label is not None:
+        query = query.where(entities.label == label)
+    return (
+        query.group_by(entities.label, entities.normalized)
+        .order_by(analyses.desc(), entities.label, entities.normalized)
+        .limit(limit)
+    )
+
+
+def mentioning(label: Optional[str] = None, text: Optional[str] = None, phrase: Optional[str] = None) -> Select:
+    """Ids of the analyses with an entity (label and text) or a key phrase, compared by normalized form."""
+    if phrase is not None:
+        phrases = models.AnalysisKeyPhrase
+        return select(phrases.analysis_id).where(phrases.normalized == normalize_term(phrase))
+    entities = models.AnalysisEntity
+    return select(entities.analysis_id).where(entities.label == label, entities.normalized == normalize_term(text))
+
+
+def backfill(db: Session, batch_size: int = 1000) -> int:
+    """
+    Write the key phrase and entity rows of analyses stored before the term
+    tables, from their JSON columns. Analyses that already have rows are
+    skipped, so an interrupted run can be started again. Returns how many
+    analyses got rows.
+    """
+    phrases, entities = models.AnalysisKeyPhrase, models.AnalysisEntity
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(models.TextAnalysis.id, models.TextAnalysis.key_phrases, models.TextAnalysis.named_entities)
+            .where(models.TextAnalysis.id > last_id)
+            .order_by(models.TextAnalysis.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            return indexed
+        first_id, last_id = rows[0].id, rows[-1].id
+        done = set(db.scalars(union(
+            select(phrases.analysis_id).where(phrases.analysis_id.between(first_id, last_id)),
+            select(entities.analysis_id).where(entities.analysis_id.between(first_id, last_id)),
+        )))
+        phrase_batch, entity_batch = [], []
+        for row in rows:
+            if row.id in done:
+                continue
+            new_phrases = [{"analysis_id": row.id, **term} for term in key_phrase_rows(row.key_phrases)]
+            new_entities = [{"analysis_id": row.id, **term} for term in entity_rows(row.named_entities)]
+            if new_phrases or new_entities:
+                phrase_batch.extend(new_phrases)
+                entity_batch.extend(new_entities)
+                indexed += 1
+        if phrase_batch:
+            db.execute(insert(phrases), phrase_batch)
+        if entity_batch:
+            db.execute(insert(entities), entity_batch)
+        db.commit()
+        print(f"Checked analyses up to id {last_id}, {indexed} indexed", file=sys.stderr, flush=True)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description='Manage the key phrase and entity tables of stored analyses')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    backfill_parser = subcommands.add_parser('backfill', help='Fill the tables from the JSON columns of older analyses')
+    backfill_parser.add_argument('--batch-size', type=int, default=1000, help='Analyses read and written at once')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.getenv('LOG_LEVEL', 'WARNING'))
+    from .database import SessionLocal, engine
+
+    models.Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        indexed = backfill(db, args.batch_size)
+    finally:
+        db.close()
+    print(f"Indexed {indexed} analyses", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,11 @@
-from .nlp import analyze_text
+from .nlp import (
+    analyze_text, analyze_texts, resolve_fields, UnsupportedLanguageError,
+    ANALYSIS_COMPONENTS, ANALYZER_VERSION, SENTIMENT_BACKEND
+)
+from .long_document import analyze_long_text
 
-# Re-export analyze_text function
-__all__ = ['analyze_text']
+# Re-export analysis functions
+__all__ = [
+    'analyze_text', 'analyze_texts', 'analyze_long_text', 'resolve_fields', 'UnsupportedLanguageError',
+    'ANALYSIS_COMPONENTS', 'ANALYZER_VERSION', 'SENTIMENT_BACKEND'
+]
@@ -23,15 +23,18 @@ class DisplayManager {
         this.createDashboardLayout(result);
         
         // Render each section with enhanced visuals
-        this.renderOverviewCards(result);
-        this.renderSentimentAnalysis(result);
-        this.renderReadabilityMetrics(result);
-        this.renderKeyPhrases(result);
-        this.renderNamedEntities(result);
-        this.renderLanguageInfo(result);
-        this.renderContentCategory(result);
-        this.renderSummary(result);
-        this.renderInsightsPanel(result);
+        // (analyses requested with a subset of fields leave the other components null)
+        const hasSentiment = result.sentiment != null;
+        const hasReadability = result.flesch_score != null;
+        if (hasSentiment && hasReadability) this.renderOverviewCards(result);
+        if (hasSentiment) this.renderSentimentAnalysis(result);
+        if (hasReadability) this.renderReadabilityMetrics(result);
+        if (result.key_phrases != null) this.renderKeyPhrases(result);
+        if (result.named_entities != null) this.renderNamedEntities(result);
+        if (result.language_code != null) this.renderLanguageInfo(result);
+        if (result.content_category != null) this.renderContentCategory(result);
+        if (result.summary != null) this.renderSummary(result);
+        if (hasSentiment && hasReadability && result.professional_metrics != null) this.renderInsightsPanel(result);
     }
 
     // Create enhanced dashboard layout
@@ -1010,7 +1013,7 @@ class DisplayManager {
                                 <h4 class="font-semibold text-primary text-lg">${analysis.title}</h4>
                                 <span class="text-sm text-secondary">${window.Utils.formatDate(analysis.created_at)}</span>
                             </div>
-                            <p class="text-secondary line-clamp-2 mb-3">${window.Utils.truncateText(analysis.text, 150)}</p>
+                            <p class="text-secondary line-clamp-2 mb-3">${window.Utils.truncateText(analysis.excerpt || '', 150)}</p>
                         </div>
                         <button onclick="event.stopPropagation(); window.analysisManager.deleteAnalysis(${analysis.id})" 
                                 class="ml-4 p-2 text-gray-400 hover:text-red-600 hover:bg-red-50 rounded-lg transition-all duration-200">
@@ -1040,7 +1043,7 @@ class DisplayManager {
                         </div>
                         <div class="p-3 bg-gray-50 rounded-lg text-center">
                             <div class="text-sm font-medium text-purple-600">
-                                ${analysis.key_phrases ? analysis.key_phrases.length : 0}
+                                ${analysis.key_phrase_count || 0}
                             </div>
                             <div class="text-xs text-secondary">Key Phrases</div>
                         </div>
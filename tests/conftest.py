@@ -0,0 +1,9 @@
+from src.model_registry import DEFAULT_MODEL, get_model
+
+# Tests that run the spaCy pipeline, skipped when the model is not installed
+MODEL_TESTS = ["test_live.py", "test_sentiment.py"]
+
+try:
+    get_model(DEFAULT_MODEL)
+except RuntimeError:
+    collect_ignore = MODEL_TESTS
@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from src.live import LiveDocument, LiveSession
+
+TEXT = "The new release is great. Everyone on the team loves it.\n\nThe old one was slow and unreliable."
+
+
+def push(fields):
+    """Run a session over TEXT and return the messages it sends."""
+    async def run():
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        session = LiveSession(LiveDocument(fields), send, debounce=0)
+        session.receive({"type": "set", "text": TEXT})
+        await session._task
+        return messages
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("fields", [["sentiment"], ["category"], ["readability"], ["sentiment", "category"]])
+def test_session_pushes_result(fields):
+    messages = push(fields)
+    assert [message["type"] for message in messages] == ["analysis"]
+    assert messages[0]["version"] == 1
+    assert messages[0]["result"] is not None
+
+
+def test_sentiment_only_matches_full_document():
+    document = LiveDocument(["sentiment"])
+    document.set_text(TEXT)
+    update = document.analyze()
+    assert update.analysis["sentiment"] in ("positive", "neutral", "negative")
+    assert update.paragraphs == 2 and update.parsed == 2
+
+    document.apply_edit(0, 0, "Hello. ")
+    update = document.analyze()
+    assert update.parsed == 1
+
+
+def test_empty_text_has_no_result():
+    document = LiveDocument(["sentiment"])
+    document.set_text("   ")
+    assert document.analyze().analysis is None
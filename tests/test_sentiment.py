@@ -0,0 +1,29 @@
+import os
+
+import pytest
+from textblob import TextBlob
+
+from src.nlp import SENTIMENT_BACKEND, parse
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "benchmarks", "data", "sentiment_corpus.txt")
+TOLERANCE = 0.05
+
+with open(CORPUS_PATH, encoding="utf-8") as f:
+    CORPUS = [line.strip() for line in f if line.strip()]
+
+pytestmark = pytest.mark.skipif(SENTIMENT_BACKEND != "spacy", reason="the spaCy sentiment component is not loaded")
+
+
+@pytest.mark.parametrize("text", CORPUS)
+def test_spacy_sentiment_matches_textblob(text):
+    doc = parse(text, {"sentiment"})
+    sentiment = TextBlob(text).sentiment
+    assert doc._.subjectivity == pytest.approx(sentiment.subjectivity, abs=TOLERANCE)
+    # TextBlob splits "can't" into "ca n ' t" and misses the negation, which spaCy keeps as "n't"
+    if "n't" not in text:
+        assert doc._.polarity == pytest.approx(sentiment.polarity, abs=TOLERANCE)
+
+
+def test_negated_contraction_flips_polarity():
+    assert parse("The food wasn't good.", {"sentiment"})._.polarity < 0
@@ -0,0 +1,58 @@
+import os
+import re
+
+import pytest
+
+from src.syllables import count_syllables, count_syllables_lower
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                           "benchmarks", "data", "sentiment_corpus.txt")
+
+EDGE_CASES = [
+    "a", "e", "I", "the", "The", "THE", "queue", "rhythm", "eye", "be", "free", "smile", "create",
+    "don't", "co-operate", "e-mail", "x", "123", "$2", "...", "İstanbul", "ÉCOLE", "naïve", "café",
+    "Ünïcödé", "ΣΟΦΟΣ", "日本語", "yes", "Yyy", "aeiouy", "strengths", "reevaluate",
+]
+
+
+def original_count_syllables(word):
+    """TextAnalyzer._count_syllables before the shared counter, kept as the reference."""
+    word = word.lower()
+    count = 0
+    vowels = 'aeiouy'
+    if word[0] in vowels:
+        count += 1
+    for index in range(1, len(word)):
+        if word[index] in vowels and word[index - 1] not in vowels:
+            count += 1
+    if word.endswith('e'):
+        count -= 1
+    if count == 0:
+        count += 1
+    return count
+
+
+def corpus_words():
+    with open(CORPUS_PATH, encoding="utf-8") as f:
+        return re.findall(r"\S+", f.read())
+
+
+@pytest.mark.parametrize("word", EDGE_CASES)
+def test_edge_cases_match_original(word):
+    assert count_syllables(word) == original_count_syllables(word)
+
+
+def test_corpus_matches_original():
+    words = corpus_words()
+    assert [count_syllables(word) for word in words] == [original_count_syllables(word) for word in words]
+
+
+@pytest.mark.parametrize("word, syllables", [
+    ("a", 1), ("the", 1), ("smile", 1), ("rhythm", 1), ("queue", 1), ("beautiful", 3), ("naïve", 1), ("日本語", 1),
+])
+def test_known_counts(word, syllables):
+    assert count_syllables(word) == syllables
+
+
+def test_case_insensitive():
+    assert count_syllables("ANALYSIS") == count_syllables_lower("analysis") == 4